@@ -0,0 +1,69 @@
+# ==========================================
+# ⏱️ Benchmark: WebSocket fan-out latency (2 -> 200 dashboards)
+# ==========================================
+# ใช้ WebSocket ปลอมที่บันทึกเวลาที่ได้รับข้อความ และมี client ช้า 1 ตัวปนอยู่
+# เพื่อดูว่า latency ของ client ปกติไม่ขึ้นกับจำนวน/ความช้าของ client อื่น
+#   python -m benchmarks.bench_broadcast
+import argparse
+import asyncio
+import statistics
+import time
+
+from web.backend.broadcast import ConnectionManager
+
+
+# เวลาที่ publish ของแต่ละข้อความ (key = ข้อความที่ encode แล้ว) เพื่อไม่ต้อง decode ใน client ปลอม
+SENT_AT = {}
+
+
+class FakeWebSocket:
+    def __init__(self, delay=0.0):
+        self.delay = delay
+        self.latencies = []
+
+    async def accept(self):
+        pass
+
+    async def send_text(self, text):
+        if self.delay:
+            await asyncio.sleep(self.delay)
+        self.latencies.append(time.perf_counter() - SENT_AT[text])
+
+
+async def run(clients, messages, slow_delay):
+    manager = ConnectionManager(max_queue=100)
+    fast = [FakeWebSocket() for _ in range(clients - 1)]
+    slow = FakeWebSocket(delay=slow_delay)
+    for ws in fast + [slow]:
+        await manager.connect(ws)
+
+    for i in range(messages):
+        text = f'{{"seq": {i}, "ax": 0.1, "ay": 0.2, "az": 1.0}}'
+        SENT_AT[text] = time.perf_counter()
+        manager.publish_text(text)
+        await asyncio.sleep(0.001)
+    await asyncio.sleep(0.05)
+
+    lat = sorted(x for ws in fast for x in ws.latencies)
+    stats = manager.stats()
+    for ws in fast + [slow]:
+        manager.disconnect(ws)
+    return lat, stats
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--messages", type=int, default=200)
+    parser.add_argument("--slow-delay", type=float, default=0.5)
+    args = parser.parse_args()
+
+    for clients in (2, 10, 50, 200):
+        lat, stats = asyncio.run(run(clients, args.messages, args.slow_delay))
+        p50 = statistics.median(lat) * 1e3
+        p99 = lat[int(len(lat) * 0.99) - 1] * 1e3
+        print(f"{clients:4d} clients | p50 {p50:7.3f} ms | p99 {p99:7.3f} ms | "
+              f"dropped(slow client) {stats['dropped']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+# ==========================================
+# ⏱️ Benchmark: spectral features (ทีละ window vs src/features.py แบบ batch) บน 1 core
+# ==========================================
+#   python -m benchmarks.bench_features --windows 20000
+import os
+
+# ล็อกให้ใช้ core เดียว (ต้องตั้งก่อน import numpy / scipy)
+for var in ("OMP_NUM_THREADS", "OPENBLAS_NUM_THREADS", "MKL_NUM_THREADS"):
+    os.environ.setdefault(var, "1")
+
+import argparse  # noqa: E402
+import sys  # noqa: E402
+import time  # noqa: E402
+
+import numpy as np  # noqa: E402
+from scipy import fft as sp_fft, signal, stats  # noqa: E402
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+import features  # noqa: E402
+
+
+# --- reference: วนทีละ window แบบ calculate_fft ใน notebooks/vibration.py ---
+def loop_features(windows, extractor):
+    out = []
+    for w in windows:
+        rms = np.sqrt(np.mean(w ** 2))
+        peak = np.max(np.abs(w))
+        kurt = stats.kurtosis(w, fisher=False)
+        spec = np.abs(sp_fft.rfft(w * extractor.taper)) ** 2
+        env = np.abs(signal.hilbert(w))
+        env_spec = np.abs(sp_fft.rfft((env - env.mean()) * extractor.taper)) ** 2
+        bands = [spec[m].sum() / spec.sum() for m in extractor.band_matrix.T.astype(bool)]
+        env_bands = [env_spec[m].sum() / env_spec.sum() for m in extractor.band_matrix.T.astype(bool)]
+        out.append([rms, peak, peak / rms, kurt] + bands + env_bands)
+    return np.asarray(out)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--windows", type=int, default=20_000)
+    parser.add_argument("--loop-windows", type=int, default=2_000, help="จำนวน window ของแบบวนลูป")
+    parser.add_argument("--time-steps", type=int, default=1024)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    x = rng.normal(size=(args.windows, args.time_steps)).astype(np.float32)
+    extractor = features.SpectralFeatures(args.time_steps, workers=1)
+    extractor.transform(x[:256])  # warm-up (สร้าง FFT plan)
+
+    t0 = time.perf_counter()
+    loop_features(x[:args.loop_windows], extractor)
+    t_loop = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    feats = extractor.transform(x)
+    t_vec = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    features.time_features(x)
+    t_time = time.perf_counter() - t0
+
+    print(f"windows {args.time_steps} samples, {len(extractor.names)} features, 1 core")
+    print(f"   loop (per window) : {args.loop_windows / t_loop:10.0f} windows/s")
+    print(f"   batched (full)    : {args.windows / t_vec:10.0f} windows/s  ({feats.shape})")
+    print(f"   time-domain only  : {args.windows / t_time:10.0f} windows/s  (pre-filter path)")
+
+
+if __name__ == "__main__":
+    main()
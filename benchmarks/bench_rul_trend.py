@@ -0,0 +1,77 @@
+# ==========================================
+# ⏱️ Benchmark: RUL trend filter (rul_trend.py)
+# ==========================================
+# 1) ความแม่น: RUL จริงลดลง 1 ชม./ชม. + noise ของโมเดล -> เทียบ error ของค่าดิบกับ rul_smooth
+#    และสัดส่วนที่ค่าจริงอยู่ใน band (rul_low..rul_high)
+# 2) ความเร็ว/หน่วยความจำ: update() ต่อครั้ง เมื่อมีหลายพันเครื่อง
+#   python -m benchmarks.bench_rul_trend --devices 5000 --noise 25
+import argparse
+import time
+import tracemalloc
+
+import numpy as np
+
+from web.backend.rul_trend import RulTrendTracker
+
+
+def accuracy(noise, period_s, hours, seed):
+    rng = np.random.default_rng(seed)
+    tracker = RulTrendTracker()
+    steps = int(hours * 3600 / period_s)
+    t = np.arange(1, steps + 1) * period_s
+    true = 400.0 - t / 3600.0
+    measured = true + rng.normal(0, noise, steps)
+    smooth = np.empty(steps)
+    inside = np.empty(steps, dtype=bool)
+    for i in range(steps):
+        est = tracker.update("unit", measured[i], now=t[i])
+        smooth[i] = est["rul_smooth"]
+        inside[i] = est["rul_low"] <= true[i] <= est["rul_high"]
+    warm = steps // 10   # ตัดช่วงเริ่มต้นที่ filter ยังไม่นิ่ง
+    raw_rmse = float(np.sqrt(np.mean((measured[warm:] - true[warm:]) ** 2)))
+    smooth_rmse = float(np.sqrt(np.mean((smooth[warm:] - true[warm:]) ** 2)))
+    return raw_rmse, smooth_rmse, float(inside[warm:].mean()), est
+
+
+def speed(devices, updates, seed):
+    rng = np.random.default_rng(seed)
+    ids = [f"compressor-{i:05d}" for i in range(devices)]
+    values = rng.normal(300, 20, updates).tolist()
+
+    tracemalloc.start()
+    tracker = RulTrendTracker()
+    for d in ids:
+        tracker.update(d, 300.0, now=0.0)
+    per_device = tracemalloc.get_traced_memory()[0] / devices
+    tracemalloc.stop()
+
+    t0 = time.perf_counter()
+    for i in range(updates):
+        tracker.update(ids[i % devices], values[i], now=1.0 + i * 1e-3)
+    return (time.perf_counter() - t0) / updates * 1e6, per_device
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--devices", type=int, default=5000)
+    parser.add_argument("--updates", type=int, default=500_000)
+    parser.add_argument("--noise", type=float, default=25.0, help="std ของ rul_predict (ชั่วโมง)")
+    parser.add_argument("--period", type=float, default=10.0, help="วินาทีระหว่างผลโมเดล")
+    parser.add_argument("--hours", type=float, default=250.0)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    raw_rmse, smooth_rmse, coverage, est = accuracy(args.noise, args.period, args.hours, args.seed)
+    print(f"📉 accuracy (noise σ={args.noise} h, every {args.period:.0f}s for {args.hours:.0f} h)")
+    print(f"   RMSE raw rul_predict : {raw_rmse:8.2f} h")
+    print(f"   RMSE rul_smooth      : {smooth_rmse:8.2f} h")
+    print(f"   band coverage        : {coverage:8.1%}")
+    print(f"   final slope          : {est['rul_slope']:8.3f} h/h (true -1.000)")
+
+    us, per_device = speed(args.devices, args.updates, args.seed)
+    print(f"⏱️ {args.updates:,} updates over {args.devices:,} devices: {us:.2f} µs/update, "
+          f"{per_device:.0f} B/device")
+
+
+if __name__ == "__main__":
+    main()
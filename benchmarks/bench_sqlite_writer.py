@@ -0,0 +1,80 @@
+# ==========================================
+# ⏱️ Benchmark: SQLite ingest path (per-row vs batched writer)
+# ==========================================
+# รันจาก root ของ repo:
+#   python -m benchmarks.bench_sqlite_writer --rows 20000
+import argparse
+import os
+import sqlite3
+import tempfile
+import time
+from datetime import datetime
+
+from web.backend import database
+
+
+def make_sample(i):
+    return {
+        "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S.%f")[:-3],
+        "ax": 0.1 * (i % 10), "ay": -0.2, "az": 1.0,
+        "temp": 55.0, "amp": 4.2,
+        "rul_predict": 300.0,
+        "status": 0,
+    }
+
+
+def bench_per_row(shard_dir, rows):
+    """ทางเดิม: connect -> INSERT -> commit -> close ทุกแถว"""
+    database.SHARD_DIR = shard_dir
+    database.init_db()
+    path = database.ShardStore(shard_dir).path_for(database.day_of(int(time.time() * 1000)))
+    start = time.perf_counter()
+    for i in range(rows):
+        # เหมือน insert_data_sqlite ก่อนมี writer: ไม่ถือ connection / ไม่ตั้ง WAL / commit ทีละแถว
+        conn = sqlite3.connect(path)
+        conn.execute(database.INSERT_SQL, database.row_from_data(make_sample(i)))
+        conn.commit()
+        conn.close()
+    return time.perf_counter() - start
+
+
+def bench_batched(shard_dir, rows, batch_size, max_queue):
+    """ทางใหม่: submit เข้า queue แล้วให้ writer thread เขียนแบบ executemany"""
+    database.SHARD_DIR = shard_dir
+    database.init_db()
+    writer = database.SQLiteBatchWriter(shard_dir, max_queue=max_queue, batch_size=batch_size,
+                                        put_timeout=1.0)
+    writer.start()
+    start = time.perf_counter()
+    for i in range(rows):
+        writer.submit(make_sample(i))
+    writer.stop(timeout=60)
+    elapsed = time.perf_counter() - start
+    return elapsed, writer.stats()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=20000)
+    parser.add_argument("--per-row-rows", type=int, default=2000,
+                        help="ทางเดิมช้ามาก จึงวัดด้วยจำนวนแถวที่น้อยกว่าแล้วคิดเป็น rows/sec")
+    parser.add_argument("--batch-size", type=int, default=500)
+    parser.add_argument("--max-queue", type=int, default=10000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        database.DB_NAME = os.path.join(tmp, "maintenance_logs.db")
+        t_row = bench_per_row(os.path.join(tmp, "per_row"), args.per_row_rows)
+        t_batch, stats = bench_batched(os.path.join(tmp, "batched"), args.rows,
+                                       args.batch_size, args.max_queue)
+
+    rate_row = args.per_row_rows / t_row
+    rate_batch = stats["written"] / t_batch
+    print(f"per-row connect/commit    : {rate_row:12,.0f} rows/sec ({args.per_row_rows} rows)")
+    print(f"SQLiteBatchWriter          : {rate_batch:12,.0f} rows/sec ({stats['written']} rows, "
+          f"{stats['batches']} batches, dropped={stats['dropped']})")
+    print(f"speedup                    : {rate_batch / rate_row:12.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+# ==========================================
+# ⏱️ Benchmark: retention cleanup & insert latency (legacy table vs day shards)
+# ==========================================
+# สร้างข้อมูลจำลองกระจาย --days วัน (วันล่าสุด = วันนี้) แล้ววัด
+#   1) latency ของการ insert 1 batch ตอนที่ตารางใหญ่แล้ว
+#   2) เวลาของการลบข้อมูลเก่ากว่า 7 วัน
+#   python -m benchmarks.bench_storage --rows 50000000
+# (50M แถวใช้พื้นที่ดิสก์หลาย GB และใช้เวลาสร้างข้อมูลนาน ลองด้วย --rows 2000000 ก่อนได้)
+import argparse
+import os
+import statistics
+import tempfile
+import time
+from datetime import datetime
+
+from web.backend import database
+
+LEGACY_SCHEMA = '''
+    CREATE TABLE IF NOT EXISTS sensor_summary (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        timestamp TEXT,
+        ax REAL, ay REAL, az REAL,
+        temp REAL, amp REAL,
+        rul_predict REAL,
+        status INTEGER
+    )
+'''
+LEGACY_INSERT = '''
+    INSERT INTO sensor_summary (timestamp, ax, ay, az, temp, amp, rul_predict, status)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+'''
+
+
+def generate_batches(rows, days, devices, batch_size):
+    """คืน batch ของแถว (ts_ms, device, ...) เรียงตามเวลา ครอบคลุม `days` วันล่าสุด"""
+    end_ms = int(time.time() * 1000)
+    start_ms = end_ms - days * 86400 * 1000
+    step = (end_ms - start_ms) / rows
+    for first in range(0, rows, batch_size):
+        n = min(batch_size, rows - first)
+        yield [
+            (int(start_ms + (first + i) * step), f"compressor-{(first + i) % devices:02d}",
+             0.1, -0.2, 1.0, 55.0, 4.2, 300.0, 0)
+            for i in range(n)
+        ]
+
+
+def legacy_row(row):
+    ts = datetime.fromtimestamp(row[0] / 1000).strftime("%Y-%m-%d %H:%M:%S.%f")[:-3]
+    return (ts,) + row[2:]
+
+
+def bench_legacy(path, args):
+    conn = database._connect(path)
+    conn.execute(LEGACY_SCHEMA)
+    for batch in generate_batches(args.rows, args.days, args.devices, args.load_batch):
+        with conn:
+            conn.executemany(LEGACY_INSERT, [legacy_row(r) for r in batch])
+
+    insert_ms = []
+    for batch in generate_batches(args.probe_batch * args.probes, 1, args.devices, args.probe_batch):
+        rows = [legacy_row(r) for r in batch]
+        t0 = time.perf_counter()
+        with conn:
+            conn.executemany(LEGACY_INSERT, rows)
+        insert_ms.append((time.perf_counter() - t0) * 1000)
+
+    t0 = time.perf_counter()
+    with conn:
+        conn.execute("DELETE FROM sensor_summary WHERE timestamp < datetime('now', '-7 days')")
+    cleanup_s = time.perf_counter() - t0
+    conn.close()
+    return insert_ms, cleanup_s
+
+
+def bench_sharded(shard_dir, args):
+    store = database.ShardStore(shard_dir)
+    for batch in generate_batches(args.rows, args.days, args.devices, args.load_batch):
+        store.insert_rows(batch)
+
+    insert_ms = []
+    for batch in generate_batches(args.probe_batch * args.probes, 1, args.devices, args.probe_batch):
+        t0 = time.perf_counter()
+        store.insert_rows(batch)
+        insert_ms.append((time.perf_counter() - t0) * 1000)
+
+    t0 = time.perf_counter()
+    database.cleanup_old_sqlite_data(store=store)
+    cleanup_s = time.perf_counter() - t0
+    store.close()
+    return insert_ms, cleanup_s
+
+
+def report(name, insert_ms, cleanup_s):
+    insert_ms = sorted(insert_ms)
+    p99 = insert_ms[max(0, int(len(insert_ms) * 0.99) - 1)]
+    print(f"{name:8s} | insert batch p50 {statistics.median(insert_ms):8.2f} ms | "
+          f"p99 {p99:8.2f} ms | cleanup {cleanup_s * 1000:12.1f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=50_000_000)
+    parser.add_argument("--days", type=int, default=10)
+    parser.add_argument("--devices", type=int, default=50)
+    parser.add_argument("--load-batch", type=int, default=50_000)
+    parser.add_argument("--probe-batch", type=int, default=500)
+    parser.add_argument("--probes", type=int, default=50)
+    parser.add_argument("--dir", default=None, help="โฟลเดอร์ชั่วคราว (ต้องมีที่ว่างพอ)")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(dir=args.dir) as tmp:
+        database.DB_NAME = os.path.join(tmp, "maintenance_logs.db")
+        database.SHARD_DIR = os.path.join(tmp, "shards")
+        database.init_db()
+        print(f"Loading {args.rows:,} rows over {args.days} days into each layout...")
+        report("legacy", *bench_legacy(os.path.join(tmp, "legacy.db"), args))
+        report("sharded", *bench_sharded(os.path.join(tmp, "shards"), args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+# ==========================================
+# ⏱️ Benchmark: sliding-window segmentation (for-loop เดิม vs src/windowing.py)
+# ==========================================
+# ใช้ข้อมูลจำลองขนาดเท่า CWRU (48 kHz ~10 วินาทีต่อไฟล์) และ NASA FD00x
+#   python -m benchmarks.bench_windowing --recordings 16 --units 700
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+import windowing  # noqa: E402
+
+
+# --- โค้ดเดิมจาก src/model.py (ใช้เป็น reference) ---
+def loop_create_segments(data_list, label_list, time_steps, step):
+    segments = []
+    labels = []
+    for i, data in enumerate(data_list):
+        label = label_list[i]
+        for x in range(0, len(data) - time_steps, step):
+            segment = data[x : x + time_steps]
+            segments.append(segment)
+            labels.append(label)
+    return np.array(segments), np.array(labels)
+
+
+def loop_create_sensor_segments(df, time_steps, features, label_col='RUL'):
+    x_segments = []
+    y_labels = []
+    for unit_id in df['unit_id'].unique():
+        unit_data = df[df['unit_id'] == unit_id]
+        data_values = unit_data[features].values
+        label_values = unit_data[label_col].values
+        for i in range(len(unit_data) - time_steps):
+            x_segments.append(data_values[i : i + time_steps])
+            y_labels.append(label_values[i + time_steps])
+    return np.array(x_segments), np.array(y_labels)
+
+
+def timed(fn, *args):
+    t0 = time.perf_counter()
+    out = fn(*args)
+    return time.perf_counter() - t0, out
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--recordings", type=int, default=4, help="จำนวนไฟล์ CWRU จำลอง")
+    parser.add_argument("--samples", type=int, default=485_000, help="sample ต่อไฟล์")
+    parser.add_argument("--units", type=int, default=100, help="จำนวนเครื่อง NASA (FD001=100)")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    data_list = [rng.normal(size=(args.samples, 1)) for _ in range(args.recordings)]
+    labels = list(range(args.recordings))
+
+    t_loop, (x_loop, y_loop) = timed(loop_create_segments, data_list, labels, 1024, 512)
+    t_view, (x_view, y_view) = timed(windowing.segment_recordings, data_list, labels, 1024, 512)
+    t_arr, (x_arr, _) = timed(windowing.create_segments, data_list, labels, 1024, 512)
+    assert np.array_equal(x_loop, x_arr) and np.array_equal(y_loop, y_view)
+    print(f"CWRU  {x_loop.shape}: loop {t_loop * 1e3:8.1f} ms | views {t_view * 1e3:8.1f} ms "
+          f"| array {t_arr * 1e3:8.1f} ms | RAM loop {x_loop.nbytes / 1e6:.0f} MB "
+          f"vs views {x_view.base.nbytes / 1e6:.0f} MB")
+
+    lengths = rng.integers(128, 362, size=args.units)
+    df = pd.DataFrame({
+        "unit_id": np.repeat(np.arange(1, args.units + 1), lengths),
+        "temperature": rng.random(lengths.sum()),
+        "current": rng.random(lengths.sum()),
+    })
+    df["RUL"] = df.groupby("unit_id").cumcount(ascending=False)
+    features = ["temperature", "current"]
+
+    t_loop, (xs_loop, ys_loop) = timed(loop_create_sensor_segments, df, 50, features)
+    t_view, (xs_view, ys_view) = timed(windowing.segment_units, df, 50, features)
+    t_arr, (xs_arr, _) = timed(windowing.create_sensor_segments, df, 50, features)
+    assert np.array_equal(xs_loop, xs_arr) and np.array_equal(ys_loop, ys_view)
+    print(f"NASA  {xs_loop.shape}: loop {t_loop * 1e3:8.1f} ms | views {t_view * 1e3:8.1f} ms "
+          f"| array {t_arr * 1e3:8.1f} ms | RAM loop {xs_loop.nbytes / 1e6:.0f} MB "
+          f"vs views {xs_view.base.nbytes / 1e6:.1f} MB")
+
+    mean, std = x_view.window_stats()
+    assert np.isclose(mean, x_loop.mean()) and np.isclose(std, x_loop.std())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+# ==========================================
+# ⏱️ Benchmark: decode ข้อความจากบอร์ด (JSON เดิม vs binary wire.py) ต่อ 1 core
+# ==========================================
+# วัด messages/s ของการ decode จนได้ dict + vibration เป็น NumPy (ขั้นเดียวกับ on_message)
+#   python -m benchmarks.bench_wire --block 1024
+import os
+
+for var in ("OMP_NUM_THREADS", "OPENBLAS_NUM_THREADS", "MKL_NUM_THREADS"):
+    os.environ.setdefault(var, "1")
+
+import argparse  # noqa: E402
+import json  # noqa: E402
+import time  # noqa: E402
+
+import numpy as np  # noqa: E402
+
+from web.backend import wire  # noqa: E402
+
+SAMPLE = {
+    "device_id": "compressor-01",
+    "timestamp": "2026-10-18 12:00:00.123",
+    "ax": 0.512, "ay": -0.231, "az": 1.004,
+    "temp": 52.4, "amp": 4.37, "rul_predict": 250.0, "status": 0,
+}
+
+
+def decode_json(payload):
+    data = json.loads(payload)
+    vib = data.get("vib")
+    if vib is not None:
+        data["vib"] = np.asarray(vib, dtype=np.float32)
+    return data
+
+
+def rate(fn, payloads, seconds):
+    n = 0
+    t0 = time.perf_counter()
+    while time.perf_counter() - t0 < seconds:
+        for p in payloads:
+            fn(p)
+        n += len(payloads)
+    return n / (time.perf_counter() - t0)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--block", type=int, default=1024, help="จำนวน sample การสั่นต่อข้อความ")
+    parser.add_argument("--seconds", type=float, default=2.0)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    vib = rng.normal(scale=0.5, size=args.block).astype(np.float32)
+    vib_q = np.round(vib / wire.DEFAULT_VIB_SCALE) * wire.DEFAULT_VIB_SCALE   # ค่าเดียวกับที่ส่งผ่าน int16
+
+    cases = {
+        "scalars only": (json.dumps(SAMPLE).encode(), wire.encode(SAMPLE)),
+        f"+ {args.block} vib samples": (
+            json.dumps(dict(SAMPLE, vib=[round(float(v), 4) for v in vib_q])).encode(),
+            wire.encode(SAMPLE, vib=vib_q)),
+    }
+
+    # ตรวจว่า decode ได้ค่าเดิม
+    decoded = wire.decode(cases[f"+ {args.block} vib samples"][1])
+    assert np.allclose(decoded["vib"] * decoded["vib_scale"], vib_q, atol=1e-6)
+    assert decoded["device_id"] == SAMPLE["device_id"] and decoded["temp"] == SAMPLE["temp"]
+
+    print(f"decode on 1 core ({args.seconds:.0f}s per case)")
+    print(f"{'payload':<24}{'json B':>9}{'binary B':>10}{'json msg/s':>13}{'binary msg/s':>15}{'speedup':>9}")
+    for name, (as_json, as_binary) in cases.items():
+        r_json = rate(decode_json, [as_json] * 64, args.seconds)
+        r_bin = rate(wire.decode, [as_binary] * 64, args.seconds)
+        print(f"{name:<24}{len(as_json):>9}{len(as_binary):>10}{r_json:>13,.0f}{r_bin:>15,.0f}"
+              f"{r_bin / r_json:>8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
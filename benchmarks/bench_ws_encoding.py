@@ -0,0 +1,137 @@
+# ==========================================
+# 📦 Benchmark: WebSocket encoding (json เดิม vs columnar vs binary, +/- permessage-deflate)
+# ==========================================
+# จำลองหลายเครื่องส่ง 10 Hz แล้ววัด
+#   - bytes/s ที่ต้องส่งให้ Dashboard 1 จอ (รวม header ของ WebSocket frame)
+#   - เวลา encode ฝั่ง Backend ต่อวินาทีของข้อมูล
+#   - เวลา decode ฝั่ง client ด้วย wsCodec.js จริง (ต้องมี node; ไม่มีก็ข้ามส่วนนี้)
+#   python -m benchmarks.bench_ws_encoding --devices 50 --seconds 60
+import argparse
+import base64
+import json
+import os
+import shutil
+import subprocess
+import tempfile
+import time
+import zlib
+
+import numpy as np
+
+from web.backend import ws_encoding
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+NODE_SCRIPT = os.path.join(ROOT, "benchmarks", "ws_decode_bench.mjs")
+RATE_HZ = 10
+MODEL_PERIOD = 50   # tick: โมเดล/ค่ากรองเปลี่ยนทุก ~5 วินาที (pre-gate ข้าม window ปกติ)
+
+
+def ws_header(n):
+    """ขนาด header ของ WebSocket frame ฝั่ง server (ไม่มี mask)"""
+    return 2 if n < 126 else 4 if n < 65536 else 10
+
+
+def simulate(devices, seconds, seed):
+    """-> list ของ tick, แต่ละ tick = list ของ dict แบบที่ handle_message ส่งต่อ"""
+    rng = np.random.default_rng(seed)
+    temp = rng.uniform(45, 55, devices)
+    amp = rng.uniform(3.5, 5.0, devices)
+    rul = rng.uniform(150, 400, devices)
+    t0 = time.time()
+    ticks = []
+    for tick in range(int(seconds * RATE_HZ)):
+        ts = t0 + tick / RATE_HZ
+        stamp = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(ts)) + f".{int(ts * 1000) % 1000:03d}"
+        temp += rng.normal(0, 0.02, devices)
+        amp += rng.normal(0, 0.01, devices)
+        if tick % MODEL_PERIOD == 0:
+            rul -= rng.uniform(0, 0.5, devices)
+        samples = []
+        for d in range(devices):
+            ax, ay = (round(float(v), 3) for v in rng.uniform(-1.3, 1.3, 2))
+            samples.append({
+                "timestamp": stamp,
+                "ax": ax, "ay": ay, "az": round(float(rng.uniform(0.9, 1.1)), 3),
+                "temp": round(float(temp[d]), 1), "amp": round(float(amp[d]), 2),
+                "rul_predict": round(float(rul[d]), 0),
+                "status": int(abs(ax) > 1.2 or abs(ay) > 1.2),
+                "device_id": f"compressor-{d:03d}",
+                "rul_smooth": round(float(rul[d]), 1),
+                "rul_low": round(float(rul[d]) - 12, 1), "rul_high": round(float(rul[d]) + 12, 1),
+                "rul_slope": -0.9, "hours_to_threshold": round(float(rul[d] - 100) / 0.9, 1),
+            })
+        ticks.append(samples)
+    return ticks
+
+
+def encode_all(encoding, ticks):
+    """-> (list ของ message ที่ส่ง, เวลา encode รวม)"""
+    start = time.perf_counter()
+    if encoding == ws_encoding.ENCODING_JSON:
+        messages = [json.dumps(d) for samples in ticks for d in samples]
+    else:
+        encoder = ws_encoding.make_encoder(encoding)
+        messages = [encoder.encode(samples) for samples in ticks]
+    return messages, time.perf_counter() - start
+
+
+def wire_bytes(messages, deflate):
+    total = 0
+    compressor = zlib.compressobj(6, zlib.DEFLATED, -15) if deflate else None
+    for m in messages:
+        data = m if isinstance(m, bytes) else m.encode()
+        if compressor is not None:
+            # permessage-deflate (context takeover): sync flush ต่อข้อความ แล้วตัด 00 00 ff ff ท้ายทิ้ง
+            data = (compressor.compress(data) + compressor.flush(zlib.Z_SYNC_FLUSH))[:-4]
+        total += len(data) + ws_header(len(data))
+    return total
+
+
+def node_decode_times(all_messages, repeat):
+    node = shutil.which("node")
+    if node is None:
+        return None
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "frames.json")
+        with open(path, "w") as f:
+            json.dump({
+                enc: [{"b": base64.b64encode(m).decode()} if isinstance(m, bytes) else m for m in msgs]
+                for enc, msgs in all_messages.items()
+            }, f)
+        out = subprocess.run([node, NODE_SCRIPT, path, str(repeat)], capture_output=True, text=True, check=True)
+    return json.loads(out.stdout)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--devices", type=int, default=50)
+    parser.add_argument("--seconds", type=float, default=60.0)
+    parser.add_argument("--repeat", type=int, default=5, help="จำนวนรอบ decode ฝั่ง node (เอาค่าดีสุด)")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    ticks = simulate(args.devices, args.seconds, args.seed)
+    all_messages = {}
+    rows = []
+    for encoding in ws_encoding.ENCODINGS:
+        messages, encode_s = encode_all(encoding, ticks)
+        all_messages[encoding] = messages
+        rows.append((encoding, len(messages), wire_bytes(messages, False), wire_bytes(messages, True), encode_s))
+
+    decode = node_decode_times(all_messages, args.repeat)
+
+    base = rows[0][2]
+    print(f"📡 {args.devices} devices x {RATE_HZ} Hz for {args.seconds:.0f}s -> one dashboard")
+    print(f"{'encoding':<10}{'msgs/s':>9}{'KB/s':>10}{'KB/s+deflate':>14}{'vs json':>9}"
+          f"{'encode ms/s':>13}{'decode ms/s':>13}")
+    for encoding, n, raw, deflated, encode_s in rows:
+        dec = f"{decode[encoding] / args.seconds:>13.2f}" if decode else f"{'n/a':>13}"
+        print(f"{encoding:<10}{n / args.seconds:>9.0f}{raw / args.seconds / 1024:>10.1f}"
+              f"{deflated / args.seconds / 1024:>14.1f}{raw / base:>8.0%} "
+              f"{encode_s * 1000 / args.seconds:>12.2f}{dec}")
+    if decode is None:
+        print("⚠️ node not found: skipped client decode timing")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+# ==========================================
+# 🚦 Evaluation: anomaly pre-gate (web/backend/pregate.py) บนข้อมูล CWRU
+# ==========================================
+# จำลองเครื่องละ 1 ชนิด fault: ส่ง window ปกติ (Normal) ให้ gate เรียน baseline ก่อน แล้วเปลี่ยนเป็น window ของ fault
+# - healthy escalation rate: สัดส่วน window ปกติ (หลัง warmup) ที่ยังต้องรันโมเดล -> ลดงานโมเดลได้ ~1/rate เท่า
+# - fault recall: สัดส่วน window ที่เป็น fault ที่ถูกส่งเข้าโมเดล
+# - time-to-first-escalation: จำนวน window ตั้งแต่ fault เริ่มจนถูกส่งเข้าโมเดลครั้งแรก
+# ผลโมเดลจำลองด้วย label จริง (oracle) เพื่อให้ fault_hold ทำงานเหมือนตอนรันจริง
+#   python -m benchmarks.eval_pregate --data-dir data/raw
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+from dataset_cache import load_cwru_signal  # noqa: E402
+from input_pipeline import FILE_CONFIGS, STEP, TIME_STEPS  # noqa: E402
+from windowing import sliding_windows  # noqa: E402
+
+from web.backend.inference import DIAG_LABELS  # noqa: E402
+from web.backend.pregate import PreGate  # noqa: E402
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def load_windows(data_dir, filename, mean, std, limit):
+    signal = load_cwru_signal(os.path.join(data_dir, filename))
+    windows = sliding_windows(signal, TIME_STEPS, STEP)[:limit]
+    return (np.asarray(windows, dtype=np.float32) - mean) / std
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--data-dir", default="data/raw")
+    parser.add_argument("--healthy-windows", type=int, default=600, help="จำนวน window ปกติก่อนเริ่ม fault")
+    parser.add_argument("--fault-windows", type=int, default=200)
+    parser.add_argument("--period", type=float, default=1.0, help="วินาทีต่อ window (มีผลกับ heartbeat)")
+    args = parser.parse_args()
+
+    normal_file = next(f for label, f in FILE_CONFIGS if label == 0)
+    raw_normal = load_cwru_signal(os.path.join(args.data_dir, normal_file))
+    mean, std = float(raw_normal.mean()), float(raw_normal.std())  # z-score แบบเดียวกับ preprocess_params
+    healthy = load_windows(args.data_dir, normal_file, mean, std, args.healthy_windows)
+
+    clock = FakeClock()
+    gate = PreGate(clock=clock)
+    print(f"🚦 {len(healthy)} healthy windows + {args.fault_windows} fault windows per device, "
+          f"period {args.period}s")
+    print(f"{'fault':<20}{'healthy esc.':>13}{'reduction':>11}{'recall':>8}{'first (win)':>13}")
+
+    for label, filename in FILE_CONFIGS:
+        if label == 0:
+            continue
+        device = f"eval-{label}"
+        fault = load_windows(args.data_dir, filename, mean, std, args.fault_windows)
+
+        healthy_esc = warmup = 0
+        for w in healthy:
+            clock.now += args.period
+            reason = gate.check(device, w)
+            if reason == "warmup":
+                warmup += 1
+            elif reason is not None:
+                healthy_esc += 1
+            if reason is not None:
+                gate.report(device, {"diagnosis_label": DIAG_LABELS[0]})
+
+        caught, first = 0, None
+        for i, w in enumerate(fault):
+            clock.now += args.period
+            if gate.check(device, w) is not None:
+                caught += 1
+                first = i if first is None else first
+                gate.report(device, {"diagnosis_label": DIAG_LABELS[label]})
+
+        rate = healthy_esc / max(len(healthy) - warmup, 1)
+        reduction = f"{1 / rate:.1f}x" if rate else "inf"
+        print(f"{DIAG_LABELS[label]:<20}{rate:>13.3%}{reduction:>11}{caught / max(len(fault), 1):>8.1%}"
+              f"{'-' if first is None else first:>13}")
+
+    # ต้นทุนของ gate เอง (ต่อ window)
+    bench = PreGate()
+    t0 = time.perf_counter()
+    for w in healthy:
+        bench.check("bench", w)
+    per_window = (time.perf_counter() - t0) / max(len(healthy), 1)
+    stats = gate.stats()
+    print(f"\n⏱️ gate cost {per_window * 1e6:.1f} µs/window, escalations by reason: "
+          f"{stats['escalated_by_reason']}")
+
+
+if __name__ == "__main__":
+    main()
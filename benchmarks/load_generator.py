@@ -0,0 +1,300 @@
+# ==========================================
+# 🏋️ Load Generator: จำลอง N compressors -> main.py แล้ววัด latency แบบ end-to-end
+# ==========================================
+# แต่ละเครื่องเล่นข้อมูลจริงซ้ำ: temp / current จาก NASA FD001 (เครื่องละ unit) และ block การสั่นจาก CWRU
+# ทุกข้อความมีเวลาส่ง (epoch) ใน field timestamp -> วัดได้ 2 ช่วง:
+#   publish -> DB commit      (หลัง SQLiteBatchWriter flush ก้อนที่มีแถวนั้นเสร็จ)
+#   publish -> WebSocket      (client ปลอมที่ต่อกับ ConnectionManager ได้รับข้อความ)
+# โหมด:
+#   in-process (default): เรียก on_message ของ main.py ตรงๆ (แทน Thread ของ paho) ไม่ต้องมี broker
+#   --broker localhost:1883: ส่งผ่าน MQTT broker จริง (เช่น mosquitto ในเครื่อง) ทั้งฝั่งส่งและรับ
+# --ramp ไล่อัตราขึ้นทีละขั้นจนเจอจุดอิ่มตัว (ประมวลผลไม่ทัน / มีการทิ้งข้อความ / p99 เกินเกณฑ์)
+#
+# รันจาก root ของ repo:
+#   python -m benchmarks.load_generator --devices 50 --rate 10
+#   python -m benchmarks.load_generator --devices 100 --ramp 10,20,50,100,200 --format binary --block 512
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+import argparse  # noqa: E402
+import asyncio  # noqa: E402
+import json  # noqa: E402
+import tempfile  # noqa: E402
+import time  # noqa: E402
+
+import numpy as np  # noqa: E402
+
+from dataset_cache import NASA_COLUMNS, load_cwru_signal, load_nasa_array  # noqa: E402
+
+FILE_NAMES = ['Time_Normal_1_098.mat', 'IR007_1_110.mat', 'OR007_6_1_136.mat', 'B007_1_123.mat']
+BLOCKS_PER_DEVICE = 64          # จำนวน block การสั่นที่เตรียมไว้ล่วงหน้าต่อเครื่อง (วนใช้ซ้ำ)
+SATURATION_RATIO = 0.95         # ประมวลผลได้น้อยกว่านี้ของที่ส่ง = อิ่มตัว
+DRAIN_TIMEOUT_S = 10.0
+
+
+# --- 1. ข้อมูลจริงสำหรับเล่นซ้ำ ---
+
+def load_sources(data_dir, nasa_path, vibration=True):
+    """vibration=False (--block 0): ไม่แตะ CWRU เลย ใช้แค่ sensor ของ NASA"""
+    signals = []
+    for name in FILE_NAMES if vibration else ():
+        path = os.path.join(data_dir, name)
+        if os.path.exists(path):
+            signals.append(load_cwru_signal(path)[:, 0])
+    if vibration and not signals:
+        raise FileNotFoundError(f"no CWRU recordings found in {data_dir}")
+
+    table = load_nasa_array(nasa_path)
+    ids = table[:, NASA_COLUMNS.index('unit_id')]
+    cols = [NASA_COLUMNS.index('s2'), NASA_COLUMNS.index('s7')]   # s2=Temp, s7=Current
+    cuts = np.concatenate([[0], np.flatnonzero(ids[1:] != ids[:-1]) + 1, [len(ids)]])
+    units = [np.ascontiguousarray(table[a:b][:, cols]) for a, b in zip(cuts[:-1], cuts[1:])]
+    return signals or [None], units
+
+
+class Compressor:
+    """เครื่องจำลอง 1 ตัว: เล่น sensor ของ NASA unit หนึ่ง + block การสั่นจาก CWRU recording หนึ่ง"""
+
+    def __init__(self, index, signal, unit, block, fmt):
+        from web.backend import ingest, wire
+
+        self.wire = wire
+        self.device_id = f"load-{index:04d}"
+        self.topic = ingest.device_topic(self.device_id)
+        self.unit = unit
+        self.fmt = fmt
+        self.seq = 0
+        self.blocks = []
+        if block:
+            rng = np.random.default_rng(index)
+            starts = rng.integers(0, len(signal) - block, BLOCKS_PER_DEVICE)
+            for s in starts:
+                x = np.asarray(signal[s:s + block], dtype=np.float32)
+                q = np.clip(np.round(x / wire.DEFAULT_VIB_SCALE), -32768, 32767).astype(np.int16)
+                text = json.dumps([round(float(v), 4) for v in q * wire.DEFAULT_VIB_SCALE])
+                self.blocks.append((x, q, text))
+
+    def next_payload(self):
+        i = self.seq
+        self.seq += 1
+        temp, amp = self.unit[i % len(self.unit)]
+        data = {
+            "device_id": self.device_id,
+            "ax": 0.0, "ay": 0.0, "az": 1.0,
+            "temp": round(float(temp), 2), "amp": round(float(amp), 2),
+            "rul_predict": float(len(self.unit) - i % len(self.unit)),
+            "status": 0,
+        }
+        block = self.blocks[i % len(self.blocks)] if self.blocks else None
+        if block is not None:
+            data["ax"] = round(float(np.abs(block[0]).max()), 3)   # peak ของ block
+        now = time.time()
+        if self.fmt == "binary":
+            return self.wire.encode(data, vib=None if block is None else block[1], seq=i,
+                                    timestamp_us=int(now * 1e6))
+        data["timestamp"] = now
+        data["seq"] = i
+        text = json.dumps(data)
+        if block is not None:
+            # block การสั่น dump ไว้ล่วงหน้า (ไม่ให้ฝั่งส่งกิน CPU แข่งกับ backend)
+            text = text[:-1] + ', "vib": ' + block[2] + '}'
+        return text.encode()
+
+
+# --- 2. ตัววัด latency ---
+
+class LatencyProbe:
+    def __init__(self):
+        self.db = []
+        self.ws = []
+
+    def reset(self):
+        self.db = []
+        self.ws = []
+
+    @staticmethod
+    def summary(values):
+        if not values:
+            return "-"
+        ms = np.asarray(values) * 1000
+        return f"{np.percentile(ms, 50):7.1f} {np.percentile(ms, 99):8.1f}"
+
+
+class ProbeWebSocket:
+    """WebSocket ปลอม: อ่านเวลาส่งจาก timestamp ในข้อความ"""
+
+    def __init__(self, probe):
+        self.probe = probe
+
+    async def accept(self):
+        pass
+
+    async def send_text(self, text):
+        sent = json.loads(text).get("timestamp")
+        if isinstance(sent, (int, float)):
+            self.probe.ws.append(time.time() - sent)
+
+
+def install_db_probe(writer, probe):
+    """ครอบ _flush ของ writer: หลัง commit แล้ว latency = ตอนนี้ - timestamp ของแต่ละแถว"""
+    flush = writer._flush
+
+    def timed_flush(store, main_conn, batch):
+        flush(store, main_conn, batch)
+        now_ms = time.time() * 1000
+        probe.db.extend((now_ms - row[0]) / 1000 for row in batch)
+
+    writer._flush = timed_flush
+
+
+# --- 3. ฝั่งส่ง ---
+
+def publish_loop(compressors, rate_hz, seconds, publish):
+    """ส่งตามเวลาจริง: ข้อความที่ครบกำหนดถูกส่งทันที (ถ้าส่งไม่ทันจะเห็นใน sent/s)"""
+    n = len(compressors)
+    total_rate = rate_hz * n
+    sent = 0
+    start = time.perf_counter()
+    while True:
+        elapsed = time.perf_counter() - start
+        if elapsed >= seconds:
+            break
+        due = int(elapsed * total_rate)
+        while sent < due:
+            c = compressors[sent % n]
+            publish(c.topic, c.next_payload())
+            sent += 1
+        time.sleep(0.0005)
+    return sent, time.perf_counter() - start
+
+
+class _Message:
+    __slots__ = ("topic", "payload")
+
+    def __init__(self, topic, payload):
+        self.topic = topic
+        self.payload = payload
+
+
+def make_publisher(backend, broker):
+    if broker is None:
+        return lambda topic, payload: backend.on_message(None, None, _Message(topic, payload)), None
+    import paho.mqtt.client as mqtt
+
+    host, _, port = broker.partition(":")
+    sender = mqtt.Client()
+    sender.max_queued_messages_set(0)
+    sender.connect(host, int(port or 1883), 60)
+    sender.loop_start()
+    return lambda topic, payload: sender.publish(topic, payload), sender
+
+
+# --- 4. Main ---
+
+async def run(args):
+    from web.backend import database, ingest
+    from web.backend import main as backend
+
+    signals, units = load_sources(args.data_dir, args.nasa, vibration=args.block > 0)
+    os.chdir(tempfile.mkdtemp(prefix="pm_load_"))   # DB shard / rollup ของการทดสอบอยู่ในโฟลเดอร์ชั่วคราว
+
+    if args.workers:
+        backend.ingest_dispatcher = ingest.IngestDispatcher(
+            backend.handle_message, backend.forward_batch, workers=args.workers)
+    probe = LatencyProbe()
+    install_db_probe(backend.db_writer, probe)
+
+    # เริ่ม backend เฉพาะส่วนที่เกี่ยวกับ ingest (ไม่มี mock board / ไม่ต่อ public broker)
+    backend.main_loop = asyncio.get_running_loop()
+    database.init_db()
+    backend.db_writer.start()
+    backend.ingest_dispatcher.start()
+    for _ in range(args.clients):
+        await backend.manager.connect(ProbeWebSocket(probe))
+    if args.broker:
+        host, _, port = args.broker.partition(":")
+        backend.mqtt_client.connect(host, int(port or 1883), 60)
+        backend.mqtt_client.loop_start()
+        await asyncio.sleep(1.0)   # รอ subscribe
+
+    compressors = [Compressor(i, signals[i % len(signals)], units[i % len(units)], args.block, args.format)
+                   for i in range(args.devices)]
+    publish, sender = make_publisher(backend, args.broker)
+    sample = compressors[0].next_payload()
+    print(f"🏋️ {args.devices} devices, {args.format} payload {len(sample)} B, "
+          f"{'broker ' + args.broker if args.broker else 'in-process'}, "
+          f"{backend.ingest_dispatcher.workers} ingest workers, {args.clients} WS clients")
+    print(f"{'Hz/dev':>7}{'offered':>10}{'sent/s':>10}{'done/s':>10}{'dropped':>9}"
+          f"{'db p50':>9}{'p99 ms':>9}{'ws p50':>9}{'p99 ms':>9}  state")
+
+    rates = [float(r) for r in args.ramp.split(",")] if args.ramp else [args.rate]
+    saturation = None
+    for rate in rates:
+        probe.reset()
+        stats0 = backend.ingest_dispatcher.stats()
+        dropped0 = stats0["dropped"] + backend.db_writer.stats()["dropped"]
+        sent, elapsed = await asyncio.to_thread(publish_loop, compressors, rate, args.seconds, publish)
+        done = backend.ingest_dispatcher.stats()["processed"] - stats0["processed"]
+
+        # รอให้ queue ว่าง (และ writer flush) ก่อนสรุป latency ของขั้นนี้
+        deadline = time.perf_counter() + DRAIN_TIMEOUT_S
+        while time.perf_counter() < deadline:
+            s = backend.ingest_dispatcher.stats()
+            if s["processed"] + s["dropped"] - stats0["processed"] - stats0["dropped"] >= sent \
+                    and backend.db_writer.stats()["queue_depth"] == 0:
+                break
+            await asyncio.sleep(0.05)
+        await asyncio.sleep(backend.db_writer.flush_interval + 0.1)
+        dropped = (backend.ingest_dispatcher.stats()["dropped"] + backend.db_writer.stats()["dropped"]
+                   - dropped0)
+
+        offered = rate * args.devices
+        saturated = (done < SATURATION_RATIO * sent or sent < SATURATION_RATIO * offered * args.seconds
+                     or dropped > 0
+                     or (probe.ws and np.percentile(probe.ws, 99) * 1000 > args.max_p99_ms))
+        state = "⚠️ saturated" if saturated else "ok"
+        print(f"{rate:>7.0f}{offered:>10.0f}{sent / elapsed:>10.0f}{done / elapsed:>10.0f}{dropped:>9}"
+              f"{LatencyProbe.summary(probe.db):>18}{LatencyProbe.summary(probe.ws):>18}  {state}")
+        if saturated and saturation is None:
+            saturation = offered
+            if not args.keep_going:
+                break
+
+    if saturation is None:
+        print("✅ No saturation within the tested range")
+    else:
+        print(f"📉 Saturation at ~{saturation:.0f} msg/s offered")
+
+    if sender is not None:
+        sender.loop_stop()
+        sender.disconnect()
+    if args.broker:
+        backend.mqtt_client.loop_stop()
+        backend.mqtt_client.disconnect()
+    backend.ingest_dispatcher.stop()
+    backend.db_writer.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load generator / end-to-end latency for web/backend/main.py")
+    parser.add_argument("--devices", type=int, default=50)
+    parser.add_argument("--rate", type=float, default=10.0, help="ข้อความต่อวินาทีต่อเครื่อง")
+    parser.add_argument("--ramp", help="ไล่อัตรา (Hz ต่อเครื่อง) เช่น 10,20,50,100")
+    parser.add_argument("--seconds", type=float, default=5.0, help="เวลาต่อขั้น")
+    parser.add_argument("--block", type=int, default=0, help="sample การสั่นต่อข้อความ (0 = scalars เท่านั้น)")
+    parser.add_argument("--format", choices=("json", "binary"), default="json")
+    parser.add_argument("--broker", help="host[:port] ของ MQTT broker ในเครื่อง (default: in-process)")
+    parser.add_argument("--workers", type=int, default=0, help="จำนวน ingest worker (0 = ค่าใน main.py)")
+    parser.add_argument("--clients", type=int, default=1, help="จำนวน WebSocket client ปลอม")
+    parser.add_argument("--max-p99-ms", type=float, default=500.0, help="p99 (WebSocket) ที่ถือว่าอิ่มตัว")
+    parser.add_argument("--keep-going", action="store_true", help="ทดสอบต่อหลังเจอจุดอิ่มตัว")
+    parser.add_argument("--data-dir", default="data/raw")
+    parser.add_argument("--nasa", default="data/temp-current/train_FD001.txt")
+    args = parser.parse_args()
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
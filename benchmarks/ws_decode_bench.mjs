@@ -0,0 +1,33 @@
+// ใช้โดย benchmarks/bench_ws_encoding.py: จับเวลา decode ฝั่ง client ด้วย wsCodec.js ตัวเดียวกับ Dashboard
+//   node benchmarks/ws_decode_bench.mjs <frames.json> [repeat]
+// frames.json = {encoding: [ข้อความ (string) หรือ {"b": base64 ของ binary frame}]}
+// พิมพ์ {encoding: ms รวมต่อรอบ (ดีสุดจาก repeat รอบ)}
+import { readFileSync } from "node:fs";
+import { createFrameDecoder } from "../web/frontend/src/wsCodec.js";
+
+const [path, repeatArg] = process.argv.slice(2);
+const repeat = Number(repeatArg || 5);
+const frames = JSON.parse(readFileSync(path, "utf8"));
+
+const toMessage = (m) => {
+  if (typeof m === "string") return m;
+  const buf = Buffer.from(m.b, "base64");
+  return buf.buffer.slice(buf.byteOffset, buf.byteOffset + buf.byteLength); // ArrayBuffer แบบที่ browser ได้
+};
+
+const result = {};
+for (const [encoding, raw] of Object.entries(frames)) {
+  const messages = raw.map(toMessage);
+  let best = Infinity;
+  let rows = 0;
+  for (let i = 0; i < repeat; i++) {
+    const decode = createFrameDecoder();
+    rows = 0;
+    const start = performance.now();
+    for (const m of messages) rows += decode(m).length;
+    best = Math.min(best, performance.now() - start);
+  }
+  result[encoding] = best;
+  result[`${encoding}_rows`] = rows;
+}
+console.log(JSON.stringify(result));
@@ -3,18 +3,21 @@ import pandas as pd
 import matplotlib.pyplot as plt
 import seaborn as sns
 import numpy as np
+import os
+import sys
+
+# ใช้ตัวโหลดเดียวกับตอน train (src/dataset_cache.py -> .npy cache ใน data/cache)
+sys.path.insert(0, os.path.join(os.getcwd(), 'src'))
+from dataset_cache import load_nasa_frame
 
 # ตั้งค่า path (แก้ให้ตรงกับเครื่องคุณ)
 DATA_PATH = 'data/temp-current/train_FD001.txt'
 
-# 1. กำหนดชื่อ Column (ตามคู่มือ NASA แต่เราเลือกใช้บางตัว)
-col_names = ['unit_id', 'time_cycles', 'setting_1', 'setting_2', 'setting_3', 
-             's1', 's2', 's3', 's4', 's5', 's6', 's7', 's8', 's9', 's10', 
-             's11', 's12', 's13', 's14', 's15', 's16', 's17', 's18', 's19', 's20', 's21']
+# 1. ชื่อ Column (ตามคู่มือ NASA แต่เราเลือกใช้บางตัว) อยู่ใน dataset_cache.NASA_COLUMNS
 
 try:
-    # โหลดไฟล์ (sep='\s+' แปลว่าแยกด้วยช่องว่างกี่ช่องก็ได้)
-    df = pd.read_csv(DATA_PATH, sep='\s+', header=None, names=col_names)
+    # โหลดไฟล์ (ครั้งแรกอ่าน text แล้วเก็บเป็น .npy ครั้งต่อไปเปิดจาก cache)
+    df = load_nasa_frame(DATA_PATH)
     print(f"✅ Loaded NASA Data: {df.shape}")
 except FileNotFoundError:
     print("❌ Error: ไม่เจอไฟล์! เช็ค path ดีๆ นะครับ")
@@ -0,0 +1,428 @@
+# ==========================================
+# ⏱️ Backend Benchmark: Keras (.h5) vs ONNX vs TFLite INT8
+# ==========================================
+# ต่อยอดจาก check_onnx.py แต่รันแบบ headless ด้วย validation window จริง (CWRU + NASA)
+# - วัด load time, p50/p99 latency, throughput, peak RSS ต่อ backend x batch size x threads
+# - วัด drift เทียบ Keras (ความตรงกันของ diagnosis, RUL MAE) + accuracy/MAE เทียบเฉลยจริง
+# - TFLite ใช้ค่า quantize (scale / zero point / index) จาก Hardware/model_config.h แบบเดียวกับ firmware
+# - แต่ละ (backend, threads) รันใน process แยก -> peak RSS และการตั้งจำนวน thread ไม่ปนกัน
+# ผลลัพธ์เป็น JSON (diff ระหว่างรุ่นโมเดลได้)
+#
+# วิธีใช้ (รันจาก root ของ repo):
+#   python notebooks/benchmark_backends.py
+#   python notebooks/benchmark_backends.py --batch-sizes 1,8,32 --threads 1,4 --samples 256
+import argparse
+import hashlib
+import json
+import os
+import platform
+import re
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.getcwd(), 'src'))
+
+# --- 1. Config ---
+KERAS_PATH = 'models/hybrid_model_v1.h5'
+ONNX_PATH = 'models/hybrid_model_v1.onnx'
+TFLITE_PATH = 'models/model_quant_int8.tflite'
+CONFIG_H_PATH = 'Hardware/model_config.h'
+PARAMS_PATH = 'models/preprocess_params.json'
+DATA_FOLDER = 'data/raw'
+NASA_PATH = 'data/temp-current/train_FD001.txt'
+OUTPUT_PATH = 'models/backend_benchmark.json'
+
+BACKENDS = ('keras', 'onnx', 'tflite')
+BATCH_SIZES = (1, 8, 32)
+THREADS = (1, 2, 4)
+NUM_SAMPLES = 512   # จำนวน validation window ที่ใช้ (เลือกกระจายทั้งชุด)
+WARMUP_RUNS = 3
+MIN_RUNS = 30       # จำนวนครั้งขั้นต่ำต่อ batch size (วนซ้ำข้อมูลถ้าไม่พอ)
+
+
+def parse_model_config(path=CONFIG_H_PATH):
+    """อ่าน #define ตัวเลขทั้งหมดจาก model_config.h -> dict"""
+    config = {}
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            m = re.match(r'\s*#define\s+(\w+)\s+(-?[\d.]+(?:[eE]-?\d+)?)f?\b', line)
+            if m:
+                value = m.group(2)
+                config[m.group(1)] = float(value) if re.search(r'[.eE]', value) else int(value)
+    return config
+
+
+def file_sha1(path):
+    h = hashlib.sha1()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            h.update(block)
+    return h.hexdigest()
+
+
+def peak_rss_mb():
+    """peak RSS ของ process นี้ (VmHWM รีเซ็ตหลัง exec ต่างจาก ru_maxrss ที่ติดมาจาก process แม่)"""
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith('VmHWM:'):
+                    return int(line.split()[1]) / 1024.0
+    except OSError:
+        pass
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024.0  # Linux: KB
+
+
+# --- 2. Validation Windows จริง ---
+
+def load_eval_set(num_samples=NUM_SAMPLES, folder=DATA_FOLDER, nasa_path=NASA_PATH,
+                  params_path=PARAMS_PATH):
+    """window ชุด validation (split เดียวกับ input_pipeline) ที่ normalise แล้ว
+    -> vib (N, 1024, 1), sensor (N, 50, 2), label (N,), rul (N,)"""
+    import input_pipeline as ip
+
+    params = ip.load_params(params_path, folder, nasa_path)
+    return ip.sample_windows(folder, nasa_path, params, 'val', num_samples)
+
+
+# --- 3. Backends (คืนฟังก์ชัน predict(vib, sensor) -> (diag, rul)) ---
+
+class ShapeMismatch(ValueError):
+    pass
+
+
+class UnsupportedInput(ValueError):
+    pass
+
+
+def load_keras(path, threads):
+    import tensorflow as tf
+
+    # ต้องตั้งก่อน TF เริ่ม runtime (จึงต้องแยก process ต่อจำนวน thread)
+    tf.config.threading.set_intra_op_parallelism_threads(threads)
+    tf.config.threading.set_inter_op_parallelism_threads(1)
+    model = tf.keras.models.load_model(path, compile=False)
+    # เรียกผ่าน tf.function (graph) แทน eager ทุกครั้ง -> วัดความเร็วของโมเดลจริง ไม่ใช่ overhead ของ Python
+    infer = tf.function(lambda v, s: model({'input_vibration': v, 'input_sensors': s}, training=False),
+                        reduce_retracing=True)
+
+    def predict(vib, sensor):
+        out = infer(vib, sensor)
+        if isinstance(out, dict):
+            return np.asarray(out['diagnosis_output']), np.asarray(out['rul_output'])
+        return np.asarray(out[0]), np.asarray(out[1])
+
+    return predict
+
+
+def load_onnx(path, threads):
+    import onnxruntime as ort
+
+    options = ort.SessionOptions()
+    options.intra_op_num_threads = threads
+    options.inter_op_num_threads = 1
+    session = ort.InferenceSession(path, sess_options=options, providers=['CPUExecutionProvider'])
+    # window เป็น float ที่ normalise แล้ว แต่ ONNX ไม่มี scale / zero point ให้ quantize แบบ TFLite
+    # -> cast เป็น int16/int8 ตรงๆ ได้ค่าขยะ (-3..3) จึงวัดเฉพาะโมเดลที่ input เป็น float
+    for i in session.get_inputs():
+        if i.type != 'tensor(float)':
+            raise UnsupportedInput(f"input '{i.name}' is {i.type}: no quantization scale in ONNX, "
+                                   "re-export with float32 inputs to benchmark")
+    inputs = [i.name for i in session.get_inputs()]
+    names = [o.name for o in session.get_outputs()]
+    diag_idx = next((i for i, n in enumerate(names) if 'diagnosis' in n), 0)
+    rul_idx = next((i for i, n in enumerate(names) if 'rul' in n), 1)
+
+    def predict(vib, sensor):
+        feed = {}
+        for name in inputs:
+            data = vib if 'vib' in name else sensor
+            feed[name] = data.astype(np.float32, copy=False)
+        out = session.run(None, feed)
+        return out[diag_idx], out[rul_idx]
+
+    return predict
+
+
+def check_tflite_config(input_details, output_details, config):
+    """เทียบค่าใน model_config.h กับ quantization จริงใน .tflite -> รายการที่ไม่ตรง"""
+    mismatches = []
+    groups = [('INPUT_VIB', input_details), ('INPUT_SEN', input_details),
+              ('OUTPUT_STAT', output_details), ('OUTPUT_RUL', output_details)]
+    for prefix, details in groups:
+        index = config.get(f'{prefix}_INDEX')
+        if index is None or index >= len(details):
+            mismatches.append(f'{prefix}_INDEX out of range')
+            continue
+        if details[index]['dtype'] != np.int8:
+            continue  # tensor แบบ float ไม่มีค่า quantize ให้เทียบ
+        scale, zero = details[index]['quantization']
+        if not np.isclose(config[f'{prefix}_SCALE'], scale, rtol=1e-3):
+            mismatches.append(f'{prefix}_SCALE header={config[f"{prefix}_SCALE"]} model={scale:.6f}')
+        if config[f'{prefix}_ZERO'] != zero:
+            mismatches.append(f'{prefix}_ZERO header={config[f"{prefix}_ZERO"]} model={zero}')
+    return mismatches
+
+
+def load_tflite(path, threads, config, sample_vib, sample_sensor):
+    import tensorflow as tf
+
+    interpreter = tf.lite.Interpreter(model_path=path, num_threads=threads)
+    inputs = interpreter.get_input_details()
+    outputs = interpreter.get_output_details()
+    vib_in = inputs[config['INPUT_VIB_INDEX']]
+    sen_in = inputs[config['INPUT_SEN_INDEX']]
+    stat_out = outputs[config['OUTPUT_STAT_INDEX']]
+    rul_out = outputs[config['OUTPUT_RUL_INDEX']]
+
+    mismatches = check_tflite_config(inputs, outputs, config)
+    for name, detail, sample in (('vibration', vib_in, sample_vib), ('sensor', sen_in, sample_sensor)):
+        if tuple(detail['shape'][1:]) != sample.shape[1:]:
+            error = ShapeMismatch(f"{name} input {detail['shape'].tolist()} does not match "
+                                  f"validation windows {list(sample.shape[1:])}")
+            error.config_mismatches = mismatches
+            raise error
+
+    state = {'batch': None, 'native_batch': True}
+    detail_dtype = {'INPUT_VIB': vib_in['dtype'], 'INPUT_SEN': sen_in['dtype'],
+                    'OUTPUT_STAT': stat_out['dtype'], 'OUTPUT_RUL': rul_out['dtype']}
+
+    def quantize(x, prefix):
+        if detail_dtype[prefix] != np.int8:
+            return x.astype(detail_dtype[prefix])  # โมเดล float (ไม่ quantize) ใช้ค่าตรงๆ
+        q = np.round(x / config[f'{prefix}_SCALE']) + config[f'{prefix}_ZERO']
+        return np.clip(q, -128, 127).astype(np.int8)
+
+    def dequantize(q, prefix):
+        if detail_dtype[prefix] != np.int8:
+            return q.astype(np.float32)
+        return (q.astype(np.float32) - config[f'{prefix}_ZERO']) * config[f'{prefix}_SCALE']
+
+    def resize(batch):
+        interpreter.resize_tensor_input(vib_in['index'], [batch] + list(vib_in['shape'][1:]))
+        interpreter.resize_tensor_input(sen_in['index'], [batch] + list(sen_in['shape'][1:]))
+        interpreter.allocate_tensors()
+        state['batch'] = batch
+
+    def invoke(vib, sensor):
+        interpreter.set_tensor(vib_in['index'], quantize(vib, 'INPUT_VIB'))
+        interpreter.set_tensor(sen_in['index'], quantize(sensor, 'INPUT_SEN'))
+        interpreter.invoke()
+        return (dequantize(interpreter.get_tensor(stat_out['index']), 'OUTPUT_STAT'),
+                dequantize(interpreter.get_tensor(rul_out['index']), 'OUTPUT_RUL'))
+
+    def predict(vib, sensor):
+        batch = len(vib)
+        if state['native_batch'] and state['batch'] != batch:
+            try:
+                resize(batch)
+            except RuntimeError:
+                # โมเดลที่ export แบบ batch คงที่ (แบบที่ firmware ใช้) -> วน invoke ทีละตัวอย่าง
+                state['native_batch'] = False
+                resize(1)
+        if state['native_batch']:
+            return invoke(vib, sensor)
+        outs = [invoke(vib[i:i + 1], sensor[i:i + 1]) for i in range(batch)]
+        return np.concatenate([o[0] for o in outs]), np.concatenate([o[1] for o in outs])
+
+    predict.state = state
+    return predict, mismatches
+
+
+# --- 4. Worker (1 process ต่อ backend x threads) ---
+
+def time_batches(predict, vib, sensor, batch_size):
+    n = len(vib)
+    if n < batch_size:
+        return None
+    starts = np.arange(0, n - batch_size + 1, batch_size)
+    for s in starts[:WARMUP_RUNS]:
+        predict(vib[s:s + batch_size], sensor[s:s + batch_size])
+
+    runs = max(MIN_RUNS, len(starts))
+    latencies = np.empty(runs)
+    begin = time.perf_counter()
+    for i in range(runs):
+        s = starts[i % len(starts)]
+        t0 = time.perf_counter()
+        predict(vib[s:s + batch_size], sensor[s:s + batch_size])
+        latencies[i] = time.perf_counter() - t0
+    total = time.perf_counter() - begin
+    return {
+        'batch_size': batch_size,
+        'runs': runs,
+        'p50_ms': float(np.percentile(latencies, 50) * 1000),
+        'p99_ms': float(np.percentile(latencies, 99) * 1000),
+        'mean_ms': float(latencies.mean() * 1000),
+        'throughput_per_s': float(runs * batch_size / total),
+    }
+
+
+def predict_all(predict, vib, sensor, batch_size):
+    diags, ruls = [], []
+    for s in range(0, len(vib), batch_size):
+        d, r = predict(vib[s:s + batch_size], sensor[s:s + batch_size])
+        diags.append(np.asarray(d, np.float32))
+        ruls.append(np.asarray(r, np.float32).reshape(-1))
+    return np.concatenate(diags), np.concatenate(ruls)
+
+
+def run_worker(backend, threads, batch_sizes, eval_path, model_path, config_path, result_path):
+    data = np.load(eval_path)
+    vib, sensor = data['vib'], data['sensor']
+    result = {'backend': backend, 'threads': threads, 'model': model_path}
+
+    t0 = time.perf_counter()
+    try:
+        if backend == 'keras':
+            predict = load_keras(model_path, threads)
+        elif backend == 'onnx':
+            predict = load_onnx(model_path, threads)
+        else:
+            predict, mismatches = load_tflite(model_path, threads, parse_model_config(config_path),
+                                              vib, sensor)
+            result['config_mismatches'] = mismatches
+    except ShapeMismatch as e:
+        result.update(status='shape_mismatch', error=str(e),
+                      config_mismatches=getattr(e, 'config_mismatches', []))
+        with open(result_path, 'w') as f:
+            json.dump(result, f)
+        return
+    except UnsupportedInput as e:
+        result.update(status='unsupported_input', error=str(e))
+        with open(result_path, 'w') as f:
+            json.dump(result, f)
+        return
+    result['load_s'] = time.perf_counter() - t0
+    result['rss_after_load_mb'] = peak_rss_mb()
+
+    result['batches'] = [r for r in (time_batches(predict, vib, sensor, b) for b in batch_sizes) if r]
+    diag, rul = predict_all(predict, vib, sensor, max(batch_sizes))
+    np.savez(result_path + '.npz', diag=diag, rul=rul)
+    result['peak_rss_mb'] = peak_rss_mb()
+    if hasattr(predict, 'state'):
+        result['native_batch'] = predict.state['native_batch']
+    result['status'] = 'ok'
+    with open(result_path, 'w') as f:
+        json.dump(result, f)
+
+
+# --- 5. สรุป drift / accuracy ---
+
+def quality(diag, rul, labels, true_rul, ref=None):
+    q = {
+        'accuracy': float(np.mean(diag.argmax(axis=1) == labels)),
+        'rul_mae': float(np.mean(np.abs(rul - true_rul))),
+    }
+    if ref is not None:
+        ref_diag, ref_rul = ref
+        q['diag_agreement_vs_keras'] = float(np.mean(diag.argmax(axis=1) == ref_diag.argmax(axis=1)))
+        q['prob_max_abs_diff_vs_keras'] = float(np.max(np.abs(diag - ref_diag)))
+        q['rul_mae_vs_keras'] = float(np.mean(np.abs(rul - ref_rul)))
+        q['accuracy_drift'] = q['accuracy'] - float(np.mean(ref_diag.argmax(axis=1) == labels))
+    return q
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark Keras / ONNX / TFLite INT8 backends')
+    parser.add_argument('--backends', default=','.join(BACKENDS))
+    parser.add_argument('--batch-sizes', default=','.join(map(str, BATCH_SIZES)))
+    parser.add_argument('--threads', default=','.join(map(str, THREADS)))
+    parser.add_argument('--samples', type=int, default=NUM_SAMPLES)
+    parser.add_argument('--keras', default=KERAS_PATH)
+    parser.add_argument('--onnx', default=ONNX_PATH)
+    parser.add_argument('--tflite', default=TFLITE_PATH)
+    parser.add_argument('--config-h', default=CONFIG_H_PATH)
+    parser.add_argument('--data-dir', default=DATA_FOLDER)
+    parser.add_argument('--nasa', default=NASA_PATH)
+    parser.add_argument('--params', default=PARAMS_PATH)
+    parser.add_argument('--out', default=OUTPUT_PATH)
+    parser.add_argument('--worker', help=argparse.SUPPRESS)
+    parser.add_argument('--eval', help=argparse.SUPPRESS)
+    parser.add_argument('--result', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    batch_sizes = [int(b) for b in args.batch_sizes.split(',')]
+    thread_counts = [int(t) for t in args.threads.split(',')]
+    paths = {'keras': args.keras, 'onnx': args.onnx, 'tflite': args.tflite}
+
+    if args.worker:
+        run_worker(args.worker, thread_counts[0], batch_sizes, args.eval, paths[args.worker],
+                   args.config_h, args.result)
+        return
+
+    print(f"📦 Loading validation windows (max {args.samples})...")
+    vib, sensor, labels, true_rul = load_eval_set(args.samples, args.data_dir, args.nasa, args.params)
+    print(f"   ✅ {len(vib)} windows | vib {vib.shape[1:]} | sensor {sensor.shape[1:]}")
+
+    report = {
+        'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'host': {'platform': platform.platform(), 'python': platform.python_version(),
+                 'cpu_count': os.cpu_count()},
+        'num_samples': int(len(vib)),
+        'model_config_h': parse_model_config(args.config_h) if os.path.exists(args.config_h) else None,
+        'models': {},
+        'results': [],
+    }
+
+    keras_ref = None
+    with tempfile.TemporaryDirectory() as tmp:
+        eval_path = os.path.join(tmp, 'eval.npz')
+        np.savez(eval_path, vib=vib, sensor=sensor)
+
+        for backend in args.backends.split(','):
+            path = paths[backend]
+            if not os.path.exists(path):
+                print(f"   ⚠️ {backend}: {path} not found, skipping")
+                report['models'][backend] = {'path': path, 'status': 'missing'}
+                continue
+            report['models'][backend] = {'path': path, 'sha1': file_sha1(path),
+                                         'size_bytes': os.path.getsize(path)}
+
+            for threads in thread_counts:
+                print(f"⏱️ {backend} | threads={threads} ...")
+                result_path = os.path.join(tmp, f'{backend}_{threads}.json')
+                cmd = [sys.executable, os.path.abspath(__file__), '--worker', backend,
+                       '--threads', str(threads), '--batch-sizes', args.batch_sizes,
+                       '--eval', eval_path, '--result', result_path,
+                       '--config-h', args.config_h, f'--{backend}', path]
+                proc = subprocess.run(cmd, capture_output=True, text=True)
+                if proc.returncode != 0 or not os.path.exists(result_path):
+                    print(f"   ❌ worker failed:\n{proc.stderr[-2000:]}")
+                    report['results'].append({'backend': backend, 'threads': threads,
+                                              'status': 'error', 'error': proc.stderr[-2000:]})
+                    continue
+                with open(result_path) as f:
+                    result = json.load(f)
+
+                if result['status'] == 'ok':
+                    preds = np.load(result_path + '.npz')
+                    diag, rul = preds['diag'], preds['rul']
+                    if backend == 'keras' and keras_ref is None:
+                        keras_ref = (diag, rul)
+                    result['quality'] = quality(diag, rul, labels, true_rul,
+                                                None if backend == 'keras' else keras_ref)
+                    for b in result['batches']:
+                        print(f"   bs={b['batch_size']:>3} | p50 {b['p50_ms']:8.2f} ms | "
+                              f"p99 {b['p99_ms']:8.2f} ms | {b['throughput_per_s']:9.1f} win/s")
+                    print(f"   load {result['load_s']:.2f}s | peak RSS {result['peak_rss_mb']:.0f} MB | "
+                          f"acc {result['quality']['accuracy']:.3f} | "
+                          f"RUL MAE {result['quality']['rul_mae']:.2f}")
+                else:
+                    print(f"   ⚠️ {result['status']}: {result.get('error')}")
+                if result.get('config_mismatches'):
+                    print(f"   ⚠️ model_config.h mismatch: {result['config_mismatches']}")
+                report['results'].append(result)
+
+    os.makedirs(os.path.dirname(args.out) or '.', exist_ok=True)
+    with open(args.out, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"💾 Results saved to {args.out}")
+
+
+if __name__ == '__main__':
+    main()
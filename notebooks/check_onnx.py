@@ -30,8 +30,10 @@ keras_rul = keras_results[1]  # ผล RUL
 print("🔮 Running ONNX model...")
 ort_session = ort.InferenceSession('models/hybrid_model_v1.onnx')
 
+# convert_onnx.py export vibration เป็น float32 (default) หรือ int16 (--vib-dtype int16) -> ส่งให้ตรงชนิด
+vib_type = {i.name: i.type for i in ort_session.get_inputs()}['input_vibration']
 input_feed = {
-    'input_vibration': test_vib_int16, # ส่ง Int16 เข้าไปได้เลย!
+    'input_vibration': test_vib_int16 if vib_type == 'tensor(int16)' else test_vib_float,
     'input_sensors': test_sensor
 }
 onnx_results = ort_session.run(None, input_feed)
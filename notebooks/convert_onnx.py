@@ -1,10 +1,20 @@
+import argparse
+
 import tensorflow as tf
 import tf2onnx
 import onnx
 
+# 0. ชนิดของ input_vibration
+#   float32 (default): ค่าที่ normalise แล้ว -> ใช้กับ Gateway (web/backend/inference.py) และ benchmark_backends.py
+#   int16            : ค่า ADC ดิบสำหรับ NXP eIQ (ไม่มี scale ใน ONNX: Gateway / benchmark จะไม่รับไฟล์นี้)
+parser = argparse.ArgumentParser(description='Convert models/hybrid_model_v1.h5 to ONNX')
+parser.add_argument('--vib-dtype', choices=('float32', 'int16'), default='float32')
+args = parser.parse_args()
+
 # 1. ตั้งชื่อไฟล์
 input_model_path = 'models/hybrid_model_v1.h5'      # ไฟล์สมองเดิมของเรา
-output_onnx_path = 'models/hybrid_model_v1.onnx'    # ไฟล์ผลลัพธ์ที่จะเอาไปใช้
+output_onnx_path = ('models/hybrid_model_v1.onnx' if args.vib_dtype == 'float32'
+                    else 'models/hybrid_model_v1_int16.onnx')   # ไฟล์ผลลัพธ์ที่จะเอาไปใช้
 
 print(f"🔄 Loading Keras model from {input_model_path}...")
 try:
@@ -17,7 +27,7 @@ except Exception as e:
 # 2. กำหนดสเปค Input (Signature) ให้ชัดเจน
 # ต้องตรงกับตอนเราสร้าง model.py เป๊ะๆ
 # Input 1: Vibration (None, 1024, 1)
-spec_vib = tf.TensorSpec((None, 1024, 1), tf.int16, name="input_vibration")
+spec_vib = tf.TensorSpec((None, 1024, 1), tf.as_dtype(args.vib_dtype), name="input_vibration")
 # Input 2: Sensor (None, 50, 2)
 spec_sensor = tf.TensorSpec((None, 50, 2), tf.float32, name="input_sensors")
 
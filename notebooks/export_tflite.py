@@ -0,0 +1,249 @@
+# ==========================================
+# 📦 Export: Keras (.h5) -> TFLite Full INT8 -> model_data.h + model_config.h
+# ==========================================
+# ขั้นต่อจาก convert_onnx.py สำหรับฝั่ง MCU
+# - quantize แบบ full-integer โดยใช้ representative dataset จาก training window จริง (CWRU + NASA)
+# - เขียน .tflite, C array (models/model_data.h) และ Hardware/model_config.h
+#   โดยอ่าน scale / zero point / index / shape จาก interpreter ทั้งหมด (ไม่ต้องกรอกมือ)
+# - พิมพ์ขนาด tensor arena โดยประมาณ และรายชื่อ op (ใช้ตั้ง MicroMutableOpResolver)
+#
+# วิธีใช้ (รันจาก root ของ repo):
+#   python notebooks/export_tflite.py
+#   python notebooks/benchmark_backends.py    # 👉 เช็ค drift ของ INT8 เทียบ Keras
+import argparse
+import collections
+import os
+import sys
+
+import numpy as np
+import tensorflow as tf
+
+sys.path.insert(0, os.path.join(os.getcwd(), 'src'))
+import input_pipeline as ip
+
+# --- 1. Config ---
+KERAS_PATH = 'models/hybrid_model_v1.h5'
+TFLITE_PATH = 'models/model_quant_int8.tflite'
+MODEL_DATA_H = 'models/model_data.h'
+MODEL_CONFIG_H = 'Hardware/model_config.h'
+PARAMS_PATH = 'models/preprocess_params.json'
+DATA_FOLDER = 'data/raw'
+NASA_PATH = 'data/temp-current/train_FD001.txt'
+
+NUM_CALIBRATION = 500   # จำนวน window ที่ใช้หาช่วงค่า (calibration)
+ARENA_HEADROOM = 1.25   # เผื่อ overhead ของ TFLite Micro (scratch buffer, ตัวแปร LSTM ฯลฯ)
+BYTES_PER_LINE = 12
+
+
+# --- 2. Convert ---
+
+def convert_int8(model, vib, sensor):
+    """TFLite full-integer (input/output int8) ด้วย representative dataset จาก window จริง"""
+    # firmware รันทีละ 1 window -> fix batch = 1 (LSTM จะถูกแปลงเป็น op แบบ fused)
+    inputs = [tf.keras.Input(shape=vib.shape[1:], batch_size=1, name='input_vibration'),
+              tf.keras.Input(shape=sensor.shape[1:], batch_size=1, name='input_sensors')]
+    fixed = tf.keras.Model(inputs, model(inputs))
+
+    def representative_dataset():
+        for i in range(len(vib)):
+            # ส่งเป็น dict ตามชื่อ input (ลำดับ input ใน .tflite ไม่จำเป็นต้องตรงกับ Keras)
+            yield {'input_vibration': vib[i:i + 1], 'input_sensors': sensor[i:i + 1]}
+
+    converter = tf.lite.TFLiteConverter.from_keras_model(fixed)
+    converter.optimizations = [tf.lite.Optimize.DEFAULT]
+    converter.representative_dataset = representative_dataset
+    converter.target_spec.supported_ops = [tf.lite.OpsSet.TFLITE_BUILTINS_INT8]
+    converter.inference_input_type = tf.int8
+    converter.inference_output_type = tf.int8
+    return converter.convert()
+
+
+# --- 3. อ่านรายละเอียดจาก Interpreter ---
+
+def describe(tflite_model, num_classes=ip.NUM_CLASSES):
+    """index / shape / scale / zero point ของแต่ละ input-output (จับคู่จากชื่อและ shape)"""
+    # ปิด XNNPACK delegate เพื่อให้เห็น op จริงแบบที่ TFLite Micro ต้องรัน
+    interpreter = tf.lite.Interpreter(
+        model_content=tflite_model,
+        experimental_op_resolver_type=tf.lite.experimental.OpResolverType.BUILTIN_WITHOUT_DEFAULT_DELEGATES)
+    interpreter.allocate_tensors()
+    inputs = interpreter.get_input_details()
+    outputs = interpreter.get_output_details()
+
+    def pick(details, match, fallback):
+        found = ([i for i, d in enumerate(details) if match(d)]
+                 or [i for i, d in enumerate(details) if fallback(d)])
+        if len(found) != 1:
+            raise ValueError(f"cannot identify tensor: {[d['name'] for d in details]}")
+        index = found[0]
+        d = details[index]
+        scale, zero = d['quantization']
+        return {'index': index, 'name': d['name'], 'shape': d['shape'].tolist(),
+                'dtype': np.dtype(d['dtype']).name, 'scale': float(scale), 'zero': int(zero)}
+
+    tensors = {
+        'INPUT_VIB': pick(inputs, lambda d: 'vib' in d['name'], lambda d: d['shape'][1] == ip.TIME_STEPS),
+        'INPUT_SEN': pick(inputs, lambda d: 'sensor' in d['name'],
+                          lambda d: d['shape'][1] == ip.SENSOR_TIME_STEPS),
+        'OUTPUT_STAT': pick(outputs, lambda d: 'diagnosis' in d['name'],
+                            lambda d: d['shape'][-1] == num_classes),
+        'OUTPUT_RUL': pick(outputs, lambda d: 'rul' in d['name'], lambda d: d['shape'][-1] == 1),
+    }
+    for key, t in tensors.items():
+        if t['dtype'] != 'int8':
+            raise ValueError(f"{key} is {t['dtype']}, expected int8 (full-integer quantization)")
+    return interpreter, tensors
+
+
+def op_list(interpreter):
+    return collections.Counter(op['op_name'] for op in interpreter._get_ops_details())
+
+
+def estimate_arena(interpreter):
+    """ขนาด activation สูงสุดที่ต้องมีพร้อมกัน (ไล่ตามลำดับ op: tensor มีชีวิตตั้งแต่ถูกสร้างจนถูกใช้ครั้งสุดท้าย)
+    ไม่รวม weight (อยู่ใน flash) -> ค่าประมาณขั้นต่ำของ tensor arena"""
+    ops = interpreter._get_ops_details()
+    sizes = {t['index']: int(np.prod(t['shape'])) * np.dtype(t['dtype']).itemsize
+             for t in interpreter.get_tensor_details()}
+    produced = {i for op in ops for i in op['outputs']}
+    model_inputs = {d['index'] for d in interpreter.get_input_details()}
+    live_tensors = produced | model_inputs
+
+    first, last = {}, {}
+    for step, op in enumerate(ops):
+        for i in list(op['inputs']) + list(op['outputs']):
+            if i in live_tensors:
+                first.setdefault(i, step)
+                last[i] = step
+    for i in model_inputs:
+        first[i] = 0
+    for d in interpreter.get_output_details():
+        last[d['index']] = len(ops) - 1
+
+    peak = 0
+    for step in range(len(ops)):
+        peak = max(peak, sum(sizes[i] for i in first if first[i] <= step <= last[i]))
+    return peak
+
+
+# --- 4. เขียน Header ---
+
+def write_model_data(tflite_model, path=MODEL_DATA_H):
+    lines = []
+    for start in range(0, len(tflite_model), BYTES_PER_LINE):
+        chunk = tflite_model[start:start + BYTES_PER_LINE]
+        lines.append('  ' + ', '.join(f'0x{b:02x}' for b in chunk))
+    with open(path, 'w') as f:
+        f.write('// Auto-generated by notebooks/export_tflite.py (do not edit)\n')
+        f.write('#ifndef MODEL_DATA_H_\n#define MODEL_DATA_H_\n\n#include <stdint.h>\n\n')
+        f.write(f'// Model Size: {len(tflite_model)} bytes\n')
+        f.write(f'const unsigned int model_data_len = {len(tflite_model)};\n\n')
+        f.write('__attribute__((aligned(16))) const unsigned char model_data[] = {\n')
+        f.write(',\n'.join(lines))
+        f.write('\n};\n\n#endif // MODEL_DATA_H_\n')
+
+
+def write_model_config(tensors, ops, arena_bytes, path=MODEL_CONFIG_H):
+    def shape_str(shape):
+        return ', '.join(str(s) for s in shape)
+
+    vib, sen, stat, rul = (tensors[k] for k in ('INPUT_VIB', 'INPUT_SEN', 'OUTPUT_STAT', 'OUTPUT_RUL'))
+    lines = [
+        '// model_config.h',
+        '// Auto-generated by notebooks/export_tflite.py (do not edit)',
+        '#ifndef MODEL_CONFIG_H_',
+        '#define MODEL_CONFIG_H_',
+        '',
+        '// ==========================================',
+        '// ⚙️ MODEL INPUT PARAMETERS',
+        '// ==========================================',
+        f'// 1. Vibration Input (Shape: [{shape_str(vib["shape"])}])',
+        '// สูตร: int8_val = (real_val / SCALE) + ZERO',
+        f'#define INPUT_VIB_SCALE {vib["scale"]:.9g}f',
+        f'#define INPUT_VIB_ZERO {vib["zero"]}',
+        f'#define INPUT_VIB_INDEX {vib["index"]}',
+        f'#define INPUT_VIB_LEN {int(np.prod(vib["shape"]))}',
+        '',
+        f'// 2. Sensor Input (Shape: [{shape_str(sen["shape"])}] = {sen["shape"][1]} steps x [temp, current])',
+        '// สูตร: int8_val = (real_val / SCALE) + ZERO',
+        f'#define INPUT_SEN_SCALE {sen["scale"]:.9g}f',
+        f'#define INPUT_SEN_ZERO {sen["zero"]}',
+        f'#define INPUT_SEN_INDEX {sen["index"]}',
+        f'#define INPUT_SEN_LEN {int(np.prod(sen["shape"]))}',
+        '',
+        '// ==========================================',
+        '// ⚙️ MODEL OUTPUT PARAMETERS',
+        '// ==========================================',
+        f'// 1. Status Output (Class Probabilities, Shape: [{shape_str(stat["shape"])}])',
+        '// สูตร: real_val = (int8_val - ZERO) * SCALE',
+        f'#define OUTPUT_STAT_SCALE {stat["scale"]:.9g}f',
+        f'#define OUTPUT_STAT_ZERO {stat["zero"]}',
+        f'#define OUTPUT_STAT_INDEX {stat["index"]}',
+        f'#define OUTPUT_STAT_SIZE {stat["shape"][-1]}',
+        '',
+        f'// 2. RUL Output (Remaining Useful Life, Shape: [{shape_str(rul["shape"])}])',
+        '// สูตร: real_val = (int8_val - ZERO) * SCALE',
+        f'#define OUTPUT_RUL_SCALE {rul["scale"]:.9g}f',
+        f'#define OUTPUT_RUL_ZERO {rul["zero"]}',
+        f'#define OUTPUT_RUL_INDEX {rul["index"]}',
+        '',
+        '// ==========================================',
+        '// ⚙️ RUNTIME (TFLite Micro)',
+        '// ==========================================',
+        f'// Ops ({len(ops)}): ' + ', '.join(f'{name} x{n}' for name, n in sorted(ops.items())),
+        f'#define MODEL_OP_COUNT {len(ops)} // ใช้กับ MicroMutableOpResolver<MODEL_OP_COUNT>',
+        f'#define TENSOR_ARENA_SIZE {arena_bytes} // ประมาณจาก activation สูงสุด x {ARENA_HEADROOM}',
+        '',
+        '#endif // MODEL_CONFIG_H_',
+        '',
+    ]
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write('\n'.join(lines))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Full-INT8 TFLite export + firmware headers')
+    parser.add_argument('--keras', default=KERAS_PATH)
+    parser.add_argument('--tflite', default=TFLITE_PATH)
+    parser.add_argument('--model-data-h', default=MODEL_DATA_H)
+    parser.add_argument('--config-h', default=MODEL_CONFIG_H)
+    parser.add_argument('--params', default=PARAMS_PATH)
+    parser.add_argument('--data-dir', default=DATA_FOLDER)
+    parser.add_argument('--nasa', default=NASA_PATH)
+    parser.add_argument('--samples', type=int, default=NUM_CALIBRATION)
+    args = parser.parse_args()
+
+    print(f"🔄 Loading Keras model from {args.keras}...")
+    model = tf.keras.models.load_model(args.keras, compile=False)
+
+    print(f"📦 Collecting {args.samples} calibration windows (train split)...")
+    params = ip.load_params(args.params, args.data_dir, args.nasa)
+    vib, sensor, _, _ = ip.sample_windows(args.data_dir, args.nasa, params, 'train', args.samples)
+    print(f"   ✅ vib {vib.shape} | sensor {sensor.shape}")
+
+    print("⚡ Converting to TFLite (full INT8)...")
+    tflite_model = convert_int8(model, vib, sensor)
+    with open(args.tflite, 'wb') as f:
+        f.write(tflite_model)
+    print(f"   ✅ {args.tflite} ({len(tflite_model) / 1024:.1f} KB)")
+
+    interpreter, tensors = describe(tflite_model)
+    ops = op_list(interpreter)
+    activations = estimate_arena(interpreter)
+    arena_bytes = int(np.ceil(activations * ARENA_HEADROOM / 1024) * 1024)
+
+    write_model_data(tflite_model, args.model_data_h)
+    write_model_config(tensors, ops, arena_bytes, args.config_h)
+    print(f"💾 Wrote {args.model_data_h} and {args.config_h}")
+
+    print("\n📋 Tensors:")
+    for key, t in tensors.items():
+        print(f"   {key:<12} index={t['index']} shape={t['shape']} scale={t['scale']:.6g} zero={t['zero']}")
+    print(f"\n🧮 Tensor arena: ~{activations / 1024:.1f} KB activations -> TENSOR_ARENA_SIZE {arena_bytes}")
+    print(f"🧩 Ops ({len(ops)}):")
+    for name, n in sorted(ops.items()):
+        print(f"   {name:<32} x{n}")
+
+
+if __name__ == '__main__':
+    main()
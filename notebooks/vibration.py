@@ -2,11 +2,16 @@
 # 🧪 EDA: CWRU Vibration Analysis (Time & FFT)
 # ==========================================
 import os
+import sys
 import numpy as np
 import matplotlib.pyplot as plt
-from scipy.io import loadmat
 from scipy.fft import fft, fftfreq
 
+# ใช้ตัวโหลดเดียวกับตอน train (src/dataset_cache.py -> .npy cache ใน data/cache)
+sys.path.insert(0, os.path.join(os.getcwd(), 'src'))
+from dataset_cache import load_cwru_signal
+from features import FS  # 48 kHz (ตาม README)
+
 # 1. ตั้งค่า Config (แก้ Path ตรงนี้ให้ตรงกับเครื่องคุณ)
 DATA_FOLDER = 'data/raw' 
 
@@ -20,18 +25,16 @@ FILE_CONFIGS = [
 
 # 2. ฟังก์ชันช่วยโหลดและคำนวณ
 def get_signal_from_mat(folder, filename):
-    """โหลดไฟล์ .mat และดึง array ข้อมูลออกมา"""
+    """โหลดไฟล์ .mat (ผ่าน cache) และดึง array ข้อมูลออกมา"""
     filepath = os.path.join(folder, filename)
     try:
-        mat = loadmat(filepath)
-        # หา Key ที่มีคำว่า 'DE_time' (Drive End Vibration)
-        key = [k for k in mat.keys() if 'DE_time' in k][0]
-        return mat[key].flatten()
+        # Key ที่มีคำว่า 'DE_time' (Drive End Vibration)
+        return np.asarray(load_cwru_signal(filepath)).flatten()
     except Exception as e:
         print(f"❌ Error loading {filename}: {e}")
         return None
 
-def calculate_fft(signal, fs=12000):
+def calculate_fft(signal, fs=FS):
     """คำนวณ Frequency Domain (FFT)"""
     N = len(signal)
     yf = fft(signal)
@@ -54,7 +57,7 @@ for i, (label_name, filename) in enumerate(FILE_CONFIGS):
     if sig is None: continue
         
     # --- กราฟซ้าย: Time Domain (ดูคลื่นดิบๆ 2000 จุดแรก) ---
-    t_axis = np.arange(2000) / 12000 # แกนเวลา (วินาที)
+    t_axis = np.arange(2000) / FS # แกนเวลา (วินาที)
     axes[i, 0].plot(t_axis, sig[:2000], color='#1f77b4', linewidth=1)
     axes[i, 0].set_title(f"{label_name} - Time Domain", fontsize=12, fontweight='bold')
     axes[i, 0].set_ylabel("Amplitude (g)")
@@ -0,0 +1,210 @@
+# ==========================================
+# 🧬 Architecture Family: Hybrid CNN + RNN แบบปรับแต่งได้ (สำหรับ MCU)
+# ==========================================
+# Classic V1 (hybrid_model.py) ใช้ Flatten หลัง Conv 2 ชั้น -> Dense(64) มี weight ~1M (เกือบทั้งโมเดล)
+# ไฟล์นี้สร้างโมเดลตระกูลเดียวกันจาก config:
+# - vib_conv:    'conv' | 'separable' (depthwise-separable Conv1D)
+# - vib_head:    'flatten' | 'gap' (GlobalAveragePooling แทน Flatten)
+# - sensor_branch: 'lstm' | 'gru' | 'tcn' (dilated causal Conv1D)
+# - prune:       สัดส่วน sparsity สำหรับ magnitude pruning (ต้องมี tensorflow-model-optimization)
+# - spectral_features: จำนวน feature จาก features.py ที่ป้อนเป็น input ที่ 3 (0 = ไม่ใช้)
+# ชื่อ input/output เหมือนเดิมทุกแบบ -> ใช้กับ input_pipeline / export / backend ได้ทันที
+import numpy as np
+from tensorflow.keras import layers
+from tensorflow.keras.models import Model
+
+DEFAULT_CONFIG = {
+    'vib_conv': 'conv',
+    'vib_filters': (32, 64),
+    'vib_kernel': 3,
+    'vib_head': 'flatten',
+    'vib_dense': 64,
+    'sensor_branch': 'lstm',
+    'sensor_units': 64,
+    'sensor_dense': 32,
+    'tcn_dilations': (1, 2, 4, 8),
+    'fusion_dense': 128,
+    'dropout': 0.2,
+    'prune': 0.0,
+    'spectral_features': 0,   # > 0: เพิ่ม input 'input_features' (จาก features.py) ขนาดนี้
+}
+
+# ชุดที่ใช้ใน sweep (classic_v1 = โครงสร้างเดียวกับ build_hybrid_model)
+ARCHITECTURES = {
+    'classic_v1': {},
+    'gap': {'vib_head': 'gap'},
+    'separable_gap': {'vib_conv': 'separable', 'vib_head': 'gap'},
+    'separable_gap_gru': {'vib_conv': 'separable', 'vib_head': 'gap', 'sensor_branch': 'gru'},
+    'separable_gap_tcn': {'vib_conv': 'separable', 'vib_head': 'gap', 'sensor_branch': 'tcn',
+                          'sensor_units': 32},
+    'tiny': {'vib_conv': 'separable', 'vib_filters': (16, 32, 32), 'vib_kernel': 5, 'vib_head': 'gap',
+             'vib_dense': 32, 'sensor_branch': 'gru', 'sensor_units': 16, 'sensor_dense': 16,
+             'fusion_dense': 32},
+    'classic_v1_pruned': {'prune': 0.8},
+    'separable_gap_pruned': {'vib_conv': 'separable', 'vib_head': 'gap', 'prune': 0.5},
+}
+
+
+def make_config(name='classic_v1', **overrides):
+    config = dict(DEFAULT_CONFIG)
+    config.update(ARCHITECTURES[name])
+    config.update(overrides)
+    return config
+
+
+def _vibration_branch(inputs, config):
+    conv = layers.SeparableConv1D if config['vib_conv'] == 'separable' else layers.Conv1D
+    x = inputs
+    for i, filters in enumerate(config['vib_filters']):
+        # ชั้นแรกมี channel เดียว separable ไม่ช่วยอะไร -> ใช้ Conv1D ปกติ
+        layer = layers.Conv1D if i == 0 else conv
+        x = layer(filters, config['vib_kernel'], activation='relu')(x)
+        x = layers.MaxPooling1D(2)(x)
+    if config['vib_head'] == 'gap':
+        x = layers.GlobalAveragePooling1D()(x)
+    else:
+        x = layers.Flatten()(x)
+    return layers.Dense(config['vib_dense'], activation='relu')(x)
+
+
+def _sensor_branch(inputs, config):
+    units = config['sensor_units']
+    if config['sensor_branch'] == 'gru':
+        x = layers.GRU(units, return_sequences=False)(inputs)
+    elif config['sensor_branch'] == 'tcn':
+        # dilated causal conv + residual (receptive field = 1 + 2 * sum(dilations))
+        x = layers.Conv1D(units, 1)(inputs)
+        for d in config['tcn_dilations']:
+            y = layers.Conv1D(units, 3, padding='causal', dilation_rate=d, activation='relu')(x)
+            x = layers.Add()([x, y])
+        x = layers.GlobalAveragePooling1D()(x)
+    else:
+        x = layers.LSTM(units, return_sequences=False)(inputs)
+    return layers.Dense(config['sensor_dense'], activation='relu')(x)
+
+
+def build_model(config=None, time_steps=1024, sensor_steps=50, num_classes=4):
+    config = config or make_config()
+    input_vib = layers.Input(shape=(time_steps, 1), name='input_vibration')
+    input_sensor = layers.Input(shape=(sensor_steps, 2), name='input_sensors')
+
+    inputs = [input_vib, input_sensor]
+    branches = [_vibration_branch(input_vib, config), _sensor_branch(input_sensor, config)]
+    if config['spectral_features']:
+        input_features = layers.Input(shape=(config['spectral_features'],), name='input_features')
+        inputs.append(input_features)
+        branches.append(layers.Dense(16, activation='relu')(input_features))
+
+    combined = layers.Concatenate()(branches)
+    z = layers.Dense(config['fusion_dense'], activation='relu')(combined)
+    z = layers.Dropout(config['dropout'])(z)
+
+    output_diag = layers.Dense(num_classes, activation='softmax', name='diagnosis_output')(z)
+    output_rul = layers.Dense(1, activation='linear', name='rul_output')(z)
+    return Model(inputs=inputs, outputs=[output_diag, output_rul])
+
+
+# --- Pruning (magnitude) ---
+
+PRUNABLE = (layers.Dense, layers.Conv1D, layers.SeparableConv1D)
+
+
+def apply_pruning(model, sparsity, begin_step=0, end_step=1000):
+    """ห่อ Dense/Conv ด้วย prune_low_magnitude (PolynomialDecay 0 -> sparsity) สำหรับ fine-tune
+    ต้องเรียก compile ใหม่ และใส่ callback จาก pruning_callbacks() ตอน fit"""
+    try:
+        import tensorflow_model_optimization as tfmot
+    except ImportError as e:
+        raise ImportError("pruning requires tensorflow-model-optimization "
+                          "(pip install tensorflow-model-optimization tf_keras)") from e
+
+    schedule = tfmot.sparsity.keras.PolynomialDecay(
+        initial_sparsity=0.0, final_sparsity=sparsity, begin_step=begin_step, end_step=end_step)
+
+    def wrap(layer):
+        if isinstance(layer, PRUNABLE) and layer.name not in ('diagnosis_output', 'rul_output'):
+            return tfmot.sparsity.keras.prune_low_magnitude(layer, pruning_schedule=schedule)
+        return layer
+
+    from tensorflow.keras.models import clone_model
+    return clone_model(model, clone_function=wrap)
+
+
+def pruning_callbacks():
+    import tensorflow_model_optimization as tfmot
+    return [tfmot.sparsity.keras.UpdatePruningStep()]
+
+
+def strip_pruning(model):
+    import tensorflow_model_optimization as tfmot
+    return tfmot.sparsity.keras.strip_pruning(model)
+
+
+# --- ขนาด / ต้นทุนการคำนวณ ---
+
+def _steps(shape):
+    return int(shape[1]) if len(shape) == 3 else 1
+
+
+def count_macs(model):
+    """จำนวน multiply-accumulate ต่อ 1 inference (Conv / Dense / RNN, ไม่นับ pooling / activation)"""
+    macs = 0
+    for layer in model.layers:
+        if not hasattr(layer, 'output') or isinstance(layer, layers.InputLayer):
+            continue
+        in_shape = layer.input.shape if not isinstance(layer.input, list) else None
+        out_shape = layer.output.shape
+        if isinstance(layer, layers.SeparableConv1D):
+            in_ch = int(in_shape[-1])
+            k = layer.kernel_size[0]
+            macs += _steps(out_shape) * (k * in_ch * layer.depth_multiplier
+                                         + in_ch * layer.depth_multiplier * layer.filters)
+        elif isinstance(layer, layers.Conv1D):
+            macs += _steps(out_shape) * layer.kernel_size[0] * int(in_shape[-1]) * layer.filters
+        elif isinstance(layer, layers.Dense):
+            macs += int(in_shape[-1]) * layer.units
+        elif isinstance(layer, (layers.LSTM, layers.GRU)):
+            gates = 4 if isinstance(layer, layers.LSTM) else 3
+            macs += _steps(in_shape) * gates * (int(in_shape[-1]) + layer.units) * layer.units
+    return int(macs)
+
+
+def int8_size_bytes(model):
+    """ขนาด weight หลัง full-INT8 โดยประมาณ: kernel 1 byte, bias 4 bytes (int32)
+    pruned weight (=0) ไม่ลดขนาด flatbuffer แต่ลดขนาดหลังบีบอัด -> ดู sparsity แยก"""
+    total = 0
+    for w in model.weights:
+        n = int(np.prod(w.shape))
+        total += n * (4 if 'bias' in w.name else 1)
+    return total
+
+
+def sparsity(model):
+    kernels = [w.numpy() for w in model.weights if 'kernel' in w.name]
+    if not kernels:
+        return 0.0
+    zeros = sum(int(np.sum(k == 0)) for k in kernels)
+    return zeros / sum(k.size for k in kernels)
+
+
+def compressed_int8_bytes(model):
+    """ขนาด weight แบบ int8 (per-tensor) หลังบีบอัด zlib -> เห็นผลของ pruning (ค่า 0 บีบอัดได้ดี)"""
+    import zlib
+
+    blobs = []
+    for w in model.weights:
+        v = w.numpy().ravel()
+        scale = max(float(np.abs(v).max()), 1e-12) / 127.0
+        blobs.append(np.round(v / scale).astype(np.int8).tobytes())
+    return len(zlib.compress(b''.join(blobs), 9))
+
+
+def summarize(model):
+    return {
+        'params': int(model.count_params()),
+        'macs': count_macs(model),
+        'int8_kb_est': int8_size_bytes(model) / 1024,
+        'int8_kb_zlib': compressed_int8_bytes(model) / 1024,
+        'sparsity': sparsity(model),
+    }
+
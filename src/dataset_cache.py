@@ -0,0 +1,163 @@
+# ==========================================
+# 🗃️ Dataset Cache: .mat (CWRU) / NASA FD00x -> .npy (float32, mmap)
+# ==========================================
+# แปลงไฟล์ต้นฉบับครั้งเดียวเป็น .npy ใน data/cache แล้วครั้งต่อไปเปิดแบบ memory-map (มิลลิวินาที)
+# ชื่อไฟล์ cache ผูกกับ hash ของไฟล์ต้นฉบับ -> ถ้าไฟล์ต้นฉบับเปลี่ยน จะสร้าง cache ใหม่ให้อัตโนมัติ
+# (เช็ค size + mtime ก่อน ถ้าไม่เปลี่ยนก็ไม่ต้อง hash ใหม่ทุกครั้ง)
+#
+# สร้าง cache ล่วงหน้าทั้งหมด: python src/dataset_cache.py
+import hashlib
+import json
+import os
+import tempfile
+
+import numpy as np
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+CACHE_DIR = os.path.join(REPO_ROOT, 'data', 'cache')
+MANIFEST = 'manifest.json'
+
+NASA_COLUMNS = ['unit_id', 'time_cycles', 'setting_1', 'setting_2', 'setting_3',
+                's1', 's2', 's3', 's4', 's5', 's6', 's7', 's8', 's9', 's10',
+                's11', 's12', 's13', 's14', 's15', 's16', 's17', 's18', 's19', 's20', 's21']
+
+
+# --- Manifest & Hash ---
+
+def _load_manifest(cache_dir):
+    path = os.path.join(cache_dir, MANIFEST)
+    if not os.path.exists(path):
+        return {}
+    with open(path) as f:
+        return json.load(f)
+
+
+def _save_manifest(cache_dir, manifest):
+    fd, tmp = tempfile.mkstemp(dir=cache_dir, suffix='.json')
+    with os.fdopen(fd, 'w') as f:
+        json.dump(manifest, f, indent=1)
+    os.replace(tmp, os.path.join(cache_dir, MANIFEST))
+
+
+def file_digest(path, chunk_size=1 << 20):
+    h = hashlib.sha1()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(chunk_size), b''):
+            h.update(block)
+    return h.hexdigest()
+
+
+def _cached(source, kind, build, cache_dir=None):
+    """คืน path ของไฟล์ cache (.npy) ของ source สร้างใหม่ถ้ายังไม่มีหรือต้นฉบับเปลี่ยน"""
+    cache_dir = cache_dir or CACHE_DIR
+    source = os.path.abspath(source)
+    stat = os.stat(source)  # FileNotFoundError ถ้าไม่มีไฟล์ (เหมือน loadmat / read_csv)
+    os.makedirs(cache_dir, exist_ok=True)
+    manifest = _load_manifest(cache_dir)
+    key = f"{kind}:{source}"
+    entry = manifest.get(key)
+
+    if entry and entry['size'] == stat.st_size and entry['mtime_ns'] == stat.st_mtime_ns:
+        digest = entry['sha1']
+    else:
+        digest = file_digest(source)
+
+    stem = os.path.splitext(os.path.basename(source))[0]
+    cache_file = f"{stem}-{kind}-{digest[:16]}.npy"
+    cache_path = os.path.join(cache_dir, cache_file)
+    if not os.path.exists(cache_path):
+        array = build(source)
+        fd, tmp = tempfile.mkstemp(dir=cache_dir, suffix='.npy')
+        with os.fdopen(fd, 'wb') as f:
+            np.save(f, array)
+        os.replace(tmp, cache_path)
+        # ลบ cache รุ่นเก่าของไฟล์เดียวกัน
+        if entry and entry['cache_file'] != cache_file:
+            old = os.path.join(cache_dir, entry['cache_file'])
+            if os.path.exists(old):
+                os.remove(old)
+
+    if entry is None or entry['sha1'] != digest or entry['mtime_ns'] != stat.st_mtime_ns:
+        manifest[key] = {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns,
+                         'sha1': digest, 'cache_file': cache_file}
+        _save_manifest(cache_dir, manifest)
+    return cache_path
+
+
+# --- CWRU (.mat) ---
+
+def _build_cwru(source, key_filter='DE_time'):
+    from scipy.io import loadmat  # import เฉพาะตอนสร้าง cache
+
+    mat = loadmat(source)
+    keys = [k for k in mat.keys() if key_filter in k]
+    if not keys:
+        raise KeyError(f"{key_filter} not found in {os.path.basename(source)}")
+    return np.ascontiguousarray(mat[keys[0]], dtype=np.float32)
+
+
+def load_cwru_signal(path, cache_dir=None):
+    """สัญญาณ Drive End (N, 1) float32 แบบ read-only memmap"""
+    return np.load(_cached(path, 'DE_time', _build_cwru, cache_dir), mmap_mode='r')
+
+
+# --- NASA C-MAPSS (train_FD00x.txt) ---
+
+def _build_nasa(source):
+    import pandas as pd
+
+    df = pd.read_csv(source, sep=r'\s+', header=None, names=NASA_COLUMNS)
+    return np.ascontiguousarray(df.to_numpy(dtype=np.float32))
+
+
+def load_nasa_array(path, cache_dir=None):
+    """ตาราง NASA ทั้งไฟล์ (rows, 26) float32 memmap เรียงคอลัมน์ตาม NASA_COLUMNS"""
+    return np.load(_cached(path, 'nasa', _build_nasa, cache_dir), mmap_mode='r')
+
+
+def load_nasa_frame(path, columns=None, cache_dir=None):
+    """DataFrame แบบเดียวกับ pd.read_csv(sep='\\s+', names=NASA_COLUMNS) แต่โหลดจาก cache
+    columns: เลือกเฉพาะบางคอลัมน์ (copy เฉพาะที่ใช้)"""
+    import pandas as pd
+
+    array = load_nasa_array(path, cache_dir)
+    columns = columns or NASA_COLUMNS
+    data = {}
+    for name in columns:
+        col = array[:, NASA_COLUMNS.index(name)]
+        data[name] = col.astype(np.int64) if name in ('unit_id', 'time_cycles') else np.asarray(col)
+    return pd.DataFrame(data)
+
+
+# --- ฐานของ WindowedArray ที่ต่อหลายไฟล์ ---
+
+def concat_path(parts, cache_dir=None):
+    """path .npy ใน data/cache สำหรับ array ที่ต่อ parts (memmap จาก cache) ตามแกนแรก
+    ผูกชื่อกับไฟล์ cache ของแต่ละ part (มี hash ต้นฉบับอยู่แล้ว) -> ต้นฉบับเปลี่ยน ได้ไฟล์ใหม่"""
+    cache_dir = cache_dir or CACHE_DIR
+    os.makedirs(cache_dir, exist_ok=True)
+    key = '|'.join(f"{os.path.basename(getattr(p, 'filename', '') or '')}:{p.shape}:{p.dtype}"
+                   for p in parts)
+    return os.path.join(cache_dir, f"concat-{hashlib.sha1(key.encode()).hexdigest()[:16]}.npy")
+
+
+def build_all(folders=(os.path.join(REPO_ROOT, 'data', 'raw'),
+                       os.path.join(REPO_ROOT, 'data', 'temp-current'))):
+    """สร้าง cache ของทุกไฟล์ .mat และ train_FD00x/test_FD00x ที่เจอ"""
+    for folder in folders:
+        if not os.path.isdir(folder):
+            continue
+        for name in sorted(os.listdir(folder)):
+            path = os.path.join(folder, name)
+            try:
+                if name.endswith('.mat'):
+                    print(f"   ✅ {name} -> {load_cwru_signal(path).shape}")
+                elif name.startswith(('train_FD', 'test_FD')) and name.endswith('.txt'):
+                    print(f"   ✅ {name} -> {load_nasa_array(path).shape}")
+            except KeyError as e:
+                print(f"   ⚠️ {e}")
+
+
+if __name__ == '__main__':
+    print(f"🗃️ Building dataset cache in {CACHE_DIR} ...")
+    build_all()
@@ -0,0 +1,126 @@
+# ==========================================
+# 📈 Spectral / Statistical Features ของ Vibration Window (Vectorized)
+# ==========================================
+# คำนวณทีละ "ก้อน" ของ window (N, T) พร้อมกันทั้งหมด แทนการวนทีละ window:
+# - Time domain: RMS, peak, crest factor, kurtosis
+# - Spectrum (rfft + Hann window): พลังงานในแถบความถี่รอบ BPFI / BPFO / BSF (หลาย harmonic)
+# - Envelope spectrum (Hilbert ผ่าน FFT เดียวกัน): พลังงานรอบ BPFI / BPFO / BSF
+# window, bin mask และตัวคูณ Hilbert สร้างครั้งเดียวต่อขนาด window (scipy.fft เก็บ plan ไว้ใช้ซ้ำเอง)
+# ใช้ได้ทั้งเป็น input เสริมตอนเทรน (model.py) และ pre-filter ราคาถูกตอน inference
+import functools
+
+import numpy as np
+from scipy import fft as sp_fft
+
+FS = 48000          # CWRU Drive End 48 kHz (ตาม README)
+RPM = 1772          # ความเร็วรอบของชุดข้อมูล 1 HP (Normal_1 / IR007_1 / B007_1)
+# ตัวคูณความถี่รอบ (x shaft frequency) ของลูกปืน SKF 6205-2RS JEM (drive end, จาก CWRU)
+DEFECT_ORDERS = {'bpfi': 5.4152, 'bpfo': 3.5848, 'bsf': 2.3570}
+HARMONICS = 3
+ENVELOPE_BAND = (1000.0, 20000.0)   # ช่วงความถี่ resonance ที่ใช้ทำ envelope (Hz)
+CHUNK = 4096                         # จำนวน window ต่อก้อน (คุมหน่วยความจำตอน FFT)
+
+TIME_FEATURES = ['rms', 'peak', 'crest_factor', 'kurtosis']
+
+
+def defect_frequencies(rpm=RPM):
+    shaft_hz = rpm / 60.0
+    return {name: order * shaft_hz for name, order in DEFECT_ORDERS.items()}
+
+
+def time_features(windows):
+    """RMS / peak / crest factor / kurtosis (Pearson, ปกติ = 3) ของทุก window -> (N, 4) float32"""
+    x = np.asarray(windows, dtype=np.float32).reshape(len(windows), -1)
+    centered = x - x.mean(axis=1, keepdims=True)
+    var = np.einsum('ij,ij->i', centered, centered) / x.shape[1]
+    sq = centered * centered
+    m4 = np.einsum('ij,ij->i', sq, sq) / x.shape[1]
+    rms = np.sqrt(np.einsum('ij,ij->i', x, x) / x.shape[1])
+    peak = np.abs(x).max(axis=1)
+    crest = peak / np.maximum(rms, 1e-12)
+    kurt = m4 / np.maximum(var * var, 1e-24)
+    return np.stack([rms, peak, crest, kurt], axis=1).astype(np.float32)
+
+
+class SpectralFeatures:
+    """ตัวคำนวณ feature สำหรับ window ขนาดคงที่ (สร้างครั้งเดียว เรียก transform ซ้ำได้)"""
+
+    def __init__(self, time_steps=1024, fs=FS, rpm=RPM, harmonics=HARMONICS,
+                 envelope_band=ENVELOPE_BAND, workers=1):
+        self.time_steps = time_steps
+        self.fs = fs
+        self.workers = workers
+        self.freqs = sp_fft.rfftfreq(time_steps, 1.0 / fs)
+        self.taper = np.hanning(time_steps).astype(np.float32)
+        resolution = fs / time_steps
+
+        # แถบความถี่รอบแต่ละ harmonic (กว้างอย่างน้อย 1 bin) -> matrix (bins, bands) คูณทีเดียว
+        names, masks = [], []
+        for name, f0 in defect_frequencies(rpm).items():
+            for h in range(1, harmonics + 1):
+                center = f0 * h
+                if center >= fs / 2:
+                    continue
+                half = max(0.05 * center, resolution)
+                names.append(f'{name}_h{h}')
+                masks.append(np.abs(self.freqs - center) <= half)
+        self.band_names = names
+        self.band_matrix = np.stack(masks, axis=1).astype(np.float32)
+
+        # ตัวคูณ analytic signal บน spectrum ด้านเดียว (ตัดนอก envelope_band ทิ้งไปด้วย)
+        h = np.full(len(self.freqs), 2.0, dtype=np.float32)
+        h[0] = 1.0
+        if time_steps % 2 == 0:
+            h[-1] = 1.0
+        if envelope_band is not None:
+            lo, hi = envelope_band
+            h[(self.freqs < lo) | (self.freqs > hi)] = 0.0
+        self.analytic = h
+
+        self.names = (TIME_FEATURES + [f'spec_{n}' for n in names] + [f'env_{n}' for n in names]
+                      + ['spectral_centroid'])
+
+    def _chunk(self, x):
+        spectrum = sp_fft.rfft(x * self.taper, axis=1, workers=self.workers)
+        power = (spectrum.real ** 2 + spectrum.imag ** 2).astype(np.float32)
+        total = np.maximum(power.sum(axis=1, keepdims=True), 1e-12)
+
+        # envelope = |analytic signal| -> spectrum ของ envelope (ไม่ต้อง rfft ซ้ำจากสัญญาณดิบ)
+        raw = sp_fft.rfft(x, axis=1, workers=self.workers) * self.analytic
+        envelope = np.abs(sp_fft.ifft(raw, n=self.time_steps, axis=1, workers=self.workers))
+        envelope -= envelope.mean(axis=1, keepdims=True)
+        env_spec = sp_fft.rfft(envelope * self.taper, axis=1, workers=self.workers)
+        env_power = (env_spec.real ** 2 + env_spec.imag ** 2).astype(np.float32)
+        env_total = np.maximum(env_power.sum(axis=1, keepdims=True), 1e-12)
+
+        centroid = (power @ self.freqs.astype(np.float32)) / total[:, 0]
+        return np.hstack([
+            time_features(x),
+            (power @ self.band_matrix) / total,          # สัดส่วนพลังงานในแถบ (ไม่ขึ้นกับ gain ของ sensor)
+            (env_power @ self.band_matrix) / env_total,
+            centroid[:, None] / (self.fs / 2),
+        ]).astype(np.float32)
+
+    def transform(self, windows, chunk=CHUNK):
+        """windows (N, T) หรือ (N, T, 1) -> (N, len(names)) float32
+        รับ WindowedArray ได้: ดึง window ทีละ chunk ไม่ materialize ทั้งชุด"""
+        out = np.empty((len(windows), len(self.names)), dtype=np.float32)
+        for start in range(0, len(windows), chunk):
+            x = np.asarray(windows[start:start + chunk], dtype=np.float32)
+            x = x.reshape(len(x), -1)
+            if x.shape[1] != self.time_steps:
+                raise ValueError(f"expected windows of {self.time_steps} samples, got {x.shape[1]}")
+            out[start:start + chunk] = self._chunk(x)
+        return out
+
+
+@functools.lru_cache(maxsize=8)
+def get_extractor(time_steps=1024, fs=FS, rpm=RPM):
+    return SpectralFeatures(time_steps, fs, rpm)
+
+
+def extract_features(windows, fs=FS, rpm=RPM):
+    """ทางลัด: feature ของทุก window ด้วย extractor ที่ cache ไว้ตามขนาด window"""
+    windows = np.asarray(windows)
+    extractor = get_extractor(int(np.prod(windows.shape[1:])), fs, rpm)
+    return extractor.transform(windows)
@@ -0,0 +1,46 @@
+# ==========================================
+# 🏗️ Hybrid Model (Classic V1): CNN (Vibration) + LSTM (Sensor)
+# ==========================================
+# แยกออกมาจาก model.py เพื่อให้สคริปต์เทรนตัวอื่น import ไปใช้ได้โดยไม่ต้องรันทั้งไฟล์
+from tensorflow.keras.layers import Input, Conv1D, MaxPooling1D, Flatten, LSTM, Dense, Concatenate, Dropout
+from tensorflow.keras.models import Model
+
+
+def build_hybrid_model():
+    # --- ขาที่ 1: Vibration (CNN) ---
+    input_vib = Input(shape=(1024, 1), name='input_vibration')
+    x1 = Conv1D(32, 3, activation='relu')(input_vib)
+    x1 = MaxPooling1D(2)(x1)
+    x1 = Conv1D(64, 3, activation='relu')(x1)
+    x1 = MaxPooling1D(2)(x1)
+    x1 = Flatten()(x1)
+    x1 = Dense(64, activation='relu')(x1)
+
+    # --- ขาที่ 2: Sensor (LSTM) ---
+    input_sensor = Input(shape=(50, 2), name='input_sensors')
+    x2 = LSTM(64, return_sequences=False)(input_sensor) # เอา Dropout ในนี้ออก
+    x2 = Dense(32, activation='relu')(x2)
+
+    # --- รวมร่าง ---
+    combined = Concatenate()([x1, x2])
+    z = Dense(128, activation='relu')(combined)
+    z = Dropout(0.2)(z) # กลับมาใช้ 0.2 เบาๆ พอ
+
+    # --- Output ---
+    output_diag = Dense(4, activation='softmax', name='diagnosis_output')(z)
+    output_rul = Dense(1, activation='linear', name='rul_output')(z)
+
+    model = Model(inputs=[input_vib, input_sensor], 
+                  outputs=[output_diag, output_rul])
+    
+    return model
+
+
+def compile_hybrid_model(model, optimizer='adam'):
+    model.compile(
+        optimizer=optimizer,
+        loss={'diagnosis_output': 'categorical_crossentropy', 'rul_output': 'mse'},
+        loss_weights={'diagnosis_output': 1.0, 'rul_output': 0.1},
+        metrics={'diagnosis_output': 'accuracy', 'rul_output': 'mae'}
+    )
+    return model
@@ -0,0 +1,287 @@
+# ==========================================
+# 🚰 Streaming tf.data Input Pipeline
+# ==========================================
+# แทนการโหลดทุกอย่างเป็น NumPy array ก้อนใหญ่ (+ z-score + shuffle ที่ copy ซ้ำหลายรอบ)
+# - อ่านไฟล์ .mat / NASA ทีละไฟล์ ทีละเครื่อง แล้วปล่อย window ออกมาทีละอัน (generator)
+# - normalise ระหว่างทางด้วย .map(num_parallel_calls) จากสถิติที่คำนวณไว้ล่วงหน้า
+# - จับคู่ vibration / sensor ทีละ batch ด้วย PairedSampler (สุ่มใหม่ทุก epoch ใช้ครบทั้งสองฝั่ง)
+#   generator ส่งแค่ index -> gather + normalise ขนานกันใน .map(num_parallel_calls) -> prefetch
+# - StallTimer วัดเวลาที่ model.fit ต้องรอข้อมูลในแต่ละ epoch
+import json
+import os
+import time
+
+import numpy as np
+import tensorflow as tf
+
+from dataset_cache import NASA_COLUMNS, concat_path, load_cwru_signal, load_nasa_array
+from paired_sampler import PairedSampler
+from windowing import WindowedArray, segment_recordings, sliding_windows, window_starts
+
+FILE_CONFIGS = [
+    (0, 'Time_Normal_1_098.mat'),   # Normal
+    (1, 'IR007_1_110.mat'),         # Inner Race
+    (2, 'OR007_6_1_136.mat'),       # Outer Race
+    (3, 'B007_1_123.mat')           # Ball
+]
+NASA_FEATURES = ['s2', 's7']  # s2=Temp, s7=Current
+
+TIME_STEPS = 1024
+STEP = 512
+SENSOR_TIME_STEPS = 50
+NUM_CLASSES = 4
+VAL_EVERY = 5  # ทุกๆ window ที่ 5 ของแต่ละไฟล์/เครื่อง -> validation (20% เท่ากับ validation_split=0.2)
+
+
+# --- 1. แหล่งข้อมูลแบบ lazy ---
+
+def load_vibration(folder, filename):
+    """สัญญาณ DE_time (float32 memmap จาก data/cache, สร้าง cache จาก .mat ครั้งแรก)"""
+    return load_cwru_signal(os.path.join(folder, filename))
+
+
+def iter_nasa_units(path):
+    """ปล่อยข้อมูลทีละเครื่องจากตาราง NASA ที่ cache ไว้: (unit_id, [temp, current] (n, 2), RUL (n,))"""
+    table = load_nasa_array(path)
+    unit_col = NASA_COLUMNS.index('unit_id')
+    cycle_col = NASA_COLUMNS.index('time_cycles')
+    feature_cols = [NASA_COLUMNS.index(f) for f in NASA_FEATURES]
+
+    ids = table[:, unit_col]
+    cuts = _unit_cuts(ids)
+    for a, b in zip(cuts[:-1], cuts[1:]):
+        values = np.ascontiguousarray(table[a:b, feature_cols])
+        cycles = table[a:b, cycle_col]
+        yield int(ids[a]), values, (cycles.max() - cycles).astype(np.float32)
+
+
+def _unit_cuts(ids):
+    """ขอบเขตแถว [cuts[i], cuts[i+1]) ของแต่ละเครื่อง (แถวของเครื่องเดียวกันอยู่ติดกัน)"""
+    return np.concatenate([[0], np.flatnonzero(ids[1:] != ids[:-1]) + 1, [len(ids)]])
+
+
+def _column_view(table, cols):
+    """คอลัมน์ cols ของ table: ถ้าห่างเท่ากันได้ view บน memmap (ไม่ copy) ไม่งั้น copy เฉพาะคอลัมน์"""
+    steps = np.diff(cols)
+    if len(cols) == 1 or (np.all(steps == steps[0]) and steps[0] > 0):
+        stride = int(steps[0]) if len(cols) > 1 else 1
+        return table[:, cols[0]:cols[-1] + 1:stride]
+    return np.ascontiguousarray(table[:, cols])
+
+
+def _in_split(index, split):
+    """index เป็น int หรือ array ของลำดับ window (ภายในไฟล์ / เครื่อง)"""
+    is_val = index % VAL_EVERY == VAL_EVERY - 1
+    return is_val if split == 'val' else ~is_val if isinstance(is_val, np.ndarray) else not is_val
+
+
+def iter_vibration_windows(folder, label, filename, split):
+    data = load_vibration(folder, filename)
+    for i, window in enumerate(sliding_windows(data, TIME_STEPS, STEP)):
+        if _in_split(i, split):
+            yield window, label
+
+
+def iter_sensor_windows(path, split):
+    for _, values, rul in iter_nasa_units(path):
+        for i, start in enumerate(window_starts(len(values), SENSOR_TIME_STEPS, 1)):
+            if _in_split(i, split):
+                yield values[start:start + SENSOR_TIME_STEPS], rul[start + SENSOR_TIME_STEPS]
+
+
+# --- 2. สถิติสำหรับ Normalization (อ่านข้อมูลหนึ่งรอบ ไม่เก็บ window) ---
+
+def compute_normalization(folder, nasa_path, configs=FILE_CONFIGS):
+    """vib_mean / vib_std (เท่ากับ z-score เดิมใน model.py) และ min/max ของ sensor (MinMaxScaler)"""
+    count = total = sumsq = 0.0
+    n_vib = 0
+    for label, filename in configs:
+        windows, _ = segment_recordings([load_vibration(folder, filename)], [label], TIME_STEPS, STEP)
+        c, t, q = windows.window_moments()
+        count, total, sumsq = count + c, total + t, sumsq + q
+        n_vib += len(windows)
+    vib_mean = total / count
+    vib_std = float(np.sqrt(max(sumsq / count - vib_mean ** 2, 0.0)))
+
+    lo = np.full(len(NASA_FEATURES), np.inf)
+    hi = np.full(len(NASA_FEATURES), -np.inf)
+    n_sensor = 0
+    for _, values, _ in iter_nasa_units(nasa_path):
+        lo = np.minimum(lo, values.min(axis=0))
+        hi = np.maximum(hi, values.max(axis=0))
+        n_sensor += len(window_starts(len(values), SENSOR_TIME_STEPS, 1))
+
+    return {
+        "vib_mean": float(vib_mean),
+        "vib_std": vib_std,
+        "sensor_min": lo.tolist(),
+        "sensor_max": hi.tolist(),
+        "time_steps": TIME_STEPS,
+        "sensor_time_steps": SENSOR_TIME_STEPS,
+        "step": STEP,
+        "num_vibration_windows": n_vib,
+        "num_sensor_windows": n_sensor,
+    }
+
+
+def load_params(params_path, folder, nasa_path):
+    """อ่าน preprocess_params.json (จาก model.py / train_streaming.py) ถ้าไม่มีให้คำนวณจากข้อมูล"""
+    if os.path.exists(params_path):
+        with open(params_path) as f:
+            return json.load(f)
+    print(f"   ⚠️ {params_path} not found -> computing normalization from data")
+    return compute_normalization(folder, nasa_path)
+
+
+# --- 3. tf.data Pipeline ---
+
+def split_windows(folder, nasa_path, split, configs=FILE_CONFIGS):
+    """window ทั้งหมดของ split แบบ WindowedArray (อ้างอิงสัญญาณต่อกันก้อนเดียว ไม่ copy ทีละ window)
+    -> vib (N, 1024, 1), label (N,), sensor (M, 50, 2), rul (M,)"""
+    signals, labels = [], []
+    for label, filename in configs:
+        signals.append(load_vibration(folder, filename))
+        labels.append(label)
+    # ต่อทุกไฟล์เป็น .npy ก้อนเดียวใน data/cache (สร้างครั้งแรกครั้งเดียว ทุก worker เปิด memmap ร่วมกัน)
+    vib, vib_labels = segment_recordings(signals, labels, TIME_STEPS, STEP, base_path=concat_path(signals))
+    keep = _in_split(_per_source_index(vib.starts, signals, STEP), split)
+    vib = WindowedArray(vib.base, vib.starts[keep], TIME_STEPS)
+
+    # sensor: ชี้เข้าตาราง NASA memmap ตรงๆ (แถวของแต่ละเครื่องติดกันอยู่แล้ว) ไม่ต้องต่อ array ใหม่
+    table = load_nasa_array(nasa_path)
+    cycles = table[:, NASA_COLUMNS.index('time_cycles')]
+    cuts = _unit_cuts(table[:, NASA_COLUMNS.index('unit_id')])
+    ruls, starts = [], []
+    for a, b in zip(cuts[:-1], cuts[1:]):
+        s = window_starts(b - a, SENSOR_TIME_STEPS, 1)
+        starts.append(s[_in_split(np.arange(len(s)), split)] + a)
+        ruls.append(cycles[a:b].max() - cycles[a:b])
+    starts = np.concatenate(starts).astype(np.int64)
+    base = _column_view(table, [NASA_COLUMNS.index(f) for f in NASA_FEATURES])
+    sensor = WindowedArray(base, starts, SENSOR_TIME_STEPS)
+    rul = np.concatenate(ruls).astype(np.float32)[starts + SENSOR_TIME_STEPS]
+    return vib, vib_labels[keep], sensor, rul
+
+
+def _per_source_index(starts, signals, step):
+    """ลำดับของ window ภายในไฟล์ของตัวเอง (ใช้แบ่ง train/val แบบเดียวกับ iter_vibration_windows)"""
+    offsets = np.concatenate([[0], np.cumsum([len(x) for x in signals])[:-1]])
+    source = np.searchsorted(offsets, starts, side='right') - 1
+    return (starts - offsets[source]) // step
+
+
+def make_dataset(folder, nasa_path, params, split='train', batch_size=32, seed=1234, strata=None):
+    """tf.data ของคู่ (vibration, sensor) จาก PairedSampler: ทุกครั้งที่วน dataset (เช่น .repeat())
+    = 1 epoch ใหม่ที่สุ่มคู่ใหม่และใช้ window ครบทั้งสองฝั่ง / validation เรียงคงที่
+    strata: None หรือ paired_sampler.CONDITION_STRATA (จับคู่ตามสภาพเครื่อง)"""
+    vib, labels, sensor, rul = split_windows(folder, nasa_path, split)
+    sampler = PairedSampler(vib, labels, sensor, rul, batch_size, strata=strata,
+                            shuffle=(split == 'train'), seed=seed)
+
+    vib_mean = tf.constant(params["vib_mean"], tf.float32)
+    vib_scale = tf.constant(1.0 / (params["vib_std"] + 1e-7), tf.float32)
+    sensor_min = tf.constant(params["sensor_min"], tf.float32)
+    sensor_range = tf.constant(np.asarray(params["sensor_max"]) - np.asarray(params["sensor_min"]),
+                               tf.float32)
+
+    index_signature = (tf.TensorSpec((None,), tf.int64), tf.TensorSpec((None,), tf.int64))
+
+    def gather(v, s):
+        inputs, (label, rul_batch) = sampler.gather(v, s)
+        return (inputs['input_vibration'], inputs['input_sensors'],
+                label.astype(np.int64), rul_batch)
+
+    def load_batch(v, s):
+        vib_batch, sensor_batch, label, rul_batch = tf.numpy_function(
+            gather, [v, s], [tf.float32, tf.float32, tf.int64, tf.float32])
+        vib_batch.set_shape((None, TIME_STEPS, 1))
+        sensor_batch.set_shape((None, SENSOR_TIME_STEPS, len(NASA_FEATURES)))
+        label.set_shape((None,))
+        rul_batch.set_shape((None,))
+        return ({'input_vibration': (vib_batch - vib_mean) * vib_scale,
+                 'input_sensors': (sensor_batch - sensor_min) / tf.maximum(sensor_range, 1e-7)},
+                {'diagnosis_output': tf.one_hot(label, NUM_CLASSES), 'rul_output': rul_batch})
+
+    # generator ปล่อยแค่ index ของแต่ละ batch (เร็ว) ส่วน gather จาก memmap + normalise
+    # ทำขนานกันหลาย batch ใน map (train ไม่ต้องรักษาลำดับ / validation เรียงคงที่)
+    ds = tf.data.Dataset.from_generator(sampler.batch_indices, output_signature=index_signature)
+    # from_generator ไม่รู้จำนวน batch -> ใส่ len(sampler) ไว้ให้ steps_per_epoch() อ่านจาก dataset
+    ds = ds.apply(tf.data.experimental.assert_cardinality(len(sampler)))
+    ds = ds.map(load_batch, num_parallel_calls=tf.data.AUTOTUNE, deterministic=(split != 'train'))
+    return ds.prefetch(tf.data.AUTOTUNE)
+
+
+# --- 4. วัดเวลารอข้อมูล (Input Stall) ---
+
+class StallTimer(tf.keras.callbacks.Callback):
+    """ป้อน batch ให้ model.fit ผ่าน generator แล้วจับเวลาที่ต้องรอ next() ของ tf.data
+    (ถ้า pipeline ทันกับโมเดล ค่านี้ควรใกล้ 0) รายงานเป็น logs['input_stall_s'] ทุก epoch"""
+
+    def __init__(self, dataset, verbose=1):
+        super().__init__()
+        self.dataset = dataset
+        self.verbose = verbose
+        self._wait = 0.0
+        self._epoch_start = 0.0
+
+    def stream(self):
+        iterator = iter(self.dataset)
+        while True:
+            t0 = time.perf_counter()
+            try:
+                batch = next(iterator)
+            except StopIteration:
+                iterator = iter(self.dataset)
+                continue
+            self._wait += time.perf_counter() - t0
+            yield batch
+
+    def on_epoch_begin(self, epoch, logs=None):
+        self._epoch_start = time.perf_counter()
+
+    def on_epoch_end(self, epoch, logs=None):
+        elapsed = time.perf_counter() - self._epoch_start
+        stall = self._wait
+        self._wait = 0.0
+        if logs is not None:
+            logs['input_stall_s'] = stall
+            logs['input_stall_pct'] = 100.0 * stall / max(elapsed, 1e-9)
+        if self.verbose:
+            print(f"   ⏳ Epoch {epoch + 1}: input stall {stall:.2f}s "
+                  f"({100.0 * stall / max(elapsed, 1e-9):.1f}% of {elapsed:.1f}s)")
+
+
+def steps_per_epoch(dataset):
+    """จำนวน batch ต่อ epoch ของ dataset จาก make_dataset (= len(PairedSampler) ของ split นั้น)
+    ต้องเรียกก่อน .repeat() / ไม่อ่านจาก preprocess_params.json เพราะไฟล์จาก model.py ไม่มีจำนวน window"""
+    return max(int(dataset.cardinality()), 1)
+
+
+# --- 5. ตัวอย่าง window เป็น NumPy (สำหรับ calibration ตอน quantize / benchmark) ---
+
+def sample_windows(folder, nasa_path, params, split='val', num_samples=512, configs=FILE_CONFIGS):
+    """เลือก window แบบกระจายทั้งชุด (ทุกคลาส / ทุกเครื่อง) แล้ว normalise เหมือน make_dataset
+    -> vib (N, 1024, 1), sensor (N, 50, 2), label (N,), rul (N,)"""
+    vib, labels = [], []
+    for label, filename in configs:
+        for window, y in iter_vibration_windows(folder, label, filename, split):
+            vib.append(window)
+            labels.append(y)
+    sensor, rul = [], []
+    for window, y in iter_sensor_windows(nasa_path, split):
+        sensor.append(window)
+        rul.append(y)
+
+    n = min(len(vib), len(sensor), num_samples)
+    if n == 0:
+        raise RuntimeError(f"no {split} windows found in {folder} / {nasa_path}")
+    pick_vib = np.linspace(0, len(vib) - 1, n).astype(int)
+    pick_sensor = np.linspace(0, len(sensor) - 1, n).astype(int)
+
+    x_vib = np.stack([vib[i] for i in pick_vib]).astype(np.float32)
+    x_vib = (x_vib - params["vib_mean"]) / (params["vib_std"] + 1e-7)
+    lo = np.asarray(params["sensor_min"], np.float32)
+    span = np.asarray(params["sensor_max"], np.float32) - lo
+    x_sensor = (np.stack([sensor[i] for i in pick_sensor]) - lo) / np.where(span == 0, 1, span)
+    return (x_vib.astype(np.float32), x_sensor.astype(np.float32),
+            np.asarray(labels)[pick_vib], np.asarray(rul, np.float32)[pick_sensor])
@@ -10,7 +10,6 @@ import numpy as np
 import matplotlib.pyplot as plt
 import os
 import seaborn as sns
-from scipy.io import loadmat
 from sklearn.preprocessing import MinMaxScaler
 from tensorflow.keras.utils import to_categorical
 
@@ -18,6 +17,10 @@ from tensorflow.keras.utils import to_categorical
 np.random.seed(1234)
 tf.random.set_seed(1234)
 
+# True = เพิ่ม spectral features (src/features.py: RMS, kurtosis, BPFI/BPFO/BSF band energy ฯลฯ)
+# เป็น input ที่ 3 ของโมเดล ('input_features')
+USE_SPECTRAL_FEATURES = False
+
 # ==========================================
 # 2. VIBRATION PIPELINE (CWRU) 🌊
 # ==========================================
@@ -32,21 +35,21 @@ file_configs = [
 ]
 data_folder_path = 'data/raw'
 
+# โหลดผ่าน src/dataset_cache.py: ครั้งแรกแปลง .mat -> .npy (data/cache) ครั้งต่อไปเปิดแบบ memmap
+from dataset_cache import load_cwru_signal, load_nasa_frame
+
 def load_and_label_data(folder, configs):
     all_data = []
     all_labels = []
     for label, filename in configs:
         file_path = os.path.join(folder, filename)
         try:
-            mat = loadmat(file_path)
-            key_name = [k for k in mat.keys() if 'DE_time' in k]
-            if len(key_name) > 0:
-                data = mat[key_name[0]]
-                all_data.append(data)
-                all_labels.append(label)
-                print(f"   ✅ Loaded: {filename} | Shape: {data.shape}")
-            else:
-                print(f"   ⚠️ Key not found: {filename}")
+            data = load_cwru_signal(file_path)
+            all_data.append(data)
+            all_labels.append(label)
+            print(f"   ✅ Loaded: {filename} | Shape: {data.shape}")
+        except KeyError:
+            print(f"   ⚠️ Key not found: {filename}")
         except FileNotFoundError:
             print(f"   ❌ File not found: {filename}")
     return all_data, all_labels
@@ -54,30 +57,36 @@ def load_and_label_data(folder, configs):
 raw_data, raw_labels = load_and_label_data(data_folder_path, file_configs)
 
 # --- 2.2 Sliding Window (Segmentation) ---
-def create_segments(data_list, label_list, time_steps, step):
-    segments = []
-    labels = []
-    for i, data in enumerate(data_list):
-        label = label_list[i]
-        for x in range(0, len(data) - time_steps, step):
-            segment = data[x : x + time_steps]
-            segments.append(segment)
-            labels.append(label)
-    return np.array(segments), np.array(labels)
+# WindowedArray (src/windowing.py): window ทุกอันอ้างอิงสัญญาณต่อกันก้อนเดียว (เก็บแค่ starts)
+# -> ไม่ copy ข้อมูลที่ซ้อนทับกัน (step 512 = ซ้ำ 2 เท่า) ดึงจริงทีละ batch ใน PairedSampler (เหมือน input_pipeline.py)
+from windowing import WindowedArray, segment_recordings, segment_units
 
 TIME_STEPS = 1024
 STEP = 512
 
-x_vib_train, y_diag_train = create_segments(raw_data, raw_labels, TIME_STEPS, STEP)
+x_vib_train, y_diag_train = segment_recordings(raw_data, raw_labels, TIME_STEPS, STEP)
 print(f"   ✂️ Windowing Done: {x_vib_train.shape}")
 
+# --- 2.2.1 Spectral Features (Optional) ---
+# คำนวณจากสัญญาณดิบ (ก่อน z-score) ทีละก้อนแบบ vectorized แล้ว z-score แยกรายคอลัมน์
+if USE_SPECTRAL_FEATURES:
+    from features import get_extractor
+    feature_extractor = get_extractor(TIME_STEPS)
+    x_feat_train = feature_extractor.transform(x_vib_train)
+    feat_mean = x_feat_train.mean(axis=0)
+    feat_std = x_feat_train.std(axis=0) + 1e-7
+    x_feat_train = (x_feat_train - feat_mean) / feat_std
+    print(f"   📈 Spectral Features: {x_feat_train.shape}")
+
 # --- 2.3 Vibration Normalization (Z-Score) ---
 # ย้ายมาทำตรงนี้เลย เพื่อให้จบกระบวนการของ Vibration
+# mean/std ของทุก window คิดจากสัญญาณฐานถ่วงด้วย coverage (เท่าค่าเดิม) แล้ว z-score ที่สัญญาณฐานครั้งเดียว
 print("   ⚖️ Normalizing Vibration Data...")
-vib_mean = x_vib_train.mean()
-vib_std = x_vib_train.std()
-x_vib_train = (x_vib_train - vib_mean) / (vib_std + 1e-7)
-print(f"   ✅ Vibration Ready (Mean: {x_vib_train.mean():.2f}, SD: {x_vib_train.std():.2f})")
+vib_mean, vib_std = x_vib_train.window_stats()
+vib_base = ((np.asarray(x_vib_train.base, dtype=np.float32) - vib_mean) / (vib_std + 1e-7)).astype(np.float32)
+x_vib_train = WindowedArray(vib_base, x_vib_train.starts, TIME_STEPS)
+norm_mean, norm_std = x_vib_train.window_stats()
+print(f"   ✅ Vibration Ready (Mean: {norm_mean:.2f}, SD: {norm_std:.2f})")
 
 
 # ==========================================
@@ -91,13 +100,9 @@ NASA_DATA_PATH = os.path.join(script_dir, '..', 'data', 'temp-current', 'train_F
 # NASA_DATA_PATH = os.path.join(script_dir, 'data', 'temp-current', 'train_FD001.txt') # ใช้บรรทัดนี้ถ้าไฟล์อยู่ใน src/data
 
 def load_nasa_data(path):
-    col_names = ['unit_id', 'time_cycles', 'setting_1', 'setting_2', 'setting_3', 
-                 's1', 's2', 's3', 's4', 's5', 's6', 's7', 's8', 's9', 's10', 
-                 's11', 's12', 's13', 's14', 's15', 's16', 's17', 's18', 's19', 's20', 's21']
     try:
-        df = pd.read_csv(path, sep='\s+', header=None, names=col_names)
         features = ['s2', 's7'] # s2=Temp, s7=Current
-        data = df[['unit_id', 'time_cycles'] + features].copy()
+        data = load_nasa_frame(path, ['unit_id', 'time_cycles'] + features)
         data.columns = ['unit_id', 'time', 'temperature', 'current']
         
         # Create RUL Label
@@ -122,23 +127,14 @@ if nasa_df is not None:
     nasa_df[feature_cols] = scaler.fit_transform(nasa_df[feature_cols])
 
     # --- 3.3 Sliding Window ---
-    def create_sensor_segments(df, time_steps, features, label_col='RUL'):
-        x_segments = []
-        y_labels = []
-        for unit_id in df['unit_id'].unique():
-            unit_data = df[df['unit_id'] == unit_id]
-            data_values = unit_data[features].values
-            label_values = unit_data[label_col].values
-            for i in range(len(unit_data) - time_steps):
-                x_segments.append(data_values[i : i + time_steps])
-                y_labels.append(label_values[i + time_steps])
-        return np.array(x_segments), np.array(y_labels)
+    # segment_units (windowing.py): เรียงข้อมูลครั้งเดียว ไม่ filter DataFrame ซ้ำทุก unit
+    # และไม่ copy window ที่ซ้อนกัน (step 1 = ซ้ำ 50 เท่า)
 
     SENSOR_TIME_STEPS = 50
-    x_sensor_train, y_rul_train = create_sensor_segments(nasa_df, SENSOR_TIME_STEPS, feature_cols)
+    x_sensor_train, y_rul_train = segment_units(nasa_df, SENSOR_TIME_STEPS, feature_cols)
     print(f"   ✅ Sensor Ready: {x_sensor_train.shape}")
 else:
-    x_sensor_train, y_rul_train = np.array([]), np.array([])
+    x_sensor_train, y_rul_train = WindowedArray(np.empty((0, 2)), [], 50), np.array([])
 
 
 # ==========================================
@@ -153,88 +149,56 @@ print(f"4. RUL Label       (y_rul_train) : {y_rul_train.shape}")
 print("-" * 40)
 
 # ==========================================
-# 5. DATA ALIGNMENT (จับคู่ข้อมูล) ✂️
+# 5. DATA ALIGNMENT (จับคู่ข้อมูล) 🎲
 # ==========================================
-print("\n[STEP 4/6] Aligning Data (Truncating to match size)...")
-
-# 1. หาจำนวนที่น้อยที่สุด (เพื่อตัดส่วนเกินทิ้ง)
-# CWRU มี ~3,700 แต่ NASA มี ~15,000 -> ต้องตัด NASA ให้เหลือเท่า CWRU
-min_samples = min(len(x_vib_train), len(x_sensor_train))
-print(f"   📉 Truncating data to: {min_samples} samples")
-
-# 2. ตัดข้อมูล (Slicing)
-X_vib_final   = x_vib_train[:min_samples]
-X_sensor_final = x_sensor_train[:min_samples]
-
-y_diag_final  = y_diag_train[:min_samples]
-y_rul_final   = y_rul_train[:min_samples]
-
-# 3. แปลงคำตอบ Diagnosis เป็น One-Hot Encoding
-# เช่น Label 0 (Normal) -> [1, 0, 0, 0] เพื่อให้เหมาะกับ Softmax
-y_diag_hot = to_categorical(y_diag_final, num_classes=4)
-
-print(f"   ✅ Alignment Complete!")
-print(f"      X_vib_final: {X_vib_final.shape}")
-print(f"      X_sensor_final: {X_sensor_final.shape}")
-
-# ==========================================
-# 5.5 SHUFFLE DATA (หัวใจสำคัญ! ห้ามลืม) 🔀
-# ==========================================
-from sklearn.utils import shuffle
-
-print("\n[STEP 5.5] Shuffling Data...")
-X_vib_final, X_sensor_final, y_diag_hot, y_rul_final = shuffle(
-    X_vib_final, X_sensor_final, y_diag_hot, y_rul_final, 
-    random_state=42
-)
-print("   ✅ Data Shuffled! (Train/Val sets will now be balanced)")
-
+# เดิม: ตัด NASA (~15,000) ให้เหลือเท่า CWRU (~3,700) แล้วจับคู่ตามตำแหน่ง -> ทิ้ง sensor ส่วนใหญ่
+# ตอนนี้: PairedSampler (src/paired_sampler.py) สุ่มจับคู่ใหม่ทุก epoch ทีละ batch
+# ใช้ครบทั้งสองฝั่งทุก epoch โดยไม่สร้าง array ของคู่ (แทนทั้งการตัดและการ shuffle เดิม)
+print("\n[STEP 4/6] Pairing Data (PairedSampler, no truncation)...")
+from paired_sampler import PairedSampler
+
+BATCH_SIZE = 32
+# แบ่ง validation แยกแต่ละฝั่งก่อนจับคู่ (ทุกๆ window ที่ 5 = 20% เท่า validation_split=0.2 เดิม)
+VAL_EVERY = 5
+vib_is_train = np.arange(len(x_vib_train)) % VAL_EVERY != VAL_EVERY - 1
+sensor_is_train = np.arange(len(x_sensor_train)) % VAL_EVERY != VAL_EVERY - 1
+
+def select_windows(windows, rows):
+    """เลือกบาง window โดยยังอ้างอิงสัญญาณฐานเดิม (ไม่ gather ข้อมูล)"""
+    return WindowedArray(windows.base, windows.starts[rows], windows.time_steps)
+
+def make_sampler(vib_rows, sensor_rows, shuffle, batch_size=BATCH_SIZE):
+    extra = {'input_features': x_feat_train[vib_rows]} if USE_SPECTRAL_FEATURES else None
+    return PairedSampler(select_windows(x_vib_train, vib_rows), y_diag_train[vib_rows],
+                         select_windows(x_sensor_train, sensor_rows), y_rul_train[sensor_rows],
+                         batch_size=batch_size, shuffle=shuffle, extra=extra)
+
+def keras_batches(sampler):
+    # แปลงคำตอบ Diagnosis เป็น One-Hot Encoding เช่น Label 0 (Normal) -> [1, 0, 0, 0]
+    for inputs, (label, rul) in sampler.repeat():
+        yield inputs, {'diagnosis_output': to_categorical(label, num_classes=4), 'rul_output': rul}
+
+train_sampler = make_sampler(vib_is_train, sensor_is_train, shuffle=True)
+val_sampler = make_sampler(~vib_is_train, ~sensor_is_train, shuffle=False)
+
+print(f"   ✅ Pairing Ready! {train_sampler.pairs_per_epoch} train pairs / epoch "
+      f"({int(vib_is_train.sum())} vibration x {int(sensor_is_train.sum())} sensor windows)")
+print(f"      Validation: {val_sampler.pairs_per_epoch} pairs")
 
 # ==========================================
 # 6. BUILD HYBRID MODEL (กลับมาใช้ V1 เดิมที่เสถียรที่สุด) 🏗️
 # ==========================================
-from tensorflow.keras.layers import Input, Conv1D, MaxPooling1D, Flatten, LSTM, Dense, Concatenate, Dropout
-from tensorflow.keras.models import Model
+# ตัวสร้างโมเดลย้ายไปอยู่ที่ src/hybrid_model.py (ใช้ร่วมกับ train_streaming.py)
+from hybrid_model import build_hybrid_model, compile_hybrid_model
 
 print("\n[STEP 5/6] Building Hybrid Architecture (Classic V1)...")
 
-def build_hybrid_model():
-    # --- ขาที่ 1: Vibration (CNN) ---
-    input_vib = Input(shape=(1024, 1), name='input_vibration')
-    x1 = Conv1D(32, 3, activation='relu')(input_vib)
-    x1 = MaxPooling1D(2)(x1)
-    x1 = Conv1D(64, 3, activation='relu')(x1)
-    x1 = MaxPooling1D(2)(x1)
-    x1 = Flatten()(x1)
-    x1 = Dense(64, activation='relu')(x1)
-
-    # --- ขาที่ 2: Sensor (LSTM) ---
-    input_sensor = Input(shape=(50, 2), name='input_sensors')
-    x2 = LSTM(64, return_sequences=False)(input_sensor) # เอา Dropout ในนี้ออก
-    x2 = Dense(32, activation='relu')(x2)
-
-    # --- รวมร่าง ---
-    combined = Concatenate()([x1, x2])
-    z = Dense(128, activation='relu')(combined)
-    z = Dropout(0.2)(z) # กลับมาใช้ 0.2 เบาๆ พอ
-
-    # --- Output ---
-    output_diag = Dense(4, activation='softmax', name='diagnosis_output')(z)
-    output_rul = Dense(1, activation='linear', name='rul_output')(z)
-
-    model = Model(inputs=[input_vib, input_sensor], 
-                  outputs=[output_diag, output_rul])
-    
-    return model
-
-model = build_hybrid_model()
-
-model.compile(
-    optimizer='adam',
-    loss={'diagnosis_output': 'categorical_crossentropy', 'rul_output': 'mse'},
-    loss_weights={'diagnosis_output': 1.0, 'rul_output': 0.1},
-    metrics={'diagnosis_output': 'accuracy', 'rul_output': 'mae'}
-)
+if USE_SPECTRAL_FEATURES:
+    from architectures import build_model, make_config
+    model = build_model(make_config('classic_v1', spectral_features=x_feat_train.shape[1]))
+else:
+    model = build_hybrid_model()
+compile_hybrid_model(model)
 
 print(model.summary())
 
@@ -245,15 +209,15 @@ print("\n[STEP 6/6] Starting Training Process...")
 print("🔥 Training for 20 Epochs (Press Ctrl+C to stop early)...")
 
 history = model.fit(
-    # ป้อนข้อมูลเข้า 2 ประตู
-    x={'input_vibration': X_vib_final, 'input_sensors': X_sensor_final},
+    # ป้อนข้อมูลเข้า 2 ประตู + ตรวจคำตอบจาก 2 เฉลย (ทีละ batch จาก PairedSampler)
+    keras_batches(train_sampler),
+    steps_per_epoch=len(train_sampler),
     
-    # ตรวจคำตอบจาก 2 เฉลย
-    y={'diagnosis_output': y_diag_hot, 'rul_output': y_rul_final},
+    # validation แยกไว้ก่อนจับคู่ (ลำดับคงที่)
+    validation_data=keras_batches(val_sampler),
+    validation_steps=len(val_sampler),
     
     epochs=20,          # รอบการฝึก
-    batch_size=32,      # สอนทีละ 32 ตัวอย่าง
-    validation_split=0.2, # แบ่ง 20% ไว้สอบเก็บคะแนน
     verbose=1
 )
 
@@ -270,6 +234,27 @@ if not os.path.exists('models'):
 model.save('models/hybrid_model_v1.h5')
 print("💾 Model saved to 'models/hybrid_model_v1.h5'")
 
+# บันทึกค่า Normalization ไว้ให้ Backend ใช้ตอน Inference แบบ streaming (web/backend/windows.py)
+import json
+preprocess_params = {
+    "vib_mean": float(vib_mean),
+    "vib_std": float(vib_std),
+    "sensor_min": scaler.data_min_.tolist() if nasa_df is not None else [0.0, 0.0],
+    "sensor_max": scaler.data_max_.tolist() if nasa_df is not None else [1.0, 1.0],
+    "time_steps": TIME_STEPS,
+    "sensor_time_steps": SENSOR_TIME_STEPS if nasa_df is not None else 50,
+    "step": STEP,
+}
+if USE_SPECTRAL_FEATURES:
+    preprocess_params.update({
+        "feature_names": feature_extractor.names,
+        "feature_mean": feat_mean.tolist(),
+        "feature_std": feat_std.tolist(),
+    })
+with open('models/preprocess_params.json', 'w') as f:
+    json.dump(preprocess_params, f, indent=2)
+print("💾 Normalization params saved to 'models/preprocess_params.json'")
+
 # ==========================================
 # 9. VISUALIZATION (ดูผลงานแบบรูปธรรม) 📈
 # ==========================================
@@ -303,15 +288,14 @@ axes[1].legend()
 axes[1].grid(True, alpha=0.3)
 
 # --- กราฟที่ 3: เฉลย vs ทายจริง (RUL Prediction Check) ---
-# ลองให้ AI ทายผลจากข้อมูล 100 ตัวแรกดู
+# ลองให้ AI ทายผลจากข้อมูล validation 100 คู่แรกดู
+check_inputs, (_, check_rul) = next(iter(make_sampler(~vib_is_train, ~sensor_is_train, False, 100)))
 # ทำนายผล
-predictions = model.predict(
-    {'input_vibration': X_vib_final[:100], 'input_sensors': X_sensor_final[:100]}
-)
+predictions = model.predict(check_inputs)
 pred_rul = predictions[1] # เอาคำตอบส่วน RUL ออกมา
 
 # วาดกราฟเปรียบเทียบ
-axes[2].plot(y_rul_final[:100], label='Actual RUL', color='black', alpha=0.6)
+axes[2].plot(check_rul, label='Actual RUL', color='black', alpha=0.6)
 axes[2].plot(pred_rul, label='Predicted RUL ', color='red', linestyle='--')
 axes[2].set_title('Reality vs AI Prediction (100 Samples)', fontsize=12)
 axes[2].set_xlabel('Sample Index')
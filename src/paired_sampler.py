@@ -0,0 +1,116 @@
+# ==========================================
+# 🎲 Paired Sampler: จับคู่ window vibration (CWRU) กับ sensor (NASA) ทีละ batch
+# ==========================================
+# ของเดิม: ตัด NASA (~15k window) ให้เหลือเท่า CWRU (~3.7k) แล้วจับคู่ตามตำแหน่ง -> ทิ้งข้อมูล sensor ส่วนใหญ่
+# ที่นี่: สุ่มลำดับ (permutation) ของแต่ละฝั่งแยกกันทุก epoch แล้วจับคู่ตามลำดับนั้น
+# - 1 epoch = max(จำนวน vibration, จำนวน sensor) คู่ ฝั่งที่น้อยกว่าวนซ้ำด้วย permutation ใหม่
+#   -> ทุก epoch เห็นทุก window ของทั้งสองฝั่งอย่างน้อย 1 ครั้ง และคู่ไม่ซ้ำเดิมในแต่ละ epoch
+# - strata (optional): จับคู่เฉพาะภายในกลุ่มสภาพเครื่องเดียวกัน เช่น Normal <-> RUL สูง, Fault <-> RUL ต่ำ
+# - เก็บแค่ index (int64) ของแต่ละฝั่ง ไม่สร้าง array ของคู่ทั้งหมด; batch ถูก gather จาก window
+#   (WindowedArray / memmap) ตอนขอเท่านั้น -> หน่วยความจำคงที่ไม่ขึ้นกับจำนวนคู่
+import numpy as np
+
+# RUL ที่ถือว่าเครื่องยัง "ปกติ" (ค่า cap ที่นิยมใช้กับ C-MAPSS FD001)
+RUL_HEALTHY = 125.0
+
+# label vibration -> ช่วง RUL (lo, hi] ของ sensor window ที่จับคู่ได้
+CONDITION_STRATA = {
+    0: (RUL_HEALTHY, np.inf),   # Normal
+    1: (-np.inf, RUL_HEALTHY),  # Inner Race
+    2: (-np.inf, RUL_HEALTHY),  # Outer Race
+    3: (-np.inf, RUL_HEALTHY),  # Ball
+}
+
+
+def _cycled_permutation(index, n, rng):
+    """permutation ของ index ต่อกันจนยาว n (ถ้า rng เป็น None = เรียงตามเดิมวนซ้ำ)"""
+    if len(index) == 0:
+        return index[:0]
+    reps = -(-n // len(index))
+    if rng is None:
+        return np.tile(index, reps)[:n]
+    return np.concatenate([rng.permutation(index) for _ in range(reps)])[:n]
+
+
+class PairedSampler:
+    """ป้อน batch ของคู่ (vibration, sensor) แบบสุ่มใหม่ทุก epoch
+
+    vib / sensor: อะไรก็ได้ที่ index ด้วย array ได้ (np.ndarray, memmap, WindowedArray)
+    strata: None (สุ่มอิสระ) หรือ dict {label: (rul_lo, rul_hi)} เช่น CONDITION_STRATA
+    shuffle=False: ลำดับคงที่ (ใช้กับ validation)"""
+
+    def __init__(self, vib, vib_labels, sensor, sensor_rul, batch_size=32, strata=None,
+                 shuffle=True, seed=1234, extra=None):
+        self.vib = vib
+        self.vib_labels = np.asarray(vib_labels)
+        self.sensor = sensor
+        self.sensor_rul = np.asarray(sensor_rul, dtype=np.float32)
+        self.batch_size = batch_size
+        self.shuffle = shuffle
+        self.extra = extra or {}   # input เพิ่มที่ผูกกับ vibration (เช่น 'input_features') index เดียวกัน
+        self._rng = np.random.default_rng(seed)
+
+        if len(self.vib_labels) == 0 or len(self.sensor_rul) == 0:
+            raise ValueError("paired sampler needs at least one vibration and one sensor window")
+        self.groups = self._make_groups(strata)
+        self.pairs_per_epoch = sum(max(len(v), len(s)) for v, s in self.groups)
+
+    def _make_groups(self, strata):
+        vib_all = np.arange(len(self.vib_labels))
+        sensor_all = np.arange(len(self.sensor_rul))
+        if strata is None:
+            return [(vib_all, sensor_all)]
+        groups = []
+        for label, (lo, hi) in strata.items():
+            v = vib_all[self.vib_labels == label]
+            s = sensor_all[(self.sensor_rul > lo) & (self.sensor_rul <= hi)]
+            if len(v) and len(s):
+                groups.append((v, s))
+            elif len(v):
+                raise ValueError(f"no sensor windows with RUL in ({lo}, {hi}] for label {label}")
+        return groups
+
+    def __len__(self):
+        """จำนวน batch ต่อ epoch"""
+        return -(-self.pairs_per_epoch // self.batch_size)
+
+    def epoch_indices(self):
+        """(vib_index, sensor_index) ของทั้ง epoch: ยาว pairs_per_epoch (แค่ index ไม่ใช่ข้อมูล)"""
+        rng = self._rng if self.shuffle else None
+        vib_idx, sensor_idx = [], []
+        for v, s in self.groups:
+            n = max(len(v), len(s))
+            vib_idx.append(_cycled_permutation(v, n, rng))
+            sensor_idx.append(_cycled_permutation(s, n, rng))
+        vib_idx = np.concatenate(vib_idx)
+        sensor_idx = np.concatenate(sensor_idx)
+        if rng is not None and len(self.groups) > 1:
+            order = rng.permutation(len(vib_idx))   # ผสมกลุ่มใน batch เดียวกัน
+            vib_idx, sensor_idx = vib_idx[order], sensor_idx[order]
+        return vib_idx, sensor_idx
+
+    def batch_indices(self):
+        """1 epoch ของ (vib_index, sensor_index) ทีละ batch (แค่ index ให้ tf.data gather ขนานกันเองได้)"""
+        vib_idx, sensor_idx = self.epoch_indices()
+        for start in range(0, len(vib_idx), self.batch_size):
+            yield vib_idx[start:start + self.batch_size], sensor_idx[start:start + self.batch_size]
+
+    def gather(self, v, s):
+        """ดึง batch ของคู่จาก index -> ({'input_vibration', 'input_sensors', ...}, (label, rul))"""
+        inputs = {
+            'input_vibration': np.asarray(self.vib[v], dtype=np.float32),
+            'input_sensors': np.asarray(self.sensor[s], dtype=np.float32),
+        }
+        for name, values in self.extra.items():
+            inputs[name] = np.asarray(values[v], dtype=np.float32)
+        return inputs, (self.vib_labels[v], self.sensor_rul[s])
+
+    def __iter__(self):
+        """1 epoch: ({'input_vibration', 'input_sensors', ...}, (label, rul)) ทีละ batch"""
+        for v, s in self.batch_indices():
+            yield self.gather(v, s)
+
+    def repeat(self):
+        """วนไม่รู้จบ (สุ่มใหม่ทุก epoch) สำหรับ model.fit(..., steps_per_epoch=len(sampler))"""
+        while True:
+            yield from self
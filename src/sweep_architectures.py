@@ -0,0 +1,125 @@
+# ==========================================
+# 🔬 Architecture Sweep: params / MACs / INT8 size / accuracy / MAE
+# ==========================================
+# เทรนแต่ละแบบใน architectures.ARCHITECTURES ด้วย streaming pipeline (input_pipeline.py)
+# แล้วสรุปเป็นตาราง เพื่อเลือกโมเดลที่อยู่ใน latency / flash budget ของ FRDM-MCXN947
+# - ตัวที่มี prune > 0: เทรนปกติ -> magnitude pruning + fine-tune -> strip
+# - host_p50_ms: latency batch 1 บน CPU เครื่องนี้ (ใช้เทียบกันเอง, บน MCU ดู MACs เป็นหลัก)
+#
+# รันจาก root ของ repo:
+#   python src/sweep_architectures.py --no-train                # เฉพาะขนาด / MACs (เร็ว)
+#   python src/sweep_architectures.py --variants classic_v1,tiny --epochs 5
+import argparse
+import csv
+import os
+import time
+
+import numpy as np
+import tensorflow as tf
+
+import architectures as arch
+from hybrid_model import compile_hybrid_model
+from input_pipeline import load_params, make_dataset, steps_per_epoch
+
+DATA_FOLDER = 'data/raw'
+NASA_DATA_PATH = 'data/temp-current/train_FD001.txt'
+PARAMS_PATH = 'models/preprocess_params.json'
+OUTPUT_PATH = 'models/arch_sweep.csv'
+COLUMNS = ['variant', 'params', 'macs', 'int8_kb_est', 'int8_kb_zlib', 'sparsity', 'host_p50_ms',
+           'val_accuracy', 'val_rul_mae', 'train_s', 'status']
+
+
+def host_latency_ms(model, runs=50):
+    infer = tf.function(lambda v, s: model({'input_vibration': v, 'input_sensors': s}, training=False))
+    vib = np.zeros((1,) + tuple(model.inputs[0].shape[1:]), np.float32)
+    sensor = np.zeros((1,) + tuple(model.inputs[1].shape[1:]), np.float32)
+    for _ in range(5):
+        infer(vib, sensor)
+    times = []
+    for _ in range(runs):
+        t0 = time.perf_counter()
+        infer(vib, sensor)
+        times.append(time.perf_counter() - t0)
+    return float(np.median(times) * 1000)
+
+
+def train_variant(model, config, params, args):
+    train_ds = make_dataset(args.data_dir, args.nasa, params, 'train', args.batch_size)
+    val_ds = make_dataset(args.data_dir, args.nasa, params, 'val', args.batch_size)
+    steps = steps_per_epoch(train_ds)
+
+    compile_hybrid_model(model)
+    model.fit(train_ds.repeat(), steps_per_epoch=steps, epochs=args.epochs, verbose=args.verbose)
+
+    status = 'ok'
+    if config['prune'] > 0:
+        try:
+            pruned = arch.apply_pruning(model, config['prune'], end_step=steps * args.finetune_epochs)
+        except ImportError as e:
+            status = f'not pruned: {e}'  # รายงานผลของโมเดลก่อน prune แทน
+        else:
+            compile_hybrid_model(pruned, optimizer=tf.keras.optimizers.Adam(1e-4))
+            pruned.fit(train_ds.repeat(), steps_per_epoch=steps, epochs=args.finetune_epochs,
+                       callbacks=arch.pruning_callbacks(), verbose=args.verbose)
+            model = arch.strip_pruning(pruned)
+            compile_hybrid_model(model)
+
+    scores = model.evaluate(val_ds, return_dict=True, verbose=0)
+    return model, scores['diagnosis_output_accuracy'], scores['rul_output_mae'], status
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Sweep hybrid model architectures')
+    parser.add_argument('--variants', default='all', help="comma separated names or 'all'")
+    parser.add_argument('--epochs', type=int, default=5)
+    parser.add_argument('--finetune-epochs', type=int, default=2)
+    parser.add_argument('--batch-size', type=int, default=32)
+    parser.add_argument('--no-train', action='store_true', help='report size / MACs / latency only')
+    parser.add_argument('--data-dir', default=DATA_FOLDER)
+    parser.add_argument('--nasa', default=NASA_DATA_PATH)
+    parser.add_argument('--params', default=PARAMS_PATH)
+    parser.add_argument('--out', default=OUTPUT_PATH)
+    parser.add_argument('--verbose', type=int, default=0)
+    args = parser.parse_args()
+
+    names = list(arch.ARCHITECTURES) if args.variants == 'all' else args.variants.split(',')
+    params = None if args.no_train else load_params(args.params, args.data_dir, args.nasa)
+
+    rows = []
+    for name in names:
+        print(f"🔬 {name} ...")
+        tf.keras.backend.clear_session()
+        tf.random.set_seed(1234)
+        config = arch.make_config(name)
+        model = arch.build_model(config)
+        row = {'variant': name, 'status': 'ok'}
+
+        if not args.no_train:
+            t0 = time.perf_counter()
+            model, row['val_accuracy'], row['val_rul_mae'], row['status'] = train_variant(
+                model, config, params, args)
+            row['train_s'] = time.perf_counter() - t0
+
+        row.update(arch.summarize(model))
+        row['host_p50_ms'] = host_latency_ms(model)
+        rows.append(row)
+
+    os.makedirs(os.path.dirname(args.out) or '.', exist_ok=True)
+    with open(args.out, 'w', newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=COLUMNS)
+        writer.writeheader()
+        writer.writerows(rows)
+
+    print(f"\n{'variant':<22}{'params':>10}{'MACs':>12}{'INT8 KB':>9}{'zlib KB':>9}"
+          f"{'host ms':>9}{'acc':>7}{'MAE':>8}")
+    for r in rows:
+        acc = f"{r['val_accuracy']:.3f}" if 'val_accuracy' in r else '-'
+        mae = f"{r['val_rul_mae']:.1f}" if 'val_rul_mae' in r else '-'
+        print(f"{r['variant']:<22}{r['params']:>10,}{r['macs']:>12,}{r['int8_kb_est']:>9.1f}"
+              f"{r['int8_kb_zlib']:>9.1f}{r['host_p50_ms']:>9.2f}{acc:>7}{mae:>8}"
+              + ('' if r['status'] == 'ok' else f"  ⚠️ {r['status']}"))
+    print(f"💾 Results saved to {args.out}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,261 @@
+# ==========================================
+# 🏭 Training CLI: เทรนแบบ unattended + hyperparameter sweep หลาย process
+# ==========================================
+# แทนการรัน model.py (ค่าคงที่ epochs=20 / batch_size=32 / plt.show()) ทีละรอบ:
+# - อ่าน config (JSON) -> trial เดียว, grid search หรือ random search
+# - รันหลาย trial พร้อมกันด้วย process pool (spawn) แต่ละ worker จำกัด thread ของ TF / BLAS / tf.data
+#   และผูก CPU core ของตัวเอง (Linux) -> workers x threads ไม่เกินจำนวน core ไม่แย่ง core กัน
+# - ข้อมูลมาจาก data/cache (dataset_cache.py, memmap) ผ่าน input_pipeline.make_dataset
+#   สถิติ normalization คำนวณครั้งเดียวใน process หลักแล้วส่งให้ทุก worker
+# - EarlyStopping บน val_loss (restore best weights) แล้วบันทึกผลทุก trial ลง results.csv
+#
+# รันจาก root ของ repo:
+#   python src/train.py                                        # trial เดียวด้วยค่า default
+#   python src/train.py --config configs/sweep_example.json --workers 16
+#   python src/train.py --config configs/sweep_example.json --workers 8 --threads 8 --save-best
+import argparse
+import csv
+import itertools
+import json
+import math
+import multiprocessing as mp
+import os
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+# ไม่ import tensorflow / architectures / input_pipeline ที่ระดับ module:
+# worker (spawn) import ไฟล์นี้ซ้ำ และต้องตั้งจำนวน thread ก่อน TF ถูกโหลด (ดู init_worker)
+
+DATA_FOLDER = 'data/raw'
+NASA_DATA_PATH = 'data/temp-current/train_FD001.txt'
+PARAMS_PATH = 'models/preprocess_params.json'
+OUTPUT_DIR = 'models/sweeps'
+
+# ค่า default ของ 1 trial (key ที่อยู่ใน architectures.DEFAULT_CONFIG จะถูกส่งต่อให้ make_config)
+DEFAULT_TRIAL = {
+    'architecture': 'classic_v1',
+    'epochs': 20,
+    'batch_size': 32,
+    'learning_rate': 1e-3,
+    'patience': 3,
+    'pairing': 'independent',   # 'independent' | 'condition' (paired_sampler.CONDITION_STRATA)
+    'seed': 1234,
+}
+COLUMNS = ['trial', 'status', 'val_loss', 'val_accuracy', 'val_rul_mae', 'best_epoch', 'epochs_run',
+           'wall_s', 'params', 'pid', 'cores']
+THREAD_ENV = ('OMP_NUM_THREADS', 'OPENBLAS_NUM_THREADS', 'MKL_NUM_THREADS', 'TF_NUM_INTRAOP_THREADS')
+
+
+# --- 1. Config -> รายการ trial ---
+
+def load_config(path):
+    """{"base": {...}, "search": "grid" | "random", "space": {...}, "trials": N, "seed": S}"""
+    from architectures import DEFAULT_CONFIG
+
+    if path is None:
+        return {'base': {}, 'search': 'grid', 'space': {}}
+    with open(path) as f:
+        config = json.load(f)
+    config.setdefault('base', {})
+    config.setdefault('search', 'grid')
+    config.setdefault('space', {})
+    unknown = set(config['base']) | set(config['space'])
+    unknown -= set(DEFAULT_TRIAL) | set(DEFAULT_CONFIG)
+    if unknown:
+        raise ValueError(f"unknown hyperparameters in {path}: {sorted(unknown)}")
+    return config
+
+
+def _sample(spec, rng):
+    """list -> เลือก 1 ค่า, {"min", "max", "log"?, "int"?} -> สุ่มในช่วง"""
+    if isinstance(spec, list):
+        return rng.choice(spec)
+    lo, hi = spec['min'], spec['max']
+    if spec.get('log'):
+        value = math.exp(rng.uniform(math.log(lo), math.log(hi)))
+    else:
+        value = rng.uniform(lo, hi)
+    return int(round(value)) if spec.get('int') else value
+
+
+def expand_trials(config):
+    base = dict(DEFAULT_TRIAL, **config['base'])
+    space = config['space']
+    if config['search'] == 'random':
+        rng = random.Random(config.get('seed', 1234))
+        combos = [{k: _sample(v, rng) for k, v in space.items()} for _ in range(config.get('trials', 10))]
+    elif config['search'] == 'grid':
+        for key, values in space.items():
+            if not isinstance(values, list):
+                raise ValueError(f"grid search needs a list of values for '{key}'")
+        keys = list(space)
+        combos = [dict(zip(keys, values)) for values in itertools.product(*(space[k] for k in keys))]
+    else:
+        raise ValueError(f"unknown search '{config['search']}' (grid | random)")
+    return [dict(base, **combo) for combo in combos]
+
+
+# --- 2. Worker (แต่ละ process) ---
+
+def init_worker(threads, core_queue=None):
+    """เรียกก่อน import tensorflow ใน worker: จำกัด thread และผูก core"""
+    for var in THREAD_ENV:
+        os.environ[var] = str(threads)
+    os.environ.setdefault('TF_CPP_MIN_LOG_LEVEL', '2')
+    if core_queue is not None and hasattr(os, 'sched_setaffinity'):
+        os.sched_setaffinity(0, core_queue.get())
+
+    import tensorflow as tf
+    tf.config.threading.set_intra_op_parallelism_threads(threads)
+    tf.config.threading.set_inter_op_parallelism_threads(1)
+
+
+def run_trial(trial_id, trial, params, data_dir, nasa_path, threads, save_path=None, verbose=0):
+    import numpy as np
+    import tensorflow as tf
+
+    from architectures import DEFAULT_CONFIG, build_model, make_config
+    from hybrid_model import compile_hybrid_model
+    from input_pipeline import make_dataset, steps_per_epoch
+    from paired_sampler import CONDITION_STRATA
+
+    t0 = time.perf_counter()
+    row = {'trial': trial_id, 'params': json.dumps(trial, sort_keys=True), 'pid': os.getpid(),
+           'cores': len(os.sched_getaffinity(0)) if hasattr(os, 'sched_getaffinity') else ''}
+    try:
+        tf.keras.backend.clear_session()
+        np.random.seed(trial['seed'])
+        tf.random.set_seed(trial['seed'])
+
+        options = tf.data.Options()
+        options.threading.private_threadpool_size = threads
+        batch_size = trial['batch_size']
+        strata = CONDITION_STRATA if trial['pairing'] == 'condition' else None
+        train_ds = make_dataset(data_dir, nasa_path, params, 'train', batch_size,
+                                seed=trial['seed'], strata=strata).with_options(options)
+        val_ds = make_dataset(data_dir, nasa_path, params, 'val', batch_size,
+                              strata=strata).with_options(options)
+
+        overrides = {k: v for k, v in trial.items() if k in DEFAULT_CONFIG}
+        model = build_model(make_config(trial['architecture'], **overrides))
+        compile_hybrid_model(model, optimizer=tf.keras.optimizers.Adam(trial['learning_rate']))
+
+        early = tf.keras.callbacks.EarlyStopping(monitor='val_loss', patience=trial['patience'],
+                                                 restore_best_weights=True)
+        history = model.fit(train_ds.repeat(), steps_per_epoch=steps_per_epoch(train_ds),
+                            validation_data=val_ds, epochs=trial['epochs'], callbacks=[early],
+                            verbose=verbose)
+
+        val_loss = history.history['val_loss']
+        best = int(np.argmin(val_loss))
+        row.update({
+            'status': 'ok',
+            'val_loss': float(val_loss[best]),
+            'val_accuracy': float(history.history['val_diagnosis_output_accuracy'][best]),
+            'val_rul_mae': float(history.history['val_rul_output_mae'][best]),
+            'best_epoch': best + 1,
+            'epochs_run': len(val_loss),
+        })
+        if save_path:
+            model.save(save_path)
+    except Exception as e:  # trial เดียวพังไม่ควรหยุดทั้ง sweep
+        row['status'] = f'failed: {type(e).__name__}: {e}'
+    row['wall_s'] = round(time.perf_counter() - t0, 1)
+    return row
+
+
+# --- 3. Main ---
+
+def main():
+    parser = argparse.ArgumentParser(description='Train the hybrid model / run a hyperparameter sweep')
+    parser.add_argument('--config', help='JSON sweep config (ดู configs/sweep_example.json)')
+    parser.add_argument('--name', help='ชื่อ sweep (default: ชื่อไฟล์ config หรือ single)')
+    parser.add_argument('--workers', type=int, default=1)
+    parser.add_argument('--threads', type=int, default=0, help='threads ต่อ worker (0 = cores / workers)')
+    parser.add_argument('--data-dir', default=DATA_FOLDER)
+    parser.add_argument('--nasa', default=NASA_DATA_PATH)
+    parser.add_argument('--params', default=PARAMS_PATH)
+    parser.add_argument('--out-dir', default=OUTPUT_DIR)
+    parser.add_argument('--save-best', action='store_true', help='บันทึกโมเดลของทุก trial แล้วเก็บตัวที่ดีที่สุด')
+    parser.add_argument('--dry-run', action='store_true', help='แสดงรายการ trial แล้วออก')
+    parser.add_argument('--verbose', type=int, default=0)
+    args = parser.parse_args()
+
+    config = load_config(args.config)
+    trials = expand_trials(config)
+    name = args.name or (os.path.splitext(os.path.basename(args.config))[0] if args.config else 'single')
+    out_dir = os.path.join(args.out_dir, name)
+
+    cores = sorted(os.sched_getaffinity(0)) if hasattr(os, 'sched_getaffinity') else list(range(os.cpu_count()))
+    workers = max(1, min(args.workers, len(trials)))
+    threads = args.threads or max(1, len(cores) // workers)
+    print(f"🏭 Sweep '{name}': {len(trials)} trials ({config['search']}), "
+          f"{workers} workers x {threads} threads on {len(cores)} cores")
+    if args.dry_run:
+        for i, trial in enumerate(trials):
+            print(f"   #{i:03d} {json.dumps(trial, sort_keys=True)}")
+        return
+
+    print("\n📏 Loading normalization statistics...")
+    from input_pipeline import load_params
+    params = load_params(args.params, args.data_dir, args.nasa)
+    os.makedirs(out_dir, exist_ok=True)
+
+    def save_path(i):
+        return os.path.join(out_dir, f'trial_{i:03d}.keras') if args.save_best else None
+
+    rows = []
+    t0 = time.perf_counter()
+    if workers == 1:
+        init_worker(threads)
+        for i, trial in enumerate(trials):
+            rows.append(run_trial(i, trial, params, args.data_dir, args.nasa, threads, save_path(i), args.verbose))
+            _print_row(rows[-1], len(trials))
+    else:
+        # spawn: TF ไม่ปลอดภัยกับ fork / แต่ละ worker หยิบ core ของตัวเองจาก queue
+        ctx = mp.get_context('spawn')
+        core_queue = ctx.Manager().Queue()
+        for w in range(workers):
+            core_queue.put(set(cores[w * threads:(w + 1) * threads]) or set(cores))
+        with ProcessPoolExecutor(workers, mp_context=ctx, initializer=init_worker,
+                                 initargs=(threads, core_queue)) as pool:
+            futures = [pool.submit(run_trial, i, trial, params, args.data_dir, args.nasa, threads,
+                                   save_path(i)) for i, trial in enumerate(trials)]
+            for future in as_completed(futures):
+                rows.append(future.result())
+                _print_row(rows[-1], len(trials))
+    wall = time.perf_counter() - t0
+
+    rows.sort(key=lambda r: r.get('val_loss', math.inf))
+    results_path = os.path.join(out_dir, 'results.csv')
+    with open(results_path, 'w', newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=COLUMNS)
+        writer.writeheader()
+        writer.writerows(rows)
+
+    print(f"\n{'trial':>5}{'val_loss':>10}{'acc':>7}{'MAE':>8}{'epochs':>8}{'wall s':>8}  params")
+    for r in rows:
+        if r['status'] != 'ok':
+            print(f"{r['trial']:>5}  ❌ {r['status']}")
+            continue
+        print(f"{r['trial']:>5}{r['val_loss']:>10.4f}{r['val_accuracy']:>7.3f}{r['val_rul_mae']:>8.2f}"
+              f"{r['best_epoch']:>4}/{r['epochs_run']:<3}{r['wall_s']:>8.1f}  {r['params']}")
+    print(f"💾 Results saved to {results_path} (total {wall:.1f}s)")
+
+    if args.save_best and rows and rows[0]['status'] == 'ok':
+        best = os.path.join(out_dir, 'best.keras')
+        os.replace(save_path(rows[0]['trial']), best)
+        print(f"🏆 Best model (trial {rows[0]['trial']}) saved to {best}")
+
+
+def _print_row(row, total):
+    if row['status'] == 'ok':
+        print(f"   ✅ trial {row['trial']}/{total}: val_loss={row['val_loss']:.4f} "
+              f"acc={row['val_accuracy']:.3f} mae={row['val_rul_mae']:.2f} ({row['wall_s']}s)")
+    else:
+        print(f"   ❌ trial {row['trial']}/{total}: {row['status']}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,63 @@
+print("Start Processing (Streaming Pipeline)...")
+
+# ==========================================
+# 🚰 TRAINING ด้วย tf.data แบบ Streaming
+# ==========================================
+# ทำงานเหมือน model.py แต่ไม่โหลดข้อมูลทั้งหมดเข้า RAM:
+# window ถูกอ่าน/normalise/shuffle ระหว่างเทรน (ดู input_pipeline.py)
+# รันจาก root ของ repo: python src/train_streaming.py
+import json
+import os
+
+import numpy as np
+import tensorflow as tf
+
+from hybrid_model import build_hybrid_model, compile_hybrid_model
+from input_pipeline import StallTimer, compute_normalization, make_dataset, steps_per_epoch
+
+np.random.seed(1234)
+tf.random.set_seed(1234)
+
+DATA_FOLDER = 'data/raw'
+script_dir = os.path.dirname(os.path.abspath(__file__))
+NASA_DATA_PATH = os.path.join(script_dir, '..', 'data', 'temp-current', 'train_FD001.txt')
+EPOCHS = 20
+BATCH_SIZE = 32
+
+# --- 1. สถิติสำหรับ Normalization (อ่านข้อมูล 1 รอบ ไม่เก็บ window) ---
+print("\n[STEP 1/3] Computing normalization statistics...")
+params = compute_normalization(DATA_FOLDER, NASA_DATA_PATH)
+print(f"   ✅ Vibration mean={params['vib_mean']:.4f} std={params['vib_std']:.4f} "
+      f"({params['num_vibration_windows']} windows)")
+print(f"   ✅ Sensor min={params['sensor_min']} max={params['sensor_max']} "
+      f"({params['num_sensor_windows']} windows)")
+
+# --- 2. Pipeline ---
+print("\n[STEP 2/3] Building tf.data pipelines...")
+train_ds = make_dataset(DATA_FOLDER, NASA_DATA_PATH, params, 'train', BATCH_SIZE)
+val_ds = make_dataset(DATA_FOLDER, NASA_DATA_PATH, params, 'val', BATCH_SIZE)
+stall_timer = StallTimer(train_ds)
+
+# --- 3. Training ---
+print("\n[STEP 3/3] Training...")
+model = build_hybrid_model()
+compile_hybrid_model(model)
+history = model.fit(
+    stall_timer.stream(),
+    steps_per_epoch=steps_per_epoch(train_ds),
+    validation_data=val_ds,
+    epochs=EPOCHS,
+    callbacks=[stall_timer],
+    verbose=1
+)
+
+if not os.path.exists('models'):
+    os.makedirs('models')
+model.save('models/hybrid_model_v1.h5')
+with open('models/preprocess_params.json', 'w') as f:
+    json.dump(params, f, indent=2)
+print("💾 Model saved to 'models/hybrid_model_v1.h5' (+ preprocess_params.json)")
+
+stalls = history.history.get('input_stall_pct', [])
+if stalls:
+    print(f"⏳ Input stall per epoch (%): {[round(s, 1) for s in stalls]}")
@@ -0,0 +1,193 @@
+# ==========================================
+# ✂️ Vectorized Sliding-Window Segmentation
+# ==========================================
+# แทน create_segments / create_sensor_segments แบบ for-loop ใน model.py
+# แนวคิด: window ทุกอันชี้เข้า "array ฐาน" ก้อนเดียว (เก็บแค่ตำแหน่งเริ่ม starts)
+# -> ไม่ต้อง copy ข้อมูลที่ซ้อนทับกัน (window 1024 / step 512 = ข้อมูลซ้ำ 2 เท่า,
+#    sensor window 50 / step 1 = ซ้ำ 50 เท่า) และ array ฐานเป็น np.memmap ได้
+import os
+import tempfile
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+
+def window_starts(length, time_steps, step):
+    """ตำแหน่งเริ่มของแต่ละ window (ตรงกับ range(0, length - time_steps, step) ของโค้ดเดิม)"""
+    return np.arange(0, max(length - time_steps, 0), step, dtype=np.int64)
+
+
+def sliding_windows(data, time_steps, step=1):
+    """view (n, time_steps, ...) ของ data แบบ zero-copy ด้วย sliding_window_view"""
+    data = np.asarray(data)
+    n = len(window_starts(len(data), time_steps, step))
+    if n == 0:
+        return np.empty((0, time_steps) + data.shape[1:], dtype=data.dtype)
+    view = sliding_window_view(data, time_steps, axis=0)   # (L-T+1, ..., T)
+    view = np.moveaxis(view, -1, 1)                          # (L-T+1, T, ...)
+    return view[:(n - 1) * step + 1:step]
+
+
+class WindowedArray:
+    """ชุด window ที่อ้างอิง array ฐานก้อนเดียว ใช้เหมือน array (len / index / np.asarray)"""
+
+    def __init__(self, base, starts, time_steps):
+        self.base = base
+        self.starts = np.asarray(starts, dtype=np.int64)
+        self.time_steps = time_steps
+        # view (L-T+1, T, ...) ของทุกตำแหน่งใน array ฐาน (ไม่ copy) ใช้ gather ด้วย starts
+        if len(base) >= time_steps:
+            self._all = np.moveaxis(sliding_window_view(base, time_steps, axis=0), -1, 1)
+        else:
+            self._all = np.empty((0, time_steps) + base.shape[1:], dtype=base.dtype)
+
+    @property
+    def shape(self):
+        return (len(self.starts), self.time_steps) + self.base.shape[1:]
+
+    @property
+    def dtype(self):
+        return self.base.dtype
+
+    @property
+    def nbytes_materialized(self):
+        return int(np.prod(self.shape)) * self.base.itemsize
+
+    def __len__(self):
+        return len(self.starts)
+
+    def __getitem__(self, idx):
+        """int -> view ของ window เดียว, slice/array -> gather เป็น array ใหม่ (ใช้ทำ batch)"""
+        if np.isscalar(idx):
+            s = int(self.starts[idx])
+            return self.base[s:s + self.time_steps]
+        return self._all[self.starts[idx]]
+
+    def __array__(self, dtype=None, copy=None):
+        out = self[np.arange(len(self))]
+        return out if dtype is None else out.astype(dtype, copy=False)
+
+    def strided_view(self):
+        """view (n, T, ...) แบบ zero-copy เมื่อ starts ห่างเท่ากันทั้งหมด (recording เดียว)"""
+        if len(self.starts) < 2:
+            return np.asarray(self)
+        steps = np.diff(self.starts)
+        if not np.all(steps == steps[0]):
+            raise ValueError("starts are not evenly spaced; use indexing to gather windows")
+        first = int(self.starts[0])
+        return self._all[first:first + (len(self.starts) - 1) * int(steps[0]) + 1:int(steps[0])]
+
+    def coverage(self):
+        """จำนวน window ที่ครอบแต่ละ sample ของ array ฐาน"""
+        diff = np.zeros(len(self.base) + 1, dtype=np.int64)
+        np.add.at(diff, self.starts, 1)
+        np.add.at(diff, self.starts + self.time_steps, -1)
+        return np.cumsum(diff[:-1])
+
+    def window_moments(self):
+        """(จำนวนค่า, ผลรวม, ผลรวมกำลังสอง) ของทุกค่าในทุก window ใช้รวมสถิติข้ามหลายชุดได้"""
+        weights = self.coverage().astype(np.float64)
+        base = np.asarray(self.base, dtype=np.float64).reshape(len(self.base), -1)
+        count = float(weights.sum() * base.shape[1])
+        total = float((weights[:, None] * base).sum())
+        sumsq = float((weights[:, None] * base * base).sum())
+        return count, total, sumsq
+
+    def window_stats(self):
+        """mean / std ของทุกค่าในทุก window (เท่ากับ x.mean(), x.std() ของ array ที่ materialize แล้ว)
+        คำนวณจาก array ฐานถ่วงด้วย coverage จึงไม่ต้องสร้าง window จริง"""
+        weights = self.coverage().astype(np.float64)
+        base = np.asarray(self.base, dtype=np.float64).reshape(len(self.base), -1)
+        total = weights.sum() * base.shape[1]
+        mean = float((weights[:, None] * base).sum() / total)
+        var = float((weights[:, None] * (base - mean) ** 2).sum() / total)
+        return mean, float(np.sqrt(var))
+
+
+def _memmap_base(path, data_list, offsets, total):
+    """array ฐานแบบ read-only memmap: เปิดไฟล์เดิมถ้า shape/dtype ตรง ไม่งั้นเขียนใหม่ทีละ recording"""
+    first = np.asarray(data_list[0])
+    shape = (total,) + first.shape[1:]
+    if os.path.exists(path):
+        base = np.load(path, mmap_mode="r")
+        if base.shape == shape and base.dtype == first.dtype:
+            return base
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(path)), suffix=".npy")
+    os.close(fd)
+    try:
+        out = np.lib.format.open_memmap(tmp, mode="w+", dtype=first.dtype, shape=shape)
+        for offset, data in zip(offsets, data_list):
+            out[offset:offset + len(data)] = data
+        out.flush()
+        del out
+        os.replace(tmp, path)
+    except BaseException:
+        os.remove(tmp)
+        raise
+    return np.load(path, mmap_mode="r")
+
+
+def segment_recordings(data_list, label_list, time_steps, step, base_path=None):
+    """ตัด window จากหลาย recording (CWRU) -> (WindowedArray, labels)
+    base_path: ถ้าระบุ array ฐานจะเป็นไฟล์ .npy เปิดแบบ memmap (ไม่กิน RAM)
+    ถ้ามีไฟล์ขนาดตรงกันอยู่แล้วจะเปิดใช้เลย ไม่งั้นเขียนไฟล์ชั่วคราวแล้ว os.replace (หลาย process ใช้ร่วมกันได้)"""
+    if len(data_list) == 0:
+        return WindowedArray(np.empty((0, 1)), [], time_steps), np.array([])
+    lengths = [len(d) for d in data_list]
+    offsets = np.concatenate([[0], np.cumsum(lengths)[:-1]]).astype(np.int64)
+    starts, labels = [], []
+    for offset, length, label in zip(offsets, lengths, label_list):
+        s = window_starts(length, time_steps, step)
+        starts.append(s + offset)
+        labels.append(np.full(len(s), label))
+
+    if len(data_list) == 1 and base_path is None:
+        base = np.asarray(data_list[0])
+    elif base_path is not None:
+        base = _memmap_base(base_path, data_list, offsets, int(sum(lengths)))
+    else:
+        first = np.asarray(data_list[0])
+        base = np.empty((int(sum(lengths)),) + first.shape[1:], dtype=first.dtype)
+        for offset, data in zip(offsets, data_list):
+            base[offset:offset + len(data)] = data
+
+    return (WindowedArray(base, np.concatenate(starts) if starts else [], time_steps),
+            np.concatenate(labels) if labels else np.array([]))
+
+
+def segment_units(df, time_steps, features, label_col="RUL", unit_col="unit_id"):
+    """ตัด window ของ sensor แยกตามเครื่อง (NASA) ด้วยการเรียงข้อมูลครั้งเดียว
+    -> (WindowedArray, labels) โดย label ของ window i คือค่าที่แถว i + time_steps (เหมือนโค้ดเดิม)"""
+    units = df[unit_col].to_numpy()
+    # ลำดับเครื่องตามที่พบครั้งแรก (เหมือน df['unit_id'].unique())
+    _, first_idx, codes = np.unique(units, return_index=True, return_inverse=True)
+    rank = np.argsort(np.argsort(first_idx))[codes]
+    if np.all(rank[1:] >= rank[:-1]):
+        order = None  # ข้อมูลเรียงเป็นกลุ่มอยู่แล้ว (ปกติของไฟล์ NASA) ไม่ต้อง copy
+        sorted_rank = rank
+    else:
+        order = np.argsort(rank, kind="stable")
+        sorted_rank = rank[order]
+
+    values = df[features].to_numpy()
+    label_values = df[label_col].to_numpy()
+    if order is not None:
+        values, label_values = values[order], label_values[order]
+
+    counts = np.bincount(sorted_rank)
+    unit_offsets = np.concatenate([[0], np.cumsum(counts)[:-1]])
+    starts = [window_starts(c, time_steps, 1) + o for o, c in zip(unit_offsets, counts)]
+    starts = np.concatenate(starts) if starts else np.array([], dtype=np.int64)
+    return WindowedArray(values, starts, time_steps), label_values[starts + time_steps]
+
+
+# --- Drop-in replacements (คืน numpy array เหมือนฟังก์ชันเดิมใน model.py) ---
+
+def create_segments(data_list, label_list, time_steps, step):
+    windows, labels = segment_recordings(data_list, label_list, time_steps, step)
+    return np.asarray(windows), labels
+
+
+def create_sensor_segments(df, time_steps, features, label_col='RUL'):
+    windows, labels = segment_units(df, time_steps, features, label_col)
+    return np.asarray(windows), labels
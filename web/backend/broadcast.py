@@ -0,0 +1,226 @@
+import asyncio
+import json
+import time
+from collections import deque
+from typing import Dict
+
+from fastapi import WebSocket
+
+from . import metrics
+from .tiers import TIER_RAW, device_of
+from .ws_encoding import ENCODING_JSON, make_encoder
+
+# --- WebSocket Fan-out (MQTT -> Frontend) ---
+# แต่ละ Dashboard มี queue และ sender task ของตัวเอง
+# ทำให้ browser ที่ช้า 1 ตัวไม่ไปถ่วงการส่งให้ตัวอื่น
+# และ encode JSON แค่ครั้งเดียวต่อข้อความ ไม่ใช่ครั้งละ client
+
+POLICY_DROP_OLDEST = "drop_oldest"  # queue เต็ม -> ทิ้งข้อความเก่าสุด
+POLICY_LATEST = "latest"            # เก็บไว้แค่ข้อความล่าสุด (เหมาะกับจอที่โชว์ค่าปัจจุบันอย่างเดียว)
+
+_KEEP = object()  # ใช้กับ subscribe(): ไม่เปลี่ยนค่าเดิม
+
+# send_text ช้า = browser/เครือข่ายฝั่ง client ช้า / fan-out ช้า = event loop ทำงานหนัก (GET /metrics)
+SEND_SECONDS = metrics.Histogram("ws_send_seconds", "WebSocket send_text latency per client message")
+FANOUT_SECONDS = metrics.Histogram("ws_fanout_seconds", "Time to queue one sample for all WebSocket clients")
+
+
+class ClientChannel:
+    """Queue + sender task ของ WebSocket 1 ตัว"""
+
+    def __init__(self, websocket: WebSocket, max_queue=100, policy=POLICY_DROP_OLDEST,
+                 send_timeout=5.0, tier=TIER_RAW, devices=None, first=None, encoding=ENCODING_JSON):
+        self.websocket = websocket
+        self.encoding = encoding  # รูปแบบ frame ของ sample ดิบ (ws_encoding.py) / aggregate กับ snapshot เป็น JSON เสมอ
+        self.needs_keyframe = True
+        self.first = first      # ข้อความที่ต้องส่งก่อนทุกอย่าง (snapshot) ไม่อยู่ใน queue จึงไม่ถูกดันทิ้ง
+        self.tier = tier
+        self.devices = devices  # None = ทุกเครื่อง
+        self.policy = policy
+        self.send_timeout = send_timeout
+        self.queue = deque(maxlen=1 if policy == POLICY_LATEST else max_queue)
+        self.dropped = 0
+        self.sent = 0
+        client = getattr(websocket, "client", None)
+        self.name = f"{client[0]}:{client[1]}" if client else str(id(websocket))
+        self._ready = asyncio.Event()
+        self.task = None
+
+    @property
+    def framed(self):
+        """รับ sample ดิบเป็น frame ต่อ tick (columnar / binary) แทน JSON ทีละข้อความ"""
+        return self.encoding != ENCODING_JSON and self.tier == TIER_RAW
+
+    def push(self, text):
+        """ใส่ข้อความเข้า queue (ไม่ block) ถ้าเต็ม deque จะดันตัวเก่าสุดทิ้งเอง
+        client แบบ framed: frame เป็น delta ต่อจากตัวก่อนหน้า ทิ้งตัวไหนไปตัวที่ตามมาก็ถอดผิดหมด
+        -> ล้าง queue (รวม frame นี้) แล้วขอ keyframe ใน tick ถัดไป"""
+        if len(self.queue) == self.queue.maxlen:
+            if self.framed:
+                self.dropped += len(self.queue) + 1
+                self.queue.clear()
+                self.needs_keyframe = True
+                return
+            self.dropped += 1
+        self.queue.append(text)
+        self._ready.set()
+
+    def wants(self, device_id):
+        return self.devices is None or device_id in self.devices
+
+    async def run(self, on_dead):
+        try:
+            if self.first is not None:
+                await asyncio.wait_for(self.websocket.send_text(self.first), self.send_timeout)
+                self.first = None
+            while True:
+                await self._ready.wait()
+                self._ready.clear()
+                while self.queue:
+                    text = self.queue.popleft()
+                    start = time.perf_counter()
+                    if isinstance(text, bytes):
+                        await asyncio.wait_for(self.websocket.send_bytes(text), self.send_timeout)
+                    else:
+                        await asyncio.wait_for(self.websocket.send_text(text), self.send_timeout)
+                    SEND_SECONDS.observe(time.perf_counter() - start)
+                    self.sent += 1
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            # ส่งไม่ได้ (socket ปิด / ช้าเกิน send_timeout) -> เอาออกจากรายชื่อ
+            on_dead(self.websocket)
+
+
+class ConnectionManager:
+    def __init__(self, max_queue=100, policy=POLICY_DROP_OLDEST, send_timeout=5.0):
+        self.channels: Dict[WebSocket, ClientChannel] = {}
+        self.max_queue = max_queue
+        self.policy = policy
+        self.send_timeout = send_timeout
+        self.evicted = 0
+        # sample ที่รอส่งเป็น frame ใน tick ถัดไป (เก็บเฉพาะตอนที่มี client แบบ framed)
+        self._pending = []
+        self._framed = False
+        self._encoders = {}   # (encoding, devices) -> FrameEncoder ของกลุ่มนั้น
+        self.frames = 0
+
+    @property
+    def active_connections(self):
+        return list(self.channels)
+
+    async def connect(self, websocket: WebSocket, policy=None, tier=TIER_RAW, devices=None, snapshot=None,
+                      encoding=ENCODING_JSON):
+        """snapshot: callable(devices) -> text ส่งเป็นข้อความแรก (สร้างหลัง accept จึงไม่ตกหล่นข้อความสด)"""
+        await websocket.accept()
+        first = snapshot(devices) if snapshot is not None else None
+        channel = ClientChannel(websocket, self.max_queue, policy or self.policy, self.send_timeout,
+                                tier, devices, first, encoding)
+        channel.task = asyncio.create_task(channel.run(self._evict))
+        self.channels[websocket] = channel
+        self._update_framed()
+        return channel
+
+    def disconnect(self, websocket: WebSocket):
+        channel = self.channels.pop(websocket, None)
+        if channel is not None and channel.task is not None:
+            channel.task.cancel()
+        self._update_framed()
+
+    def _evict(self, websocket: WebSocket):
+        if websocket in self.channels:
+            self.evicted += 1
+            print("💻 Evicted dead/slow Frontend connection")
+        self.disconnect(websocket)
+
+    def publish_text(self, text: str):
+        """กระจายข้อความที่ encode แล้วให้ทุก client (ต้องเรียกจาก event loop thread)"""
+        for channel in self.channels.values():
+            channel.push(text)
+
+    def publish(self, data: dict):
+        self.publish_text(json.dumps(data))
+
+    def subscribe(self, websocket: WebSocket, tier=_KEEP, devices=_KEEP, encoding=_KEEP):
+        """เปลี่ยน tier / รายชื่อเครื่อง / encoding ที่ client ต้องการ ระหว่างที่ยังต่ออยู่"""
+        channel = self.channels.get(websocket)
+        if channel is None:
+            return
+        if tier is not _KEEP:
+            channel.tier = tier
+        if devices is not _KEEP:
+            channel.devices = devices
+        if encoding is not _KEEP:
+            channel.encoding = encoding
+        channel.needs_keyframe = True   # กลุ่มใหม่ -> ต้องได้ค่าครบก่อนรับ delta
+        self._update_framed()
+
+    def _update_framed(self):
+        self._framed = any(c.framed for c in self.channels.values())
+        if not self._framed:
+            self._pending.clear()
+
+    def publish_sample(self, device_id, text: str, warning=False, data=None):
+        """ส่ง sample ดิบให้ client tier raw (ถ้าเป็น Warning ส่งให้ทุก tier)
+        client แบบ framed จะได้ sample นี้ใน frame ของ tick ถัดไป (flush_frames) แทน"""
+        start = time.perf_counter()
+        for channel in self.channels.values():
+            if (warning or channel.tier == TIER_RAW) and channel.wants(device_id) and not channel.framed:
+                channel.push(text)
+        if self._framed and data is not None:
+            self._pending.append(data)
+        FANOUT_SECONDS.observe(time.perf_counter() - start)
+
+    def flush_frames(self):
+        """เรียกทุก tick: encode sample ที่ค้างเป็น 1 frame ต่อกลุ่ม (encoding + devices) แล้วส่งให้ทุก client ในกลุ่ม"""
+        if not self._pending:
+            return
+        samples, self._pending = self._pending, []
+        groups = {}
+        for channel in self.channels.values():
+            if channel.framed:
+                key = (channel.encoding, frozenset(channel.devices) if channel.devices is not None else None)
+                groups.setdefault(key, []).append(channel)
+        for key in list(self._encoders):
+            if key not in groups:
+                del self._encoders[key]   # ไม่มี client ในกลุ่มนี้แล้ว
+        for (encoding, devices), channels in groups.items():
+            rows = samples if devices is None else [d for d in samples if device_of(d) in devices]
+            if not rows:
+                continue
+            encoder = self._encoders.get((encoding, devices))
+            if encoder is None:
+                encoder = self._encoders[(encoding, devices)] = make_encoder(encoding)
+            if any(c.needs_keyframe for c in channels):
+                encoder.request_keyframe()
+                for c in channels:
+                    c.needs_keyframe = False
+            frame = encoder.encode(rows)
+            self.frames += 1
+            for channel in channels:
+                channel.push(frame)
+
+    def publish_aggregate(self, tier, device_id, text: str):
+        for channel in self.channels.values():
+            if channel.tier == tier and channel.wants(device_id):
+                channel.push(text)
+
+    def has_subscribers(self, tier):
+        return any(c.tier == tier for c in self.channels.values())
+
+    async def broadcast(self, data: dict):
+        self.publish(data)
+
+    def queue_depths(self):
+        """{client: จำนวนข้อความค้าง} -> client ไหนค้างเยอะคือ browser ที่ช้า"""
+        return {c.name: len(c.queue) for c in self.channels.values()}
+
+    def stats(self):
+        return {
+            "connections": len(self.channels),
+            "evicted": self.evicted,
+            "queued": sum(len(c.queue) for c in self.channels.values()),
+            "dropped": sum(c.dropped for c in self.channels.values()),
+            "framed_clients": sum(c.framed for c in self.channels.values()),
+            "frames": self.frames,
+        }
@@ -1,63 +1,361 @@
+import os
+import queue
 import sqlite3
-from datetime import datetime
+import threading
+import time
+from datetime import datetime, timezone
 
-# ตั้งค่าชื่อไฟล์ Database
+from . import metrics
+from . import rollups
+
+# ตั้งค่าชื่อไฟล์ Database (ไฟล์หลัก / ตาราง sensor_summary รูปแบบเดิม ใช้ตอน migrate)
 DB_NAME = "maintenance_logs.db"
 
+# [UPDATED] ข้อมูล sensor แยกเก็บเป็นไฟล์ละ 1 วัน (UTC) ในโฟลเดอร์นี้
+# เช่น maintenance_data/sensor_20261018.db -> การลบข้อมูลเก่า = ลบไฟล์ทิ้งทั้งไฟล์ (O(1))
+SHARD_DIR = "maintenance_data"
+SHARD_PREFIX = "sensor_"
+RETENTION_DAYS = 7
+DEFAULT_DEVICE_ID = "compressor-01"
+
+# เวลาเขียน DB (รวม commit/fsync) -> ดูว่าช้าเพราะ SQLite หรือไม่ (GET /metrics)
+INSERT_SECONDS = metrics.Histogram("sqlite_insert_seconds", "insert_data_sqlite latency (one row, one commit)")
+FLUSH_SECONDS = metrics.Histogram("sqlite_flush_seconds", "SQLiteBatchWriter flush latency (shard insert + rollups + commit)")
+FLUSH_ROWS = metrics.Counter("sqlite_rows_written_total", "Rows written by SQLiteBatchWriter")
+
+SHARD_SCHEMA = '''
+    CREATE TABLE IF NOT EXISTS sensor_summary (
+        ts INTEGER NOT NULL,          -- epoch milliseconds (UTC)
+        device TEXT NOT NULL,
+        ax REAL, ay REAL, az REAL, 
+        temp REAL, amp REAL, 
+        rul_predict REAL,
+        status INTEGER
+    );
+    CREATE INDEX IF NOT EXISTS idx_sensor_device_ts ON sensor_summary (device, ts);
+''' + "".join(rollups.schema(res) for res in rollups.SHARD_RESOLUTIONS)
+
+INSERT_SQL = '''
+    INSERT INTO sensor_summary (ts, device, ax, ay, az, temp, amp, rul_predict, status)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+'''
+
 # --- ส่วนจัดการ Database (SQLite) ---
 
-def init_db():
-    """สร้างตารางใน Database ถ้ายังไม่มี"""
-    conn = sqlite3.connect(DB_NAME)
-    cursor = conn.cursor()
-    
-    # [UPDATED] 
-    # 1. เปลี่ยน timestamp เป็น TEXT (เพื่อรับค่า string จากบอร์ด/mock)
-    # 2. เพิ่มคอลัมน์ status (INTEGER)
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS sensor_summary (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            timestamp TEXT, 
-            ax REAL, ay REAL, az REAL, 
-            temp REAL, amp REAL, 
-            rul_predict REAL,
-            status INTEGER
-        )
-    ''')
-    conn.commit()
-    conn.close()
+def _connect(db_name):
+    """เปิด connection พร้อมตั้งค่า WAL (อ่าน/เขียนพร้อมกันได้ และ fsync น้อยลง)"""
+    conn = sqlite3.connect(db_name, check_same_thread=False)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    return conn
 
-def insert_data_sqlite(data):
-    """บันทึกข้อมูลลง SQLite"""
-    conn = sqlite3.connect(DB_NAME)
-    cursor = conn.cursor()
-    
-    # [UPDATED] รับค่า timestamp และ status เข้ามาบันทึกตรงๆ
-    cursor.execute('''
-        INSERT INTO sensor_summary (timestamp, ax, ay, az, temp, amp, rul_predict, status)
-        VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-    ''', (
-        data['timestamp'], 
+def to_epoch_ms(timestamp):
+    """แปลง timestamp จากบอร์ด ('YYYY-MM-DD HH:MM:SS.mmm' เวลาท้องถิ่น หรือ epoch วินาที) เป็น epoch ms"""
+    if isinstance(timestamp, (int, float)):
+        return int(timestamp * 1000)
+    return int(datetime.fromisoformat(timestamp).timestamp() * 1000)
+
+MS_PER_DAY = 86_400_000
+_day_names = {}
+
+def day_of(ts_ms):
+    """epoch ms -> ชื่อวันของ shard เช่น '20261018' (UTC)"""
+    day_num = ts_ms // MS_PER_DAY
+    name = _day_names.get(day_num)
+    if name is None:
+        name = datetime.fromtimestamp(day_num * 86400, tz=timezone.utc).strftime("%Y%m%d")
+        _day_names[day_num] = name
+    return name
+
+def row_from_data(data):
+    """แปลง dict จาก MQTT ให้เป็น tuple ตามลำดับคอลัมน์ของ INSERT_SQL
+    (ข้อความที่ขาด field / timestamp ผิดรูปแบบ -> KeyError / ValueError)"""
+    return (
+        to_epoch_ms(data['timestamp']),
+        str(data.get('device_id', DEFAULT_DEVICE_ID)),
         data['ax'], data['ay'], data['az'], 
         data['temp'], data['amp'], 
         data['rul_predict'],
         data['status']
-    ))
-    
-    conn.commit()
+    )
+
+
+class ShardStore:
+    """จัดการไฟล์ DB รายวัน: เปิด connection ค้างไว้เฉพาะวันที่เพิ่งเขียน (ไม่เกิน max_open ไฟล์)"""
+
+    def __init__(self, shard_dir=None, max_open=2):
+        self.shard_dir = shard_dir or SHARD_DIR
+        self.max_open = max_open
+        self._conns = {}  # day -> connection (เรียงตามลำดับที่ใช้ล่าสุด)
+        os.makedirs(self.shard_dir, exist_ok=True)
+
+    def path_for(self, day):
+        return os.path.join(self.shard_dir, f"{SHARD_PREFIX}{day}.db")
+
+    def connection(self, day):
+        conn = self._conns.pop(day, None)
+        if conn is None:
+            conn = _connect(self.path_for(day))
+            conn.executescript(SHARD_SCHEMA)
+            while len(self._conns) >= self.max_open:
+                oldest = next(iter(self._conns))
+                self._conns.pop(oldest).close()
+        self._conns[day] = conn
+        return conn
+
+    def insert_rows(self, rows):
+        """เขียนหลายแถว แยกลงไฟล์ตามวัน (ปกติทั้ง batch อยู่วันเดียวกัน)"""
+        if not rows:
+            return
+        first_day = rows[0][0] // MS_PER_DAY
+        if all(row[0] // MS_PER_DAY == first_day for row in rows):
+            by_day = {first_day: rows}
+        else:
+            by_day = {}
+            for row in rows:
+                by_day.setdefault(row[0] // MS_PER_DAY, []).append(row)
+        for day_num, day_rows in by_day.items():
+            conn = self.connection(day_of(day_num * MS_PER_DAY))
+            with conn:
+                conn.executemany(INSERT_SQL, day_rows)
+                for resolution in rollups.SHARD_RESOLUTIONS:
+                    rollups.upsert(conn, resolution, day_rows)
+
+    def list_days(self):
+        days = []
+        for name in os.listdir(self.shard_dir):
+            if name.startswith(SHARD_PREFIX) and name.endswith(".db"):
+                days.append(name[len(SHARD_PREFIX):-3])
+        return sorted(days)
+
+    def drop_before(self, cutoff_day):
+        """ลบไฟล์ของทุกวันที่เก่ากว่า cutoff_day คืนค่าจำนวนไฟล์ที่ลบ"""
+        removed = 0
+        for day in self.list_days():
+            if day >= cutoff_day:
+                break
+            conn = self._conns.pop(day, None)
+            if conn is not None:
+                conn.close()
+            path = self.path_for(day)
+            for suffix in ("", "-wal", "-shm"):
+                if os.path.exists(path + suffix):
+                    os.remove(path + suffix)
+            removed += 1
+        return removed
+
+    def close(self):
+        for conn in self._conns.values():
+            conn.close()
+        self._conns.clear()
+
+
+def apply_main_rollups(conn, rows):
+    """อัปเดต rollup 1m / 1h ในไฟล์หลักจากแถวชุดนี้ (1 transaction)"""
+    with conn:
+        for resolution in rollups.MAIN_RESOLUTIONS:
+            rollups.upsert(conn, resolution, rows)
+
+def init_db():
+    """สร้างโฟลเดอร์ shard, ไฟล์ของวันนี้ และตาราง rollup ถ้ายังไม่มี"""
+    store = ShardStore()
+    store.connection(day_of(int(time.time() * 1000)))
+    store.close()
+
+    conn = _connect(DB_NAME)
+    for resolution in rollups.MAIN_RESOLUTIONS:
+        conn.executescript(rollups.schema(resolution))
+
+    # เตือนถ้ายังมีข้อมูลในตารางรูปแบบเดิม (timestamp TEXT) ที่ยังไม่ได้ย้าย
+    legacy = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type='table' AND name='sensor_summary'"
+    ).fetchone()
     conn.close()
+    if legacy:
+        print(f"⚠️ Legacy table found in {DB_NAME}: run `python -m web.backend.migrate_storage` to migrate.")
+
+# connection ของ insert_data_sqlite: เปิดครั้งแรกแล้วถือค้างไว้ (ShardStore สร้าง schema ครั้งเดียวต่อไฟล์)
+_direct_lock = threading.Lock()
+_direct = {}  # (SHARD_DIR, DB_NAME) -> (ShardStore, connection ของไฟล์หลัก)
+
+def insert_data_sqlite(data):
+    """บันทึกข้อมูลลง SQLite"""
+    # (ทีละแถว 1 commit ใช้สำหรับงานเล็กๆ / script, ฝั่ง MQTT ใช้ SQLiteBatchWriter)
+    with INSERT_SECONDS.time():
+        rows = [row_from_data(data)]
+        with _direct_lock:
+            key = (SHARD_DIR, DB_NAME)
+            if key not in _direct:
+                _direct[key] = (ShardStore(), _connect(DB_NAME))
+            store, conn = _direct[key]
+            store.insert_rows(rows)
+            apply_main_rollups(conn, rows)
+
+def cleanup_old_sqlite_data(retention_days=RETENTION_DAYS, store=None):
+    """ลบข้อมูลที่เก่ากว่า 7 วัน (ลบไฟล์ shard ทั้งวัน ไม่ต้องไล่ DELETE ทีละแถว)"""
+    cutoff_ms = int((time.time() - retention_days * 86400) * 1000)
+    own_store = store is None
+    store = store or ShardStore()
+    removed = store.drop_before(day_of(cutoff_ms))
+    if own_store:
+        store.close()
 
-def cleanup_old_sqlite_data():
-    """ลบข้อมูลใน Database ที่เก่ากว่า 7 วัน"""
     conn = sqlite3.connect(DB_NAME)
-    cursor = conn.cursor()
-    
-    # ลบข้อมูลที่เก่ากว่า 7 วัน นับจากเวลาปัจจุบัน
-    cursor.execute("DELETE FROM sensor_summary WHERE timestamp < datetime('now', '-7 days')")
-    
-    deleted_count = cursor.rowcount
-    if deleted_count > 0:
-        print(f"🧹 History Cleaner: Removed {deleted_count} old records.")
-        
-    conn.commit()
-    conn.close()
\ No newline at end of file
+    with conn:
+        rollups.cleanup(conn, int(time.time() * 1000))
+    conn.close()
+
+    if removed > 0:
+        print(f"🧹 History Cleaner: Removed {removed} old day shard(s).")
+    return removed
+
+
+# --- Batched Writer (สำหรับ MQTT ingest path) ---
+# แยก Thread สำหรับเขียน DB โดยเฉพาะ: ถือ connection ของ shard วันปัจจุบันค้างไว้ (WAL)
+# แล้วรวบแถวจาก Queue เขียนทีละก้อนด้วย executemany -> 1 commit ต่อหลายร้อยแถว
+# แทนที่จะ fsync ทุกข้อความบน Thread ของ paho
+
+class SQLiteBatchWriter:
+    """เขียนข้อมูลลง SQLite แบบ batch ผ่าน bounded queue"""
+
+    def __init__(self, shard_dir=None, max_queue=10000, batch_size=500,
+                 flush_interval=0.5, put_timeout=0.01):
+        self.shard_dir = shard_dir or SHARD_DIR
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval  # วินาที: เขียนอย่างน้อยทุกๆ เท่านี้ถึงแถวจะยังไม่ครบ batch
+        self.put_timeout = put_timeout        # วินาที: เวลาที่ยอมให้ผู้ส่งรอเมื่อ queue เต็ม (backpressure)
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._thread = None
+        self._stop = threading.Event()
+        self._drop_lock = threading.Lock()
+
+        # ตัวนับสถิติ (อ่านผ่าน stats())
+        self.dropped = 0
+        self.written = 0
+        self.batches = 0
+        self.errors = 0
+        self.last_flush_ms = 0.0
+
+    def start(self):
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="sqlite-writer", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout=5.0):
+        """หยุด Thread และ flush ข้อมูลที่ค้างใน queue ให้หมดก่อนปิด"""
+        if self._thread is None:
+            return
+        self._stop.set()
+        self._thread.join(timeout)
+        self._thread = None
+
+    def submit(self, data):
+        """ส่งข้อมูล 1 แถวเข้า queue คืนค่า False ถ้า queue เต็มจนต้องทิ้ง"""
+        row = row_from_data(data)
+        try:
+            # รอได้สั้นๆ เพื่อชะลอผู้ส่ง (backpressure) ก่อนจะยอมทิ้งข้อมูล
+            self._queue.put(row, timeout=self.put_timeout)
+            return True
+        except queue.Full:
+            with self._drop_lock:
+                self.dropped += 1
+                dropped = self.dropped
+            if dropped == 1 or dropped % 1000 == 0:
+                print(f"⚠️ SQLite writer queue full: dropped {dropped} rows so far")
+            return False
+
+    def submit_many(self, items):
+        """ส่งหลายแถวเป็น item เดียวของ queue (ingest worker ส่งทีละก้อน) คืนค่า False ถ้าต้องทิ้ง"""
+        return self.submit_rows([row_from_data(data) for data in items])
+
+    def submit_rows(self, rows, wait=True):
+        """ส่งแถวที่แปลงแล้ว (row_from_data) เป็น item เดียวของ queue คืนค่า False ถ้าต้องทิ้ง
+        wait=False: ไม่รอเลยแม้ queue เต็ม (เรียกจาก event loop ห้าม block)"""
+        if not rows:
+            return True
+        try:
+            if wait:
+                self._queue.put(rows, timeout=self.put_timeout)
+            else:
+                self._queue.put_nowait(rows)
+            return True
+        except queue.Full:
+            with self._drop_lock:
+                self.dropped += len(rows)
+                dropped = self.dropped
+            print(f"⚠️ SQLite writer queue full: dropped {dropped} rows so far")
+            return False
+
+    def qsize(self):
+        """จำนวน item ที่รอเขียนใน queue (แถวเดี่ยว หรือ list ของแถวจาก submit_rows)"""
+        return self._queue.qsize()
+
+    def stats(self):
+        return {
+            "queue_depth": self.qsize(),
+            "queue_max": self._queue.maxsize,
+            "written": self.written,
+            "batches": self.batches,
+            "dropped": self.dropped,
+            "errors": self.errors,
+            "last_flush_ms": round(self.last_flush_ms, 3),
+        }
+
+    def _run(self):
+        store = ShardStore(self.shard_dir)
+        main_conn = _connect(DB_NAME)
+        try:
+            while not (self._stop.is_set() and self._queue.empty()):
+                batch = self._collect()
+                if batch:
+                    self._flush(store, main_conn, batch)
+        finally:
+            store.close()
+            main_conn.close()
+
+    def _collect(self):
+        """ดึงแถวจาก queue จนครบ batch_size หรือหมดเวลา flush_interval"""
+        batch = []
+        deadline = time.monotonic() + self.flush_interval
+        while len(batch) < self.batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                self._add(batch, self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+            # ดึงที่เหลือใน queue แบบไม่รอ (เร็วกว่าเรียก get(timeout) ทีละแถว)
+            while len(batch) < self.batch_size:
+                try:
+                    self._add(batch, self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            if self._stop.is_set():
+                break
+        return batch
+
+    @staticmethod
+    def _add(batch, item):
+        # item = 1 แถว (submit) หรือ list ของแถว (submit_many)
+        if isinstance(item, list):
+            batch.extend(item)
+        else:
+            batch.append(item)
+
+    def _flush(self, store, main_conn, batch):
+        start = time.perf_counter()
+        try:
+            store.insert_rows(batch)
+            apply_main_rollups(main_conn, batch)
+            self.written += len(batch)
+            self.batches += 1
+            FLUSH_ROWS.inc(len(batch))
+        except sqlite3.Error as e:
+            self.errors += 1
+            print(f"⚠️ SQLite writer failed to flush {len(batch)} rows: {e}")
+        elapsed = time.perf_counter() - start
+        FLUSH_SECONDS.observe(elapsed)
+        self.last_flush_ms = elapsed * 1000
@@ -0,0 +1,89 @@
+import json
+import time
+from collections import deque
+
+from .tiers import device_of, is_warning
+
+# --- Fleet State Cache (snapshot ตอน Dashboard เชื่อมต่อ) ---
+# เดิม Dashboard ที่เพิ่งเปิดต้องรอข้อความ MQTT ถัดไป และไม่มีประวัติเลย (state อยู่ใน memory ของ browser)
+# เก็บใน memory ของ Backend ต่อเครื่อง: ข้อความล่าสุด + sample ล่าสุด RECENT_SAMPLES ค่า (แบบ columnar)
+# + event ผิดปกติล่าสุด EVENT_LOG_SIZE รายการ (ทุกเครื่องรวมกัน)
+# ตอนต่อ /ws/frontend ส่ง frame {"type": "snapshot", ...} 1 ครั้ง แล้วต่อด้วยข้อความสดตามปกติ
+# - อัปเดตบน event loop เท่านั้น (route_sample) -> ไม่ต้องมี lock
+# - snapshot ที่ encode แล้วถูก cache ไว้ SNAPSHOT_MAX_AGE วินาที: reconnect พร้อมกันหลายจอไม่ต้องสร้างใหม่ทุกครั้ง
+#   และไม่แตะ SQLite เลย
+
+RECENT_SAMPLES = 120        # ~12 วินาทีที่ 10 Hz
+EVENT_LOG_SIZE = 50
+SNAPSHOT_MAX_AGE = 0.5      # วินาที
+RECENT_FIELDS = ("timestamp", "ax", "ay", "az", "temp", "amp", "rul_predict", "rul_smooth", "status")
+
+
+class FleetStateCache:
+    """state ล่าสุดของทุกเครื่อง สำหรับส่งเป็น snapshot ให้ client ที่เพิ่งเชื่อมต่อ"""
+
+    def __init__(self, recent_samples=RECENT_SAMPLES, event_log_size=EVENT_LOG_SIZE,
+                 max_age=SNAPSHOT_MAX_AGE, clock=time.monotonic):
+        self.recent_samples = recent_samples
+        self.max_age = max_age
+        self.clock = clock
+        self._latest = {}
+        self._recent = {}
+        self._events = deque(maxlen=event_log_size)
+        self._version = 0
+        self._cache = {}   # devices (frozenset / None) -> (version, เวลาที่สร้าง, text)
+
+        # สถิติ
+        self.snapshots = 0
+        self.cache_hits = 0
+
+    def add(self, data):
+        """รันบน event loop: จำข้อความล่าสุดของเครื่องนี้"""
+        device_id = device_of(data)
+        self._latest.pop(device_id, None)   # ให้ลำดับใน dict = เครื่องที่อัปเดตล่าสุดอยู่ท้าย
+        self._latest[device_id] = data
+        recent = self._recent.get(device_id)
+        if recent is None:
+            recent = self._recent[device_id] = deque(maxlen=self.recent_samples)
+        recent.append([data.get(f) for f in RECENT_FIELDS])
+        if is_warning(data):
+            self._events.append(dict(data, device_id=device_id))
+        self._version += 1
+
+    def snapshot(self, devices=None):
+        """dict ของ snapshot (devices = None คือทุกเครื่อง)"""
+        return {
+            "type": "snapshot",
+            "devices": {
+                device_id: {
+                    "latest": latest,
+                    "recent": {"fields": RECENT_FIELDS, "rows": list(self._recent[device_id])},
+                }
+                for device_id, latest in self._latest.items()
+                if devices is None or device_id in devices
+            },
+            "events": [e for e in self._events if devices is None or e["device_id"] in devices],
+        }
+
+    def snapshot_text(self, devices=None):
+        """snapshot ที่ encode แล้ว (ใช้ของเดิมถ้าไม่มีอะไรเปลี่ยน หรือยังไม่เก่าเกิน max_age)"""
+        key = frozenset(devices) if devices is not None else None
+        now = self.clock()
+        self.snapshots += 1
+        cached = self._cache.get(key)
+        if cached is not None and (cached[0] == self._version or now - cached[1] < self.max_age):
+            self.cache_hits += 1
+            return cached[2]
+        text = json.dumps(self.snapshot(devices), separators=(",", ":"))
+        if len(self._cache) > 64:   # รายชื่อเครื่องแบบ ad-hoc ไม่ให้ cache โตไม่จำกัด
+            self._cache.clear()
+        self._cache[key] = (self._version, now, text)
+        return text
+
+    def stats(self):
+        return {
+            "devices": len(self._latest),
+            "events": len(self._events),
+            "snapshots": self.snapshots,
+            "cache_hits": self.cache_hits,
+        }
@@ -0,0 +1,192 @@
+import json
+import math
+import os
+import sqlite3
+import time
+from datetime import datetime
+
+from . import database, rollups
+
+# --- Historical Query (อ่านย้อนหลังจาก shard / rollup) ---
+# ส่งผลลัพธ์แบบ streaming ทีละก้อน (ไม่ดึงทุกแถวเข้า memory) และแบ่งหน้าด้วย cursor
+# รูปแบบ response: {"columns": [...], "rows": [[...], ...], "next_cursor": <cursor|null>}
+# cursor ของ raw = "<ts>:<rowid>" (หลายแถวมี ts เดียวกันได้ -> เวลาอย่างเดียวข้ามแถวที่ ts ซ้ำกับท้ายหน้า)
+# cursor ของ rollup = bucket ถัดไป (ms) เพราะ (device, bucket) ไม่ซ้ำอยู่แล้ว
+
+RESOLUTION_RAW = "raw"
+RESOLUTION_AUTO = "auto"
+RESOLUTIONS = (RESOLUTION_RAW,) + tuple(rollups.RESOLUTIONS)
+DEFAULT_LIMIT = 5000
+MAX_LIMIT = 50000
+TARGET_POINTS = 2000     # auto: เลือก resolution ที่ละเอียดที่สุดที่ได้ไม่เกินจำนวนจุดนี้
+RAW_INTERVAL_MS = 100    # บอร์ดส่ง 10Hz
+CHUNK_ROWS = 500
+
+RAW_COLUMNS = ["t", "ax", "ay", "az", "temp", "amp", "rul_predict", "status"]
+ROLLUP_COLUMNS = (
+    ["t", "n"]
+    + [f"{f}_{stat}" for f in rollups.FIELDS for stat in ("min", "max", "mean", "rms")]
+    + ["rul_predict", "status"]
+)
+
+
+def parse_time(value, default_ms):
+    """รับ epoch (วินาทีหรือ ms) หรือ ISO string -> epoch ms"""
+    if value is None or value == "":
+        return default_ms
+    try:
+        number = float(value)
+    except ValueError:
+        return int(datetime.fromisoformat(value).timestamp() * 1000)
+    # ตัวเลขน้อยกว่า 1e11 ถือเป็นวินาที (1e11 ms = ปี 1973)
+    return int(number * 1000) if number < 1e11 else int(number)
+
+
+def parse_cursor(value):
+    """'<ts>:<rowid>' หรือ '<ts>' -> (ts ms, rowid) (rowid 0 = ตั้งแต่แถวแรกของ ts นั้น)"""
+    ts, _, rowid = str(value).partition(":")
+    return int(ts), int(rowid or 0)
+
+
+def choose_resolution(start_ms, end_ms):
+    span = max(end_ms - start_ms, 1)
+    if span / RAW_INTERVAL_MS <= TARGET_POINTS:
+        return RESOLUTION_RAW
+    for resolution, bucket_ms in rollups.RESOLUTIONS.items():
+        if span / bucket_ms <= TARGET_POINTS:
+            return resolution
+    return "1h"
+
+
+def align_start(start_ms, resolution):
+    """ปัด start ลงให้ตรงต้น bucket เพื่อให้ได้ bucket แรกที่คาบเกี่ยวช่วงเวลาด้วย"""
+    if resolution == RESOLUTION_RAW:
+        return start_ms
+    return start_ms - start_ms % rollups.RESOLUTIONS[resolution]
+
+
+def _open_readonly(path):
+    return sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+
+
+def _sources(resolution, start_ms, end_ms, shard_dir):
+    """รายชื่อไฟล์ที่ต้องอ่านตามลำดับเวลา (raw / 1s อยู่ใน shard รายวัน)"""
+    if resolution in (RESOLUTION_RAW,) + rollups.SHARD_RESOLUTIONS:
+        store_paths = []
+        first = start_ms // database.MS_PER_DAY
+        last = (end_ms - 1) // database.MS_PER_DAY
+        for day_num in range(first, last + 1):
+            path = os.path.join(shard_dir, f"{database.SHARD_PREFIX}"
+                                           f"{database.day_of(day_num * database.MS_PER_DAY)}.db")
+            if os.path.exists(path):
+                store_paths.append(path)
+        return store_paths
+    return [database.DB_NAME] if os.path.exists(database.DB_NAME) else []
+
+
+def _query(resolution):
+    if resolution == RESOLUTION_RAW:
+        # rowid เป็นตัวตัดสินลำดับของแถวที่ ts เท่ากัน (ts ต่อ device ใช้ index ได้ตามเดิม)
+        return ("SELECT ts, rowid, ax, ay, az, temp, amp, rul_predict, status FROM sensor_summary "
+                "WHERE device = ? AND ts >= ? AND (ts > ? OR rowid > ?) AND ts < ? "
+                "ORDER BY ts, rowid LIMIT ?")
+    cols = ", ".join(rollups.VALUE_COLUMNS)
+    return (f"SELECT bucket, {cols} FROM {rollups.table_name(resolution)} "
+            "WHERE device = ? AND bucket >= ? AND bucket < ? ORDER BY bucket LIMIT ?")
+
+
+def _rollup_row(row):
+    """(bucket, n, min, max, sum, sumsq, ..., rul_sum, status_max) -> แถวตาม ROLLUP_COLUMNS"""
+    n = row[1]
+    out = [row[0], n]
+    j = 2
+    for _ in rollups.FIELDS:
+        lo, hi, total, sumsq = row[j:j + 4]
+        if lo > hi:   # ทั้ง bucket ไม่มีค่าของ field นี้ (min/max ยังเป็น ±inf)
+            out += [None, None, None, None]
+        else:
+            out += [lo, hi, round(total / n, 4), round(math.sqrt(sumsq / n), 4)]
+        j += 4
+    out += [round(row[j] / n, 1), row[j + 1]]
+    return out
+
+
+def iter_rows(device_id, start_ms, end_ms, resolution, limit, shard_dir=None, after_rowid=0):
+    """ไล่อ่านแถวจากแต่ละไฟล์ตามลำดับเวลา ด้วย cursor ของ SQLite (fetchmany ทีละก้อน)
+    raw: แถวเป็น (ts, rowid, ...) และข้ามแถวที่ ts == start_ms ซึ่ง rowid <= after_rowid (หน้าก่อนส่งไปแล้ว)"""
+    shard_dir = shard_dir or database.SHARD_DIR
+    sql = _query(resolution)
+    remaining = limit
+    for path in _sources(resolution, start_ms, end_ms, shard_dir):
+        if remaining <= 0:
+            break
+        conn = _open_readonly(path)
+        try:
+            if resolution == RESOLUTION_RAW:
+                params = (device_id, start_ms, start_ms, after_rowid, end_ms, remaining)
+            else:
+                params = (device_id, start_ms, end_ms, remaining)
+            cur = conn.execute(sql, params)
+            while True:
+                rows = cur.fetchmany(CHUNK_ROWS)
+                if not rows:
+                    break
+                remaining -= len(rows)
+                if resolution == RESOLUTION_RAW:
+                    yield from rows
+                else:
+                    yield from (_rollup_row(r) for r in rows)
+        except sqlite3.OperationalError:
+            # ไฟล์ยังไม่มีตาราง (เช่น shard ที่กำลังถูกสร้าง) -> ข้าม
+            pass
+        finally:
+            conn.close()
+
+
+def stream_series(device_id, start_ms, end_ms, resolution, limit, after_rowid=0):
+    """Generator ของ JSON ทีละก้อน สำหรับ StreamingResponse"""
+    columns = RAW_COLUMNS if resolution == RESOLUTION_RAW else ROLLUP_COLUMNS
+    header = {
+        "device_id": device_id,
+        "resolution": resolution,
+        "start": start_ms,
+        "end": end_ms,
+        "columns": columns,
+    }
+    yield json.dumps(header)[:-1] + ', "rows": ['
+
+    raw = resolution == RESOLUTION_RAW
+    count = 0
+    last = None
+    chunk = []
+    for row in iter_rows(device_id, start_ms, end_ms, resolution, limit, after_rowid=after_rowid):
+        last = row
+        if raw:
+            row = (row[0],) + tuple(row[2:])   # ตัด rowid ออก (ใช้ทำ cursor เท่านั้น)
+        chunk.append(json.dumps(list(row)))
+        count += 1
+        if len(chunk) >= CHUNK_ROWS:
+            yield ("," if count > len(chunk) else "") + ",".join(chunk)
+            chunk = []
+    if chunk:
+        yield ("," if count > len(chunk) else "") + ",".join(chunk)
+
+    next_cursor = None
+    if count >= limit and last is not None:
+        next_cursor = f"{last[0]}:{last[1]}" if raw else last[0] + 1
+    yield f'], "count": {count}, "next_cursor": {json.dumps(next_cursor)}}}'
+
+
+def list_devices():
+    if not os.path.exists(database.DB_NAME):
+        return []
+    conn = _open_readonly(database.DB_NAME)
+    try:
+        rows = conn.execute(f"SELECT DISTINCT device FROM {rollups.table_name('1h')} ORDER BY device")
+        return [r[0] for r in rows]
+    finally:
+        conn.close()
+
+
+def now_ms():
+    return int(time.time() * 1000)
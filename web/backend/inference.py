@@ -0,0 +1,179 @@
+import asyncio
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+# --- Server-side Inference (Hybrid CNN+LSTM ผ่าน ONNX Runtime) ---
+# โหลดโมเดลครั้งเดียว แล้วรวบ window จากหลายเครื่องเป็น micro-batch
+# (รอไม่เกิน max_latency หรือจนครบ max_batch) ก่อนรันใน thread pool นอก event loop
+
+MODEL_PATH = os.path.join("models", "hybrid_model_v1.onnx")
+VIB_SHAPE = (1024, 1)     # input_vibration  (TIME_STEPS ใน src/model.py)
+SENSOR_SHAPE = (50, 2)    # input_sensors    (SENSOR_TIME_STEPS, [temperature, current])
+DIAG_LABELS = ("Normal", "Inner Race Fault", "Outer Race Fault", "Ball Fault")
+
+# window จาก DeviceWindowStore เป็น float32 ที่ normalise แล้ว (z-score) ONNX ไม่มี scale/zero-point ให้ quantize
+# -> cast เป็น int16/int8 ตรงๆ ได้แค่ -3..3 (ขยะ) จึงรับเฉพาะโมเดลที่ input เป็น float
+#    (notebooks/convert_onnx.py export เป็น float32 โดย default / --vib-dtype int16 สำหรับ eIQ ใช้ที่นี่ไม่ได้)
+ORT_FLOAT = "tensor(float)"
+
+
+class InferenceEngine:
+    """รวม request เป็น batch แล้วรันโมเดล ONNX บน CPU"""
+
+    def __init__(self, model_path=MODEL_PATH, max_batch=64, max_latency=0.02,
+                 workers=1, intra_op_threads=0):
+        self.model_path = model_path
+        self.max_batch = max_batch
+        self.max_latency = max_latency  # วินาทีที่ยอมรอให้ batch เต็ม
+        self.intra_op_threads = intra_op_threads
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="inference")
+        self._session = None
+        self._queue = None
+        self._task = None
+        self.state = "idle"   # idle / loading / ready / failed: ... (รายงานผ่าน GET /ready)
+
+        # สถิติ
+        self.batches = 0
+        self.windows = 0
+        self.last_batch_size = 0
+        self.last_batch_ms = 0.0
+
+    @property
+    def ready(self):
+        return self._session is not None and self._task is not None
+
+    def load(self):
+        """โหลด ONNX session (เรียกครั้งเดียว ใช้เวลาหลักร้อย ms)"""
+        import onnxruntime as ort
+
+        options = ort.SessionOptions()
+        if self.intra_op_threads:
+            options.intra_op_num_threads = self.intra_op_threads
+        session = ort.InferenceSession(self.model_path, options, providers=["CPUExecutionProvider"])
+
+        inputs = {i.name: i for i in session.get_inputs()}
+        self._vib_input = inputs["input_vibration"]
+        self._sensor_input = inputs["input_sensors"]
+        for i in (self._vib_input, self._sensor_input):
+            if i.type != ORT_FLOAT:
+                raise ValueError(f"{self.model_path}: input '{i.name}' is {i.type}, expected {ORT_FLOAT} "
+                                 "(re-export the ONNX model with float32 inputs)")
+
+        # หา index ของ output จากชื่อ (ถ้าชื่อหายตอน export ใช้ขนาด: 4 = diagnosis, 1 = RUL)
+        outputs = session.get_outputs()
+        names = [o.name for o in outputs]
+        self._diag_idx = next((i for i, n in enumerate(names) if "diagnosis" in n),
+                              next(i for i, o in enumerate(outputs) if o.shape[-1] == len(DIAG_LABELS)))
+        self._rul_idx = next((i for i, n in enumerate(names) if "rul" in n), 1 - self._diag_idx)
+        self._session = session
+        return self
+
+    async def start(self):
+        if self._session is None:
+            self.load()
+        self._queue = asyncio.Queue()
+        self._task = asyncio.create_task(self._batch_loop())
+        self.state = "ready"
+
+    async def warm_start(self):
+        """โหลด session ใน thread ของ inference (ไม่บล็อก event loop / endpoint ตอบได้ทันที)
+        แล้วรัน batch เปล่า 1 ครั้งให้ ORT จัดสรร memory ก่อนข้อมูลจริงจะมา"""
+        self.state = "loading"
+        loop = asyncio.get_running_loop()
+        try:
+            await loop.run_in_executor(self._executor, self.load)
+            await loop.run_in_executor(self._executor, self._run_batch,
+                                       np.zeros((1,) + VIB_SHAPE), np.zeros((1,) + SENSOR_SHAPE))
+        except Exception as e:
+            self._session = None
+            self.state = f"failed: {e}"
+            raise
+        self.batches = self.windows = 0   # ไม่นับ batch warm-up
+        await self.start()
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+        self._executor.shutdown(wait=False)
+
+    async def predict(self, vib_window, sensor_window):
+        """ส่ง window 1 ชุดเข้า batch แล้วรอผล {diagnosis, label, rul}"""
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((vib_window, sensor_window, future))
+        return await future
+
+    async def _batch_loop(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            deadline = loop.time() + self.max_latency
+            while len(batch) < self.max_batch:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+
+            futures = [item[2] for item in batch]
+            try:
+                vib = np.stack([np.asarray(item[0]).reshape(VIB_SHAPE) for item in batch])
+                sensor = np.stack([np.asarray(item[1]).reshape(SENSOR_SHAPE) for item in batch])
+                results = await loop.run_in_executor(self._executor, self._run_batch, vib, sensor)
+            except Exception as e:
+                for f in futures:
+                    if not f.done():
+                        f.set_exception(e)
+                continue
+            for f, result in zip(futures, results):
+                if not f.done():
+                    f.set_result(result)
+
+    def _run_batch(self, vib, sensor):
+        start = time.perf_counter()
+        outputs = self._session.run(None, {
+            self._vib_input.name: vib.astype(np.float32, copy=False),
+            self._sensor_input.name: sensor.astype(np.float32, copy=False),
+        })
+        diag = outputs[self._diag_idx]
+        rul = outputs[self._rul_idx].reshape(-1)
+        self.batches += 1
+        self.windows += len(vib)
+        self.last_batch_size = len(vib)
+        self.last_batch_ms = (time.perf_counter() - start) * 1000
+
+        labels = diag.argmax(axis=1)
+        return [
+            {
+                "diagnosis": [round(float(p), 4) for p in diag[i]],
+                "diagnosis_label": DIAG_LABELS[labels[i]],
+                "rul": float(rul[i]),
+            }
+            for i in range(len(vib))
+        ]
+
+    def stats(self):
+        return {
+            "ready": self.ready,
+            "state": self.state,
+            "batches": self.batches,
+            "windows": self.windows,
+            "pending": self._queue.qsize() if self._queue is not None else 0,
+            "last_batch_size": self.last_batch_size,
+            "last_batch_ms": round(self.last_batch_ms, 3),
+        }
+
+
+def attach_prediction(data, result):
+    """ใส่ผลโมเดลลงข้อความที่จะส่งต่อ (แทนค่าที่บอร์ด/mock ส่งมา)"""
+    data["diagnosis"] = result["diagnosis"]
+    data["diagnosis_label"] = result["diagnosis_label"]
+    data["rul_predict"] = round(result["rul"], 0)
+    data["status"] = 0 if result["diagnosis_label"] == DIAG_LABELS[0] else 1
+    data["model_source"] = "gateway"
+    return data
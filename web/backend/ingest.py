@@ -0,0 +1,266 @@
+import heapq
+import queue
+import re
+import threading
+import time
+import zlib
+from collections import deque
+
+import numpy as np
+
+from . import wire
+
+# --- Ingest Dispatcher (MQTT -> worker threads) ---
+# บอร์ดแต่ละเครื่อง publish ลง topic ของตัวเอง: factory/compressor/<device_id>/data
+# Thread ของ paho ทำแค่ "แยก device จาก topic -> โยนเข้า queue" แล้วกลับไปอ่าน socket ต่อทันที
+# งานหนัก (decode / ring buffer / pre-gate / ส่งเข้า event loop / DB) ทำใน worker N ตัว
+# - เลือก worker ด้วย crc32(device_id) % N -> ข้อความของเครื่องเดียวกันเข้า worker เดียวกันเสมอ (ลำดับไม่สลับ)
+# - worker ดึงข้อความที่ค้างใน queue ทีละก้อน (ไม่เกิน max_batch) แล้วส่งผลต่อทีเดียว:
+#   1 ครั้ง call_soon_threadsafe + 1 item ของ DB writer ต่อก้อน แทนที่จะเป็นต่อข้อความ
+# - งาน NumPy (ring buffer / pre-gate) และ SQLite ปล่อย GIL จึงกระจายได้หลาย core
+#   ส่วน decode ยังถือ GIL: frame binary (wire.py) ถูกกว่า JSON มาก ถ้าต้องการ scale เต็มที่ให้บอร์ดส่ง binary
+# - topic เดิม (ไม่มี device ใน topic): อ่าน device_id จาก payload แบบไม่ decode ทั้งก้อน (shard_key)
+#   -> บอร์ดรุ่นเก่าหลายเครื่องยังกระจายไปหลาย worker ไม่กองอยู่ที่ worker เดียว
+
+TOPIC_PREFIX = "factory/compressor/"
+TOPIC_SUFFIX = "/data"
+TOPIC_PATTERN = TOPIC_PREFIX + "+" + TOPIC_SUFFIX
+LEGACY_KEY = ""                # topic เดิม (ไม่มี device ใน topic) -> ใช้ device จาก payload ตอน decode
+LATENCY_WINDOW = 2048          # จำนวนตัวอย่างล่าสุดที่ใช้คำนวณ percentile ต่อ stage
+
+
+def device_from_topic(topic):
+    """'factory/compressor/<id>/data' -> '<id>' / topic อื่น (เช่นของเดิม) -> LEGACY_KEY"""
+    if topic.startswith(TOPIC_PREFIX) and topic.endswith(TOPIC_SUFFIX):
+        device = topic[len(TOPIC_PREFIX):-len(TOPIC_SUFFIX)]
+        if device and "/" not in device:
+            return device
+    return LEGACY_KEY
+
+
+def device_topic(device_id):
+    return f"{TOPIC_PREFIX}{device_id}{TOPIC_SUFFIX}"
+
+
+_JSON_DEVICE_ID = re.compile(rb'"device_id"\s*:\s*"([^"\\]{1,64})"')
+
+
+def device_from_payload(payload):
+    """device_id ใน payload (binary: header คงที่ / JSON: regex หา field) ไม่เจอ -> LEGACY_KEY
+    รันบน Thread ของ paho จึงห้าม decode ทั้งข้อความ"""
+    if wire.is_binary(payload):
+        device = payload[4:4 + wire.DEVICE_ID_BYTES].rstrip(b"\0")
+    else:
+        m = _JSON_DEVICE_ID.search(payload)
+        device = m.group(1) if m else b""
+    try:
+        return device.decode("ascii")
+    except UnicodeDecodeError:
+        return LEGACY_KEY
+
+
+def shard_key(topic, payload):
+    """key ที่ใช้เลือก worker: device จาก topic ถ้ามี ไม่งั้นจาก payload (topic เดิม)"""
+    device = device_from_topic(topic)
+    return device if device != LEGACY_KEY else device_from_payload(payload)
+
+
+class LatencyStats:
+    """เก็บ latency (วินาที) ล่าสุด LATENCY_WINDOW ค่า -> mean / p50 / p99 / max เป็น ms"""
+
+    def __init__(self, size=LATENCY_WINDOW):
+        self._samples = deque(maxlen=size)
+        self.count = 0
+
+    def add(self, seconds):
+        self._samples.append(seconds)
+        self.count += 1
+
+    def summary(self):
+        if not self._samples:
+            return {"count": self.count}
+        ms = np.fromiter(self._samples, dtype=np.float64) * 1000
+        return {
+            "count": self.count,
+            "mean_ms": round(float(ms.mean()), 3),
+            "p50_ms": round(float(np.percentile(ms, 50)), 3),
+            "p99_ms": round(float(np.percentile(ms, 99)), 3),
+            "max_ms": round(float(ms.max()), 3),
+        }
+
+
+class IngestDispatcher:
+    """กระจายข้อความไป worker ตาม device (hash) / handler(device_key, payload) -> ผลที่จะส่งต่อ หรือ None
+    on_batch(results): เรียกหลัง worker ทำครบ 1 ก้อน (เช่นส่งเข้า event loop และ DB ทีเดียว)"""
+
+    def __init__(self, handler, on_batch, workers=4, max_queue=5000, max_batch=256):
+        self.handler = handler
+        self.on_batch = on_batch
+        self.workers = workers
+        self.max_batch = max_batch
+        self._queues = [queue.Queue(maxsize=max_queue) for _ in range(workers)]
+        self._threads = []
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+
+        # สถิติ
+        self.received = 0
+        self.dropped = 0
+        self.processed = [0] * workers
+        self.errors = [0] * workers
+        self.batches = [0] * workers
+        self.queue_wait = [LatencyStats() for _ in range(workers)]   # รอใน queue
+        self.handle_time = [LatencyStats() for _ in range(workers)]  # decode + ประมวลผลต่อข้อความ
+        self.batch_time = [LatencyStats() for _ in range(workers)]   # on_batch ต่อก้อน
+
+    def worker_of(self, device_key):
+        return zlib.crc32(device_key.encode()) % self.workers
+
+    def start(self):
+        if self._threads:
+            return
+        self._stop.clear()
+        for i in range(self.workers):
+            t = threading.Thread(target=self._run, args=(i,), name=f"ingest-{i}", daemon=True)
+            t.start()
+            self._threads.append(t)
+
+    def stop(self, timeout=5.0):
+        self._stop.set()
+        for t in self._threads:
+            t.join(timeout)
+        self._threads = []
+
+    def submit(self, device_key, payload):
+        """เรียกจาก Thread ของ MQTT: ไม่ block (queue เต็ม = ทิ้งและนับไว้)"""
+        self.received += 1
+        try:
+            self._queues[self.worker_of(device_key)].put_nowait((device_key, payload, time.perf_counter()))
+            return True
+        except queue.Full:
+            with self._lock:
+                self.dropped += 1
+                dropped = self.dropped
+            if dropped == 1 or dropped % 1000 == 0:
+                print(f"⚠️ Ingest queue full: dropped {dropped} messages so far")
+            return False
+
+    def _run(self, index):
+        q = self._queues[index]
+        while not (self._stop.is_set() and q.empty()):
+            try:
+                items = [q.get(timeout=0.1)]
+            except queue.Empty:
+                continue
+            while len(items) < self.max_batch:
+                try:
+                    items.append(q.get_nowait())
+                except queue.Empty:
+                    break
+            self._process(index, items)
+
+    def _process(self, index, items):
+        results = []
+        for device_key, payload, enqueued in items:
+            t0 = time.perf_counter()
+            self.queue_wait[index].add(t0 - enqueued)
+            try:
+                result = self.handler(device_key, payload)
+            except Exception as e:
+                self.errors[index] += 1
+                print(f"⚠️ Error processing MQTT message: {e}")
+                continue
+            if result is not None:
+                results.append(result)
+            self.handle_time[index].add(time.perf_counter() - t0)
+        self.processed[index] += len(items)
+
+        if results:
+            t0 = time.perf_counter()
+            try:
+                self.on_batch(results)
+            except Exception as e:
+                self.errors[index] += 1
+                print(f"⚠️ Error forwarding ingest batch: {e}")
+            self.batch_time[index].add(time.perf_counter() - t0)
+        self.batches[index] += 1
+
+    def queue_depths(self):
+        """จำนวนข้อความที่รออยู่ใน queue ของแต่ละ worker"""
+        return [q.qsize() for q in self._queues]
+
+    def stats(self):
+        return {
+            "workers": self.workers,
+            "received": self.received,
+            "dropped": self.dropped,
+            "processed": sum(self.processed),
+            "errors": sum(self.errors),
+            "queue_depth": self.queue_depths(),
+            "per_worker": [
+                {
+                    "processed": self.processed[i],
+                    "batches": self.batches[i],
+                    "queue_wait": self.queue_wait[i].summary(),
+                    "handle": self.handle_time[i].summary(),
+                    "forward": self.batch_time[i].summary(),
+                }
+                for i in range(self.workers)
+            ],
+        }
+
+
+class DeviceSequencer:
+    """ส่งข้อความของแต่ละเครื่องต่อตามลำดับที่รับมา
+    window ที่ต้องรอโมเดล (micro-batch ใน inference.py) กลับมาช้ากว่าข้อความถัดไปของเครื่องเดียวกัน
+    -> ข้อความที่มาก่อนถึงคิวถูกพักไว้จนกว่าเลขก่อนหน้าจะครบ
+    - reserve(device): เรียกใน ingest worker (เครื่องเดียวอยู่ worker เดียว -> เลขไม่ชนกัน)
+    - complete(device, seq, item): เรียกบน event loop -> list ของ item ที่ปล่อยได้ตามลำดับ
+    ถ้าพักไว้เกิน max_held ข้อความ (เช่น window ที่ไม่กลับมาเลย) จะข้ามเลขที่ขาดไป ไม่ให้เครื่องนั้นค้าง"""
+
+    def __init__(self, max_held=256):
+        self.max_held = max_held
+        self._next = {}       # device -> เลขถัดไปที่จะแจก (worker thread)
+        self._expected = {}   # device -> เลขที่รอปล่อย (event loop)
+        self._held = {}       # device -> heap ของ (seq, item)
+
+        # สถิติ
+        self.reordered = 0
+        self.skipped = 0
+
+    def reserve(self, device):
+        seq = self._next.get(device, 0)
+        self._next[device] = seq + 1
+        return seq
+
+    def complete(self, device, seq, item):
+        expected = self._expected.get(device, 0)
+        if seq < expected:
+            return [item]   # เลขที่ถูกข้ามไปแล้วเพิ่งกลับมา: ส่งเลย (ช้ากว่าไม่ส่ง)
+        held = self._held.get(device)
+        if seq == expected and not held:
+            self._expected[device] = seq + 1   # ทางปกติ: ไม่มีอะไรค้าง
+            return [item]
+        if held is None:
+            held = self._held[device] = []
+        heapq.heappush(held, (seq, id(item), item))
+        if seq != expected:
+            self.reordered += 1
+        if len(held) > self.max_held and held[0][0] > expected:
+            self.skipped += held[0][0] - expected
+            expected = held[0][0]
+        released = []
+        while held and held[0][0] == expected:
+            released.append(heapq.heappop(held)[2])
+            expected += 1
+        self._expected[device] = expected
+        if not held:
+            del self._held[device]
+        return released
+
+    def stats(self):
+        return {
+            "held": sum(len(h) for h in self._held.values()),
+            "reordered": self.reordered,
+            "skipped": self.skipped,
+        }
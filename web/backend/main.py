@@ -1,21 +1,43 @@
 import asyncio
 import json
+import os
 import random
 import threading
-from typing import List
+import time
 from datetime import datetime
-from fastapi import FastAPI, WebSocket, WebSocketDisconnect
+from fastapi import FastAPI, HTTPException, WebSocket, WebSocketDisconnect
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
 import paho.mqtt.client as mqtt # เพิ่ม Library MQTT
 from . import database
+from .broadcast import ConnectionManager
+from .fleet_state import FleetStateCache
+from . import tiers
+from . import history
+from . import ingest
+from . import metrics
+from .inference import InferenceEngine, attach_prediction
+from .pregate import PreGate
+from .rul_trend import RulTrendTracker, attach_trend
+from .windows import DeviceWindowStore
+from . import wire
+from . import ws_encoding
 
 app = FastAPI()
 
 # --- 1. MQTT Configuration ---
-# ใช้ Broker สาธารณะฟรีทดสอบก่อนได้ (หรือเปลี่ยนเป็น IP ของตัวเองถ้าลง Mosquitto ไว้)
-MQTT_BROKER = "test.mosquitto.org" 
-MQTT_PORT = 1883
-MQTT_TOPIC = "factory/compressor/data" # หัวข้อที่จะคุยกัน
+# ใช้ Broker สาธารณะฟรีทดสอบก่อนได้ (หรือตั้ง MQTT_BROKER=<IP> ถ้าลง Mosquitto ไว้เอง)
+MQTT_BROKER = os.environ.get("MQTT_BROKER", "test.mosquitto.org")
+MQTT_PORT = int(os.environ.get("MQTT_PORT", "1883"))
+MQTT_RECONNECT_DELAY = (1, 30)  # วินาที: ต่อใหม่อัตโนมัติ เริ่ม 1 s เพิ่มเท่าตัวจนถึง 30 s
+MQTT_TOPIC = "factory/compressor/data" # หัวข้อเดิม (บอร์ดรุ่นเก่า: device_id อยู่ใน payload)
+# หัวข้อแยกตามเครื่อง: factory/compressor/<device_id>/data (ดู ingest.py)
+MQTT_DEVICE_TOPICS = ingest.TOPIC_PATTERN
+INGEST_WORKERS = min(4, os.cpu_count() or 1)
+# บอร์ดจำลอง: MOCK_BOARD=0 เพื่อปิด (Gateway จริงที่มีบอร์ดส่งเข้ามาแล้ว)
+MOCK_ENABLED = os.environ.get("MOCK_BOARD", "1") != "0"
+# รูปแบบข้อความของบอร์ดจำลอง: "json" (เดิม) หรือ "binary" (wire.py) ฝั่งรับอ่านได้ทั้งสองแบบ
+MOCK_WIRE_FORMAT = os.environ.get("MOCK_WIRE_FORMAT", "json")
 
 # --- 2. Setup CORS ---
 app.add_middleware(
@@ -27,59 +49,198 @@ app.add_middleware(
 )
 
 # --- 3. Connection Manager (WebSocket Hub สำหรับ Frontend) ---
-class ConnectionManager:
-    def __init__(self):
-        self.active_connections: List[WebSocket] = []
+# แต่ละ client มี queue ของตัวเอง (ดู broadcast.py)
+manager = ConnectionManager()
 
-    async def connect(self, websocket: WebSocket):
-        await websocket.accept()
-        self.active_connections.append(websocket)
+# ตัวสรุปค่า min/max/mean/rms สำหรับ client ที่ขอรับแบบ 1Hz / 0.1Hz (ดู tiers.py)
+aggregator = tiers.TierAggregator()
 
-    def disconnect(self, websocket: WebSocket):
-        self.active_connections.remove(websocket)
+# state ล่าสุดของทุกเครื่อง + sample/event ล่าสุด -> snapshot ให้ Dashboard ที่เพิ่งเปิด (ดู fleet_state.py)
+fleet_state = FleetStateCache()
 
-    async def broadcast(self, data: dict):
-        for connection in self.active_connections:
-            try:
-                await connection.send_json(data)
-            except Exception:
-                pass
+def route_sample(data, payload):
+    """รันบน event loop: สะสมค่าลง aggregator / fleet state แล้วส่ง sample ดิบให้ client ที่ต้องการ"""
+    device_id = tiers.device_of(data)
+    aggregator.add(device_id, data)
+    fleet_state.add(data)
+    manager.publish_sample(device_id, payload, warning=tiers.is_warning(data), data=data)
 
-manager = ConnectionManager()
+# ลำดับต่อเครื่อง: window ที่รอโมเดลกลับมาช้ากว่าข้อความถัดไป -> พักข้อความที่ตามมาไว้ก่อน (ดู ingest.py)
+sequencer = ingest.DeviceSequencer()
+
+def route_samples(batch):
+    """รันบน event loop: ก้อน (data, payload, seq, row) จาก ingest worker / score_and_route
+    ส่งให้ client และบันทึกตามลำดับที่รับมาของแต่ละเครื่อง
+    row แปลง/ตรวจมาแล้ว (row_from_data) และส่งเข้า writer แบบไม่รอ (queue เต็ม = ทิ้งและนับใน writer)"""
+    ready = []
+    for data, payload, seq, row in batch:
+        ready.extend(sequencer.complete(tiers.device_of(data), seq, (data, payload, row)))
+    for data, payload, _ in ready:
+        route_sample(data, payload)
+    db_writer.submit_rows([row for _, _, row in ready if row is not None], wait=False)
+
+async def run_frame_publisher(period=ws_encoding.FRAME_PERIOD):
+    """ส่ง frame แบบ columnar / binary ให้ client ที่ขอ encoding นั้น ทุกๆ period วินาที"""
+    while True:
+        await asyncio.sleep(period)
+        manager.flush_frames()
+
+async def run_tier_publisher(tier, period):
+    """ส่งค่าสรุปของ tier นี้ทุกๆ period วินาที"""
+    while True:
+        await asyncio.sleep(period)
+        frames = aggregator.flush(tier)
+        if not manager.has_subscribers(tier):
+            continue
+        for device_id, frame in frames:
+            manager.publish_aggregate(tier, device_id, json.dumps(frame))
+
+# Writer สำหรับบันทึกข้อมูลแบบ batch (แทนการเปิด/ปิด DB ทุกข้อความ)
+db_writer = database.SQLiteBatchWriter()
+
+# โมเดลฝั่ง Gateway (เปิดใช้เมื่อมีไฟล์ ONNX และติดตั้ง onnxruntime แล้ว)
+inference_engine = InferenceEngine()
+
+# ring buffer ต่อเครื่อง: ประกอบ window 1024 / 50 step จากข้อมูลที่ไหลเข้ามา (เครื่องละ ingest worker เดียว)
+window_store = DeviceWindowStore()
+
+# ตัวกรองราคาถูกก่อนเข้าโมเดล: รันโมเดลเฉพาะ window ที่ผิดจาก baseline ของเครื่อง + heartbeat (ดู pregate.py)
+PREGATE_ENABLED = True
+pregate = PreGate()
+
+# RUL ที่กรองแล้วต่อเครื่อง (Kalman: level + slope) ให้วง RUL บน Dashboard ไม่กระโดด (ดู rul_trend.py)
+rul_tracker = RulTrendTracker()
+
+def smooth_rul(data):
+    """ใส่ rul_smooth / rul_low / rul_high / rul_slope / hours_to_threshold ลงข้อความ
+    ผลซ้ำจาก pre-gate ไม่นับเป็นค่าวัดใหม่ (แค่อ่านค่าที่เลื่อนตามเวลา)"""
+    device_id = tiers.device_of(data)
+    rul = data.get("rul_predict")
+    if rul is None or data.get("model_source") == "pregate":
+        estimate = rul_tracker.estimate(device_id)
+    else:
+        estimate = rul_tracker.update(device_id, rul)
+    attach_trend(data, estimate)
+    return estimate is not None
+
+async def score_and_route(data, seq, vib_window, sensor_window):
+    """รันบน event loop: ให้โมเดลทำนายจาก window ก่อน แล้วค่อยส่งต่อ/บันทึก"""
+    try:
+        result = await inference_engine.predict(vib_window, sensor_window)
+        attach_prediction(data, result)
+        pregate.report(tiers.device_of(data), result)
+    except Exception as e:
+        print(f"⚠️ Inference failed, keeping board values: {e}")
+    smooth_rul(data)
+    try:
+        row = database.row_from_data(data)
+    except (KeyError, TypeError, ValueError) as e:
+        row = None   # ยังส่งให้ Dashboard แต่ไม่บันทึก
+        ROWS_REJECTED.inc()
+        print(f"⚠️ Scored sample not persisted: {e!r}")
+    route_samples([(data, json.dumps(data), seq, row)])
+
+# --- Metrics (GET /metrics, ดู metrics.py) ---
+# ใช้แยกว่าช้าเพราะอะไร: Thread ของ paho (received vs ingest queue) / decode / SQLite (database.py)
+# / browser ที่ช้า (broadcast.py) / event loop ติด (loop lag)
+MQTT_RECEIVED = metrics.Counter("mqtt_messages_received_total", "MQTT messages received by the paho thread")
+DECODE_SECONDS = metrics.Histogram("mqtt_decode_seconds", "Payload decode time (JSON or binary wire frame)")
+ROWS_REJECTED = metrics.Counter("sqlite_rows_rejected_total", "Scored samples not persisted (row could not be built)")
+LOOP_LAG_SECONDS = metrics.Histogram("event_loop_lag_seconds", "asyncio event loop wake-up delay")
+EVENT_LOOP_PROBE_INTERVAL = 0.5
 
 # --- 4. MQTT Client Setup (พระเอกคนใหม่) ---
 mqtt_client = mqtt.Client()
 
-# ฟังก์ชันเมื่อต่อ MQTT ติด
+# ฟังก์ชันเมื่อต่อ MQTT ติด (รวมถึงตอนต่อใหม่หลังหลุด -> subscribe ใหม่ทุกครั้ง)
 def on_connect(client, userdata, flags, rc):
     print(f"📡 MQTT Connected with result code {rc}")
-    client.subscribe(MQTT_TOPIC) # รอฟังข้อมูลจากบอร์ด
+    subsystems["mqtt"] = "connected" if rc == 0 else f"refused: rc={rc}"
+    client.subscribe([(MQTT_TOPIC, 0), (MQTT_DEVICE_TOPICS, 0)]) # รอฟังข้อมูลจากบอร์ด
+
+def on_disconnect(client, userdata, rc):
+    if subsystems["mqtt"] != "stopped":
+        subsystems["mqtt"] = "reconnecting"
+        print(f"⚠️ MQTT disconnected (rc={rc}), reconnecting...")
 
-# ฟังก์ชันเมื่อมีข้อมูลเข้ามาจาก MQTT (Bridge Logic)
+# ฟังก์ชันเมื่อมีข้อมูลเข้ามาจาก MQTT: ทำงานบน Thread ของ paho -> แค่โยนเข้า queue ของ worker
 def on_message(client, userdata, msg):
-    try:
-        payload = msg.payload.decode()
-        data = json.loads(payload)
-        
-        # [สำคัญ] MQTT ทำงานคนละ Thread กับ FastAPI
-        # เราต้องใช้ loop ของ asyncio เพื่อส่งข้อมูลเข้า WebSocket
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
-        
-        # 1. ส่งต่อให้ Frontend (WebSocket)
-        # ใช้ run_coroutine_threadsafe เพื่อข้าม Thread อย่างปลอดภัย
-        asyncio.run_coroutine_threadsafe(manager.broadcast(data), main_loop)
-        
-        # 2. บันทึกลง Database
-        database.insert_data_sqlite(data)
-        
-        # print(f"Received from MQTT: {data['timestamp']}") # Debug ดูได้
-        
-    except Exception as e:
-        print(f"⚠️ Error processing MQTT message: {e}")
+    MQTT_RECEIVED.inc()
+    ingest_dispatcher.submit(ingest.shard_key(msg.topic, msg.payload), msg.payload)
+
+# Bridge Logic (รันใน ingest worker; เครื่องเดียวกันอยู่ worker เดียวกันเสมอ)
+def handle_message(device_key, raw):
+    """คืน (data, payload, seq, row) ที่จะส่งต่อ/บันทึก หรือ None ถ้าส่งให้โมเดลทำต่อ (score_and_route)"""
+    # JSON เดิม หรือ frame binary (wire.py: header + int16 vibration แบบ zero-copy)
+    start = time.perf_counter()
+    data = wire.decode(raw)
+    DECODE_SECONDS.observe(time.perf_counter() - start)
+    # JSON จากบอร์ดส่งต่อให้ Frontend ได้เลย / binary หรือข้อความที่ถูกแก้ค่อย encode ใหม่ตอนท้าย
+    payload = None if wire.is_binary(raw) else raw.decode()
+    if device_key and "device_id" not in data:
+        data["device_id"] = device_key  # device มาจาก topic
+        payload = None
+
+    # 0. ประกอบ window ให้โมเดลฝั่ง Gateway
+    #    - บอร์ดส่ง window มาครบ (vib_window + sensor_window) -> ใช้ได้เลย
+    #    - หรือส่ง block การสั่น 'vib' มาเรื่อยๆ -> ต่อเข้า ring buffer จนครบ hop
+    if "vib_window" in data and "sensor_window" in data:
+        windows = (data.pop("vib_window"), data.pop("sensor_window"))
+    else:
+        windows = window_store.ingest(tiers.device_of(data), data)
+    data.pop("vib_scale", None)
+    if data.pop("vib", None) is not None or windows is not None:
+        payload = None  # ตัด array ใหญ่ทิ้งก่อนส่งต่อ/บันทึก
+    if windows is not None and inference_engine.ready and main_loop is not None:
+        device_id = tiers.device_of(data)
+        if not PREGATE_ENABLED or pregate.check(device_id, *windows) is not None:
+            seq = sequencer.reserve(device_id)
+            asyncio.run_coroutine_threadsafe(score_and_route(data, seq, *windows), main_loop)
+            return None
+        # gate ผ่าน (ปกติ): ใช้ผลโมเดลล่าสุดของเครื่องนี้แทนการรันใหม่
+        cached = pregate.last_result(device_id)
+        if cached is not None:
+            attach_prediction(data, cached)
+            data["model_source"] = "pregate"
+            payload = None
+    if smooth_rul(data):
+        payload = None
+    if payload is None:
+        payload = json.dumps(data)
+    # แปลงเป็นแถวของ SQLite ที่นี่: ข้อความเสีย (ขาด field) ล้มเฉพาะตัวเอง -> dispatcher นับ error แล้วข้าม
+    # ไม่ไปล้มทั้งก้อนบน event loop
+    row = database.row_from_data(data)
+    return data, payload, sequencer.reserve(tiers.device_of(data)), row
+
+def forward_batch(batch):
+    """ส่งผลของ worker ทีละก้อน"""
+    # [สำคัญ] worker ทำงานคนละ Thread กับ FastAPI
+    # ส่งเข้า event loop ครั้งเดียวต่อก้อน: เรียงลำดับต่อเครื่อง -> ส่งต่อให้ Frontend (WebSocket)
+    # -> บันทึกลง Database (ข้อความที่ปล่อยได้ทั้งก้อนเป็น 1 item ของ writer queue)
+    if main_loop is not None:
+        main_loop.call_soon_threadsafe(route_samples, batch)
+    else:
+        db_writer.submit_rows([item[3] for item in batch])
+
+ingest_dispatcher = ingest.IngestDispatcher(handle_message, forward_batch, workers=INGEST_WORKERS)
+
+# ค่าที่อ่านตอน scrape (ไม่มีต้นทุนบน hot path)
+metrics.Gauge("websocket_connections", "Connected WebSocket clients", lambda: len(manager.channels))
+metrics.Gauge("ingest_queue_depth", "Messages waiting per ingest worker",
+              lambda: {str(i): depth for i, depth in enumerate(ingest_dispatcher.queue_depths())}, labelnames=("worker",))
+metrics.Gauge("ingest_dropped", "Messages dropped because the ingest queue was full",
+              lambda: ingest_dispatcher.dropped)
+metrics.Gauge("sqlite_writer_queue_depth", "Items waiting in the SQLite writer queue",
+              lambda: db_writer.qsize())
+metrics.Gauge("sqlite_writer_dropped", "Rows dropped because the SQLite writer queue was full",
+              lambda: db_writer.dropped)
+metrics.Gauge("ws_client_queue_depth", "Messages waiting per WebSocket client",
+              manager.queue_depths, labelnames=("client",))
 
 mqtt_client.on_connect = on_connect
+mqtt_client.on_disconnect = on_disconnect
 mqtt_client.on_message = on_message
+mqtt_client.reconnect_delay_set(*MQTT_RECONNECT_DELAY)
 
 # --- 5. Mock Data Generator (แก้ให้ส่งผ่าน MQTT แทน) ---
 def generate_mock_data():
@@ -103,58 +264,174 @@ async def run_mock_board_simulation_mqtt():
     print("🤖 Mock Simulation Started: Publishing to MQTT...")
     # สร้าง Client แยกอีกตัวสำหรับจำลองฝั่งส่ง (เหมือนเป็นบอร์ด ESP32)
     mock_sender = mqtt.Client()
-    mock_sender.connect(MQTT_BROKER, MQTT_PORT, 60)
-    
-    cleanup_counter = 0
+    mock_sender.reconnect_delay_set(*MQTT_RECONNECT_DELAY)
+    mock_sender.connect_async(MQTT_BROKER, MQTT_PORT, 60)  # ไม่บล็อก event loop (ต่อใน Thread ของ paho)
+    mock_sender.loop_start()
+    subsystems["mock"] = "running"
+    try:
+        await _publish_mock_data(mock_sender)
+    finally:
+        mock_sender.loop_stop()
+        mock_sender.disconnect()
+        subsystems["mock"] = "stopped"
+
+async def _publish_mock_data(mock_sender):
+    mock_topic = ingest.device_topic(tiers.DEFAULT_DEVICE_ID)
+    seq = 0
     while True:
         # 1. สร้างข้อมูล
         data = generate_mock_data()
         
-        # 2. ส่งขึ้น MQTT (บอร์ดจริงก็จะทำแบบนี้)
-        mock_sender.publish(MQTT_TOPIC, json.dumps(data))
-        
-        # 3. Auto Cleanup Database (Optional)
-        cleanup_counter += 1
-        if cleanup_counter >= 1000:
-            database.cleanup_old_sqlite_data()
-            cleanup_counter = 0
-            
+        # 2. ส่งขึ้น MQTT ลง topic ของเครื่อง (บอร์ดจริงก็จะทำแบบนี้)
+        if MOCK_WIRE_FORMAT == "binary":
+            mock_sender.publish(mock_topic, wire.encode(data, seq=seq))
+            seq += 1
+        else:
+            mock_sender.publish(mock_topic, json.dumps(data))
+
         await asyncio.sleep(0.1) # 10Hz
 
+# --- Retention (ลบข้อมูลเก่าตาม database.RETENTION_DAYS) ---
+# เดิมรันอยู่ใน loop ของบอร์ดจำลอง -> Gateway จริง (MOCK_BOARD=0) ไม่เคยลบอะไรเลย
+# แยกเป็น task ของตัวเอง รันตอนเริ่มและทุก RETENTION_INTERVAL วินาที
+# ลบไฟล์ shard / DELETE rollup เป็น I/O -> ทำใน executor ไม่ขวาง event loop
+RETENTION_INTERVAL = float(os.environ.get("RETENTION_INTERVAL", "3600"))
+
+async def run_retention(interval=RETENTION_INTERVAL):
+    loop = asyncio.get_running_loop()
+    while True:
+        try:
+            await loop.run_in_executor(None, database.cleanup_old_sqlite_data)
+            subsystems["retention"] = "ready"
+        except Exception as e:
+            subsystems["retention"] = f"failed: {e}"
+            print(f"⚠️ History Cleaner failed: {e}")
+        await asyncio.sleep(interval)
+
 # --- 6. Startup Event ---
+# endpoint ต้องตอบได้ทันทีหลัง process เริ่ม (rolling restart ของ Gateway < 1 วินาที):
+# งานที่ช้า/รอคนอื่น (ต่อ broker, โหลดโมเดล ONNX) ทำเป็น background แล้วรายงานสถานะผ่าน GET /ready
 # เก็บ Loop หลักไว้ใช้ตอน Bridge ข้อมูล
 main_loop = None 
 
+# สถานะของแต่ละส่วน (GET /ready)
+subsystems = {
+    "database": "starting",
+    "mqtt": "starting",
+    "inference": "disabled",
+    "mock": "disabled",
+    "retention": "starting",
+}
+# ส่วนที่ต้อง ready ก่อนจะรับ traffic (โมเดลไม่จำเป็น: ยังไม่พร้อมก็ใช้ค่าจากบอร์ดไปก่อน)
+READY_REQUIRES = tuple(
+    name.strip() for name in os.environ.get("READY_REQUIRES", "database,mqtt").split(",") if name.strip()
+)
+_background_tasks = set()
+
+def start_background(coro):
+    """create_task ที่เก็บ reference ไว้ (กัน task ถูก GC) และยกเลิกได้ตอน shutdown"""
+    task = asyncio.create_task(coro)
+    _background_tasks.add(task)
+    task.add_done_callback(_background_tasks.discard)
+    return task
+
+async def warm_inference():
+    """โหลดโมเดลสำหรับทำนายฝั่ง Gateway ใน background (ระหว่างนี้ handle_message ใช้ค่าจากบอร์ด)"""
+    subsystems["inference"] = "loading"
+    try:
+        await inference_engine.warm_start()
+    except Exception as e:
+        subsystems["inference"] = f"failed: {e}"
+        print(f"⚠️ Inference Engine disabled: {e}")
+        return
+    subsystems["inference"] = "ready"
+    print(f"🧠 Inference Engine Ready: {inference_engine.model_path}")
+
 @app.on_event("startup")
 async def startup_event():
     global main_loop
     main_loop = asyncio.get_running_loop()
     
-    # เริ่มต้น Database
+    # เริ่มต้น Database (สร้างตารางถ้ายังไม่มี: ไม่กี่ ms)
     database.init_db()
+    db_writer.start()
+    ingest_dispatcher.start()
+    subsystems["database"] = "ready"
     print("✅ System Ready: Database Initialized.")
 
-    # เริ่มเชื่อมต่อ MQTT (ฝั่งรับ)
-    mqtt_client.connect(MQTT_BROKER, MQTT_PORT, 60)
+    # ลบข้อมูลเก่าเสมอ ไม่ว่าจะเปิดบอร์ดจำลองหรือไม่ (สถานะอยู่ใน subsystems["retention"])
+    start_background(run_retention())
+
+    # เริ่มเชื่อมต่อ MQTT (ฝั่งรับ) แบบไม่รอ: DNS / TCP / ต่อใหม่เมื่อหลุด ทำใน Thread ของ paho
+    subsystems["mqtt"] = "connecting"
+    mqtt_client.connect_async(MQTT_BROKER, MQTT_PORT, 60)
     mqtt_client.loop_start() # รัน background thread รอรับข้อมูล
+
+    # โหลดโมเดล (ถ้ามีไฟล์) โดยไม่ขวาง endpoint
+    if os.path.exists(inference_engine.model_path):
+        start_background(warm_inference())
     
-    # รัน Mock Data (ฝั่งส่ง)
-    asyncio.create_task(run_mock_board_simulation_mqtt())
+    # วัด event-loop lag (ถ้า loop ติดงานหนัก ทั้ง WebSocket และ API จะช้าตาม)
+    start_background(metrics.monitor_event_loop(LOOP_LAG_SECONDS, EVENT_LOOP_PROBE_INTERVAL))
+
+    # ส่งค่าสรุปตามรอบของแต่ละ tier / frame ของ client ที่ขอ encoding แบบ columnar / binary
+    for tier, period in tiers.TIER_PERIODS.items():
+        start_background(run_tier_publisher(tier, period))
+    start_background(run_frame_publisher())
+
+    # รัน Mock Data (ฝั่งส่ง) ถ้าเปิดไว้
+    if MOCK_ENABLED:
+        subsystems["mock"] = "starting"
+        start_background(run_mock_board_simulation_mqtt())
 
 @app.on_event("shutdown")
 async def shutdown_event():
+    for task in list(_background_tasks):
+        task.cancel()
+    await asyncio.gather(*_background_tasks, return_exceptions=True)
+    subsystems["mqtt"] = "stopped"
+    subsystems["retention"] = "stopped"
     mqtt_client.loop_stop()
     mqtt_client.disconnect()
+    ingest_dispatcher.stop()
+    db_writer.stop()
+    await inference_engine.stop()
 
 # --- 7. WebSocket Endpoints ---
 
-# [Frontend] React ยังเข้ามาท่าเดิม ไม่ต้องแก้ React
+# [Frontend] React ยังเข้ามาท่าเดิมได้ (default = raw ทุกเครื่อง)
+# เลือก tier/เครื่องได้ผ่าน query เช่น /ws/frontend?tier=1hz&devices=compressor-01,compressor-02
+# หรือส่ง {"tier": "0.1hz", "devices": ["compressor-01"]} มาระหว่างเชื่อมต่อ
+# ข้อความแรกหลังเชื่อมต่อเป็น {"type": "snapshot", ...} จาก memory (ไม่แตะ SQLite) แล้วจึงเป็นข้อความสด
+# ประหยัดแบนด์วิดท์: ?encoding=columnar หรือ binary -> sample ดิบรวมเป็น frame ต่อ tick (ดู ws_encoding.py)
 @app.websocket("/ws/frontend")
 async def websocket_frontend(websocket: WebSocket):
-    await manager.connect(websocket)
+    params = websocket.query_params
+    await manager.connect(
+        websocket,
+        tier=tiers.parse_tier(params.get("tier")),
+        devices=tiers.parse_devices(params.get("devices")),
+        snapshot=fleet_state.snapshot_text,  # ข้อความแรก: state ปัจจุบันของทุกเครื่อง แล้วค่อยเป็นข้อความสด
+        encoding=ws_encoding.parse_encoding(params.get("encoding")),
+    )
     try:
         while True:
-            await websocket.receive_text()
+            text = await websocket.receive_text()
+            try:
+                request = json.loads(text)
+            except json.JSONDecodeError:
+                continue  # ping ธรรมดา
+            if not isinstance(request, dict):
+                continue
+            changes = {}
+            if "tier" in request:
+                changes["tier"] = tiers.parse_tier(request["tier"])
+            if "devices" in request:
+                changes["devices"] = tiers.parse_devices(request["devices"])
+            if "encoding" in request:
+                changes["encoding"] = ws_encoding.parse_encoding(request["encoding"])
+            if changes:
+                manager.subscribe(websocket, **changes)
     except WebSocketDisconnect:
         manager.disconnect(websocket)
 
@@ -162,4 +439,66 @@ async def websocket_frontend(websocket: WebSocket):
 
 @app.get("/")
 def read_root():
-    return {"status": "Running", "mode": "MQTT Bridge Mode"}
\ No newline at end of file
+    return {"status": "Running", "mode": "MQTT Bridge Mode"}
+
+@app.get("/api/stats")
+def read_stats():
+    return {
+        "ingest": ingest_dispatcher.stats(),
+        "ordering": sequencer.stats(),
+        "pregate": pregate.stats(),
+        "rul_trend": rul_tracker.stats(),
+        "inference": inference_engine.stats(),
+        "writer": db_writer.stats(),
+        "websocket": manager.stats(),
+        "fleet_state": fleet_state.stats(),
+    }
+
+# Readiness: 200 เมื่อส่วนที่จำเป็น (READY_REQUIRES) พร้อม ไม่งั้น 503 พร้อมสถานะของทุกส่วน
+@app.get("/ready")
+def read_ready():
+    ready = all(subsystems.get(name) in ("ready", "connected") for name in READY_REQUIRES)
+    return JSONResponse({"ready": ready, "requires": READY_REQUIRES, "subsystems": subsystems},
+                        status_code=200 if ready else 503)
+
+# Prometheus scrape: counter / histogram / gauge ของ hot path (ดู metrics.py)
+@app.get("/metrics")
+def read_metrics():
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
+
+# --- 8. History API (อ่านย้อนหลังจาก rollup / shard) ---
+# ตัวอย่าง: /api/history/compressor-01?start=2026-10-01T00:00:00&resolution=auto
+# หน้าถัดไป: ส่ง cursor=<next_cursor> จาก response ก่อนหน้า
+@app.get("/api/devices")
+def read_devices():
+    return {"devices": history.list_devices()}
+
+@app.get("/api/history/{device_id}")
+def read_history(device_id: str, start: str = None, end: str = None,
+                 resolution: str = history.RESOLUTION_AUTO,
+                 limit: int = history.DEFAULT_LIMIT, cursor: str = None):
+    try:
+        end_ms = history.parse_time(end, history.now_ms())
+        start_ms = history.parse_time(start, end_ms - 3_600_000)  # default: 1 ชั่วโมงล่าสุด
+    except ValueError:
+        raise HTTPException(status_code=400, detail="start/end must be epoch or ISO-8601 time")
+    try:
+        after = history.parse_cursor(cursor) if cursor is not None else None
+    except ValueError:
+        raise HTTPException(status_code=400, detail="cursor must be a next_cursor from a previous response")
+    if start_ms >= end_ms:
+        raise HTTPException(status_code=400, detail="start must be before end")
+    if resolution == history.RESOLUTION_AUTO:
+        resolution = history.choose_resolution(start_ms, end_ms)
+    if resolution not in history.RESOLUTIONS:
+        raise HTTPException(status_code=400, detail=f"resolution must be one of {history.RESOLUTIONS}")
+    start_ms = history.align_start(start_ms, resolution)
+    after_rowid = 0
+    if after is not None and after[0] >= start_ms:
+        start_ms, after_rowid = after
+    limit = max(1, min(limit, history.MAX_LIMIT))
+
+    return StreamingResponse(
+        history.stream_series(device_id, start_ms, end_ms, resolution, limit, after_rowid),
+        media_type="application/json",
+    )
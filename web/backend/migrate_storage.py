@@ -0,0 +1,84 @@
+# ==========================================
+# 🔁 Migration: sensor_summary (ตารางเดียว, timestamp TEXT) -> day shards
+# ==========================================
+# ย้ายข้อมูลจาก maintenance_logs.db รูปแบบเดิมไปเป็นไฟล์รายวันใน SHARD_DIR
+# รันจาก root ของ repo (หรือโฟลเดอร์ที่ backend รันอยู่):
+#   python -m web.backend.migrate_storage --db maintenance_logs.db
+# (สร้าง rollup 1s/1m/1h ให้ไปพร้อมกัน)
+# เสร็จแล้วตารางเดิมจะถูกเปลี่ยนชื่อเป็น sensor_summary_legacy (หรือลบทิ้งถ้าใส่ --drop-legacy)
+import argparse
+import sqlite3
+import time
+
+from . import database, rollups
+
+
+def migrate(db_path, shard_dir, device_id, chunk_size=50000, drop_legacy=False):
+    conn = sqlite3.connect(db_path)
+    exists = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type='table' AND name='sensor_summary'"
+    ).fetchone()
+    if not exists:
+        print(f"ℹ️ No legacy sensor_summary table in {db_path}, nothing to migrate.")
+        conn.close()
+        return 0, 0
+
+    for resolution in rollups.MAIN_RESOLUTIONS:
+        conn.executescript(rollups.schema(resolution))
+
+    store = database.ShardStore(shard_dir, max_open=4)
+    migrated = skipped = 0
+    last_id = 0
+    start = time.perf_counter()
+    while True:
+        rows = conn.execute(
+            "SELECT id, timestamp, ax, ay, az, temp, amp, rul_predict, status "
+            "FROM sensor_summary WHERE id > ? ORDER BY id LIMIT ?",
+            (last_id, chunk_size),
+        ).fetchall()
+        if not rows:
+            break
+        last_id = rows[-1][0]
+
+        batch = []
+        for _id, ts, ax, ay, az, temp, amp, rul, status in rows:
+            try:
+                ts_ms = database.to_epoch_ms(ts)
+            except (TypeError, ValueError):
+                skipped += 1
+                continue
+            batch.append((ts_ms, device_id, ax, ay, az, temp, amp, rul, status))
+        store.insert_rows(batch)
+        database.apply_main_rollups(conn, batch)
+        migrated += len(batch)
+        print(f"   ➡️ {migrated:,} rows migrated ({skipped} skipped)", end="\r")
+
+    store.close()
+    print()
+    if drop_legacy:
+        conn.execute("DROP TABLE sensor_summary")
+        conn.commit()
+        conn.execute("VACUUM")
+    else:
+        conn.execute("ALTER TABLE sensor_summary RENAME TO sensor_summary_legacy")
+        conn.commit()
+    conn.close()
+    print(f"✅ Migrated {migrated:,} rows in {time.perf_counter() - start:.1f}s "
+          f"(skipped {skipped} rows with unreadable timestamps)")
+    return migrated, skipped
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Migrate legacy sensor_summary rows into day shards")
+    parser.add_argument("--db", default=database.DB_NAME)
+    parser.add_argument("--shard-dir", default=database.SHARD_DIR)
+    parser.add_argument("--device", default=database.DEFAULT_DEVICE_ID,
+                        help="device id ที่จะใส่ให้แถวเก่า (ตารางเดิมไม่มีคอลัมน์ device)")
+    parser.add_argument("--chunk-size", type=int, default=50000)
+    parser.add_argument("--drop-legacy", action="store_true")
+    args = parser.parse_args()
+    migrate(args.db, args.shard_dir, args.device, args.chunk_size, args.drop_legacy)
+
+
+if __name__ == "__main__":
+    main()
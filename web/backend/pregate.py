@@ -0,0 +1,148 @@
+import threading
+import time
+
+import numpy as np
+
+from .inference import DIAG_LABELS
+
+# --- Pre-gate: คัดกรอง window ราคาถูกก่อนส่งเข้าโมเดลเต็ม (CNN+LSTM) ---
+# เครื่องส่วนใหญ่ปกติเกือบตลอดเวลา -> ไม่ต้องรันโมเดลทุก window
+# ต่อ window คำนวณ RMS / kurtosis / crest factor ของ vibration + อุณหภูมิล่าสุด (O(T) ไม่กี่ไมโครวินาที)
+# แล้วเทียบกับ baseline ของเครื่องนั้น (EWMA ของค่าเฉลี่ย/ความแปรปรวน) ส่งเข้าโมเดลเมื่อ:
+#   - warmup: ยังเรียน baseline ไม่ครบ
+#   - trip: ค่าใดค่าหนึ่งเบี่ยงเกิน Z_THRESHOLD หรือ kurtosis เกิน KURTOSIS_LIMIT (สัญญาณกระแทกของลูกปืน)
+#   - fault_hold: ผลโมเดลล่าสุดของเครื่องนี้ยังผิดปกติ (ติดตามต่อจนกลับมาปกติ)
+#   - heartbeat: ไม่ได้รันโมเดลเกิน HEARTBEAT_S วินาที (กัน baseline ค่อยๆ เลื่อนโดยไม่รู้ตัว)
+
+FEATURES = ("rms", "kurtosis", "crest", "temp")
+ALPHA = 0.02            # น้ำหนัก EWMA (~50 window ล่าสุด)
+WARMUP_WINDOWS = 50
+Z_THRESHOLD = 4.0
+KURTOSIS_LIMIT = 5.0    # สัญญาณปกติ ~3 (Gaussian)
+HEARTBEAT_S = 60.0
+MIN_STD = (0.01, 0.1, 0.05, 0.01)   # กัน baseline ที่นิ่งมากจน trip ง่ายเกินไป
+
+REASONS = ("warmup", "trip", "fault_hold", "heartbeat")
+
+
+def window_stats(vib_window, sensor_window=None):
+    """[rms, kurtosis, crest, temp] ของ window เดียว (temp = ค่าล่าสุดใน sensor window ถ้ามี)"""
+    x = np.asarray(vib_window, dtype=np.float32).ravel()
+    centered = x - x.mean()
+    sq = centered * centered
+    var = float(sq.mean())
+    rms = float(np.sqrt(var))
+    kurt = float((sq * sq).mean() / (var * var)) if var > 0 else 0.0
+    crest = float(np.abs(centered).max() / rms) if rms > 0 else 0.0
+    temp = np.nan
+    if sensor_window is not None:
+        s = np.asarray(sensor_window, dtype=np.float32)
+        if s.size:
+            temp = float(s.reshape(-1, s.shape[-1])[-1, 0])
+    return np.array([rms, kurt, crest, temp], dtype=np.float64)
+
+
+class _Baseline:
+    __slots__ = ("mean", "var", "count", "last_escalation", "fault")
+
+    def __init__(self, now):
+        self.mean = np.zeros(len(FEATURES))
+        self.var = np.zeros(len(FEATURES))
+        self.count = 0
+        self.last_escalation = now
+        self.fault = False
+
+    def update(self, x, alpha):
+        valid = ~np.isnan(x)
+        if self.count == 0:
+            self.mean[valid] = x[valid]
+        else:
+            # ช่วงแรกใช้ค่าเฉลี่ยธรรมดา (alpha = 1/n) แล้วค่อยเป็น EWMA
+            a = max(alpha, 1.0 / (self.count + 1))
+            delta = x[valid] - self.mean[valid]
+            self.mean[valid] += a * delta
+            self.var[valid] = (1 - a) * (self.var[valid] + a * delta * delta)
+        self.count += 1
+
+
+class PreGate:
+    """ตัดสินต่อ window ว่าต้องรันโมเดลเต็มหรือไม่ (state แยกตามเครื่อง)"""
+
+    def __init__(self, alpha=ALPHA, warmup=WARMUP_WINDOWS, z_threshold=Z_THRESHOLD,
+                 kurtosis_limit=KURTOSIS_LIMIT, heartbeat_s=HEARTBEAT_S, clock=time.monotonic):
+        self.alpha = alpha
+        self.warmup = warmup
+        self.z_threshold = z_threshold
+        self.kurtosis_limit = kurtosis_limit
+        self.heartbeat_s = heartbeat_s
+        self.clock = clock
+        self._min_std = np.asarray(MIN_STD)
+        self._devices = {}
+        self._last_results = {}
+        self._lock = threading.Lock()
+
+        # สถิติ
+        self.windows = 0
+        self.escalated = dict.fromkeys(REASONS, 0)
+        self.gate_seconds = 0.0
+
+    def check(self, device_id, vib_window, sensor_window=None):
+        """คืนเหตุผลที่ต้องรันโมเดล ('warmup' / 'trip' / 'fault_hold' / 'heartbeat') หรือ None = ข้ามได้"""
+        t0 = time.perf_counter()
+        now = self.clock()
+        x = window_stats(vib_window, sensor_window)
+        base = self._devices.get(device_id)
+        if base is None:
+            base = self._devices[device_id] = _Baseline(now)
+
+        reason = None
+        if base.count < self.warmup:
+            reason = "warmup"
+        else:
+            std = np.sqrt(base.var) + self._min_std
+            z = np.abs(x - base.mean) / std
+            if np.nanmax(z) > self.z_threshold or x[1] > self.kurtosis_limit:
+                reason = "trip"
+            elif base.fault:
+                reason = "fault_hold"
+            elif now - base.last_escalation >= self.heartbeat_s:
+                reason = "heartbeat"
+
+        if reason != "trip":
+            base.update(x, self.alpha)  # ไม่เรียนค่าที่ผิดปกติเข้า baseline
+        if reason is not None:
+            base.last_escalation = now
+
+        elapsed = time.perf_counter() - t0
+        with self._lock:
+            self.windows += 1
+            self.gate_seconds += elapsed
+            if reason is not None:
+                self.escalated[reason] += 1
+        return reason
+
+    def report(self, device_id, result):
+        """รับผลโมเดลกลับมา: จำไว้ใช้กับ window ที่ข้าม และคง fault_hold ไว้จนกว่าโมเดลบอกว่าปกติ"""
+        self._last_results[device_id] = result
+        base = self._devices.get(device_id)
+        if base is not None:
+            base.fault = result["diagnosis_label"] != DIAG_LABELS[0]
+
+    def last_result(self, device_id):
+        return self._last_results.get(device_id)
+
+    def stats(self):
+        with self._lock:
+            windows = self.windows
+            escalated = dict(self.escalated)
+            gate_seconds = self.gate_seconds
+        total = sum(escalated.values())
+        return {
+            "devices": len(self._devices),
+            "windows": windows,
+            "escalated": total,
+            "escalated_by_reason": escalated,
+            "escalation_rate": round(total / windows, 4) if windows else 0.0,
+            "gate_us_mean": round(gate_seconds / windows * 1e6, 2) if windows else 0.0,
+            "gate_seconds_total": round(gate_seconds, 3),
+        }
@@ -0,0 +1,109 @@
+# --- Pre-aggregated Rollups (1 วินาที / 1 นาที / 1 ชั่วโมง) ---
+# ทุกครั้งที่ writer flush ข้อมูลดิบ จะสรุปแถวใน batch เป็นก้อนตามช่วงเวลา (bucket)
+# แล้ว UPSERT รวมเข้ากับค่าที่มีอยู่ -> ตอน query ไม่ต้อง aggregate ข้อมูลดิบหลายล้านแถว
+#   1s : เก็บในไฟล์ shard รายวัน (ลบไปพร้อม shard)
+#   1m, 1h : เก็บในไฟล์หลัก (DB_NAME)
+
+FIELDS = ("ax", "ay", "az", "temp", "amp")
+RESOLUTIONS = {"1s": 1000, "1m": 60_000, "1h": 3_600_000}  # ขนาด bucket (ms)
+SHARD_RESOLUTIONS = ("1s",)
+MAIN_RESOLUTIONS = ("1m", "1h")
+RETENTION_DAYS = {"1m": 90, "1h": None}  # None = เก็บตลอด (1s ตามอายุของ shard)
+
+# ลำดับคอลัมน์ของค่าสรุป: n, (min, max, sum, sumsq) ต่อ field, rul_sum, status_max
+VALUE_COLUMNS = (
+    ["n"]
+    + [f"{f}_{stat}" for f in FIELDS for stat in ("min", "max", "sum", "sumsq")]
+    + ["rul_sum", "status_max"]
+)
+
+
+def table_name(resolution):
+    return f"sensor_rollup_{resolution}"
+
+
+def schema(resolution):
+    cols = ",\n        ".join(
+        f"{c} INTEGER" if c in ("n", "status_max") else f"{c} REAL" for c in VALUE_COLUMNS
+    )
+    table = table_name(resolution)
+    return f'''
+    CREATE TABLE IF NOT EXISTS {table} (
+        device TEXT NOT NULL,
+        bucket INTEGER NOT NULL,      -- epoch ms ของต้นช่วง
+        {cols},
+        PRIMARY KEY (device, bucket)
+    ) WITHOUT ROWID;
+    CREATE INDEX IF NOT EXISTS idx_{table}_bucket ON {table} (bucket);
+    '''
+
+
+def _merge_expr(col):
+    if col.endswith("_min"):
+        return f"{col} = min({col}, excluded.{col})"
+    if col.endswith("_max"):
+        return f"{col} = max({col}, excluded.{col})"
+    return f"{col} = {col} + excluded.{col}"
+
+
+def _upsert_sql(resolution):
+    cols = ", ".join(VALUE_COLUMNS)
+    marks = ", ".join("?" for _ in range(len(VALUE_COLUMNS) + 2))
+    updates = ", ".join(_merge_expr(c) for c in VALUE_COLUMNS)
+    return (f"INSERT INTO {table_name(resolution)} (device, bucket, {cols}) VALUES ({marks}) "
+            f"ON CONFLICT(device, bucket) DO UPDATE SET {updates}")
+
+
+UPSERT_SQL = {res: _upsert_sql(res) for res in RESOLUTIONS}
+
+
+def aggregate(rows, bucket_ms):
+    """สรุปแถว (ts, device, ax, ay, az, temp, amp, rul, status) เป็น {(device, bucket): partial}"""
+    partials = {}
+    for row in rows:
+        key = (row[1], row[0] - row[0] % bucket_ms)
+        p = partials.get(key)
+        if p is None:
+            p = [0]
+            for _ in FIELDS:
+                p += [float("inf"), float("-inf"), 0.0, 0.0]
+            p += [0.0, 0]
+            partials[key] = p
+        p[0] += 1
+        j = 1
+        for v in row[2:7]:
+            if v is None:   # บอร์ดไม่ได้วัด field นี้ (NULL ใน SQLite)
+                j += 4
+                continue
+            if v < p[j]:
+                p[j] = v
+            if v > p[j + 1]:
+                p[j + 1] = v
+            p[j + 2] += v
+            p[j + 3] += v * v
+            j += 4
+        if row[7] is not None:
+            p[j] += row[7]
+        if row[8] > p[j + 1]:
+            p[j + 1] = row[8]
+    return partials
+
+
+def upsert(conn, resolution, rows):
+    """รวมแถวดิบเข้าตาราง rollup ของ resolution นี้ (ต้องเรียกภายใน transaction ของผู้เรียก)"""
+    partials = aggregate(rows, RESOLUTIONS[resolution])
+    conn.executemany(UPSERT_SQL[resolution],
+                     [(device, bucket, *p) for (device, bucket), p in partials.items()])
+
+
+def cleanup(conn, now_ms):
+    """ลบ rollup ที่เก่ากว่าอายุที่กำหนด (ตารางเล็ก และมี index ที่ bucket)"""
+    removed = 0
+    for resolution in MAIN_RESOLUTIONS:
+        days = RETENTION_DAYS[resolution]
+        if days is None:
+            continue
+        cur = conn.execute(f"DELETE FROM {table_name(resolution)} WHERE bucket < ?",
+                           (now_ms - days * 86_400_000,))
+        removed += cur.rowcount
+    return removed
@@ -0,0 +1,159 @@
+import math
+import threading
+import time
+
+# --- RUL Trend (Kalman filter ต่อเครื่อง: ระดับ RUL + ความชันการเสื่อม) ---
+# rul_predict ที่ออกจากโมเดลแกว่งทีละข้อความ -> วง RUL บน Dashboard กระโดดไปมา
+# state ต่อเครื่อง = [level, slope] (ชั่วโมง, ชั่วโมง RUL ต่อชั่วโมงจริง) + covariance 2x2 + ค่า noise
+# อัปเดตทีละค่าที่เข้ามา (ไม่ต้องย้อนอ่าน history) ด้วย float ธรรมดา (ไม่กี่ µs ต่อครั้ง, ~250 ไบต์ต่อเครื่อง)
+#   predict: level += slope * dt, P += Q(dt)   (local linear trend, dt ตามเวลาจริงระหว่างข้อความ)
+#   update : เทียบกับ rul_predict ใหม่ -> Kalman gain
+# noise ของการวัด (R) ปรับเองจาก innovation (EWMA) -> โมเดลที่แกว่งมาก = band กว้าง / เชื่อค่าใหม่น้อยลง
+# ส่งต่อ: rul_smooth, rul_low / rul_high (±BAND_SIGMA σ), rul_slope, hours_to_threshold
+
+RUL_THRESHOLD = 100.0           # ชั่วโมง: ต่ำกว่านี้ = ต้องซ่อม (ตรงกับวงสีแดงบน Dashboard)
+LEVEL_DRIFT_STD = 10.0          # ชั่วโมง ต่อ sqrt(ชั่วโมง): level เปลี่ยนเองได้โดยไม่ผ่าน slope
+SLOPE_DRIFT_STD = 0.5           # (ชั่วโมง/ชั่วโมง) ต่อ sqrt(ชั่วโมง): ความเร็วการเสื่อมเปลี่ยนได้ช้าๆ
+INITIAL_MEASUREMENT_STD = 25.0  # ชั่วโมง: ความคลาดเคลื่อนของโมเดลก่อนเรียนจากข้อมูลจริง
+MIN_MEASUREMENT_STD = 1.0
+NOISE_ALPHA = 0.01              # น้ำหนัก EWMA ของ innovation² (~100 ค่าล่าสุด)
+INITIAL_SLOPE_STD = 2.0
+BAND_SIGMA = 2.0                # rul_low/rul_high = ±2σ (~95%)
+MIN_DEGRADATION = 1e-3          # slope ที่ชันน้อยกว่านี้ถือว่าไม่เสื่อม -> hours_to_threshold = None
+RESET_SIGMA = 8.0               # innovation เกินนี้ (เช่นเพิ่งเปลี่ยนอะไหล่) -> เริ่ม state ใหม่
+
+_SECONDS_PER_HOUR = 3600.0
+
+
+class _Trend:
+    __slots__ = ("level", "slope", "p00", "p01", "p11", "r", "t", "count")
+
+    def __init__(self, rul, now):
+        self.level = rul
+        self.slope = 0.0
+        self.p00 = INITIAL_MEASUREMENT_STD ** 2
+        self.p01 = 0.0
+        self.p11 = INITIAL_SLOPE_STD ** 2
+        self.r = INITIAL_MEASUREMENT_STD ** 2
+        self.t = now
+        self.count = 1
+
+
+class RulTrendTracker:
+    """ตัวกรอง RUL ต่อเครื่อง: update() ทุกครั้งที่มี rul_predict ใหม่ / estimate() อ่านค่า ณ ตอนนี้"""
+
+    def __init__(self, threshold=RUL_THRESHOLD, level_drift=LEVEL_DRIFT_STD, slope_drift=SLOPE_DRIFT_STD,
+                 noise_alpha=NOISE_ALPHA, clock=time.monotonic):
+        self.threshold = threshold
+        self.q_level = level_drift ** 2 / _SECONDS_PER_HOUR     # ต่อวินาที
+        self.q_slope = slope_drift ** 2 / _SECONDS_PER_HOUR
+        self.noise_alpha = noise_alpha
+        self.clock = clock
+        self._devices = {}
+        # ingest worker (เครื่องละ worker) กับ event loop (หลังโมเดลทำนาย) อาจอัปเดตเครื่องเดียวกันพร้อมกัน
+        self._lock = threading.Lock()
+
+        # สถิติ
+        self.updates = 0
+        self.resets = 0
+
+    def update(self, device_id, rul, now=None):
+        """ใส่ rul_predict ใหม่ของเครื่องนี้ คืน estimate หลังอัปเดต"""
+        if now is None:
+            now = self.clock()
+        rul = float(rul)
+        with self._lock:
+            s = self._devices.get(device_id)
+            if s is None:
+                s = self._devices[device_id] = _Trend(rul, now)
+                self.updates += 1
+                return self._estimate(s, 0.0)
+
+            # predict (เวลาเป็นชั่วโมง สำหรับ slope / วินาที สำหรับ Q ที่แปลงหน่วยไว้แล้ว)
+            dt_s = max(now - s.t, 0.0)
+            dt = dt_s / _SECONDS_PER_HOUR
+            level = s.level + s.slope * dt
+            qs = self.q_slope * dt_s
+            p00 = s.p00 + dt * (2 * s.p01 + dt * s.p11) + self.q_level * dt_s + qs * dt * dt / 3
+            p01 = s.p01 + dt * s.p11 + qs * dt / 2
+            p11 = s.p11 + qs
+
+            # update
+            innovation = rul - level
+            r = s.r
+            var = p00 + r
+            if innovation * innovation > RESET_SIGMA * RESET_SIGMA * var and s.count > 1:
+                self._devices[device_id] = s = _Trend(rul, now)
+                self.resets += 1
+                self.updates += 1
+                return self._estimate(s, 0.0)
+            k0 = p00 / var
+            k1 = p01 / var
+            s.level = level + k0 * innovation
+            s.slope += k1 * innovation
+            s.p00 = (1 - k0) * p00
+            s.p01 = (1 - k0) * p01
+            s.p11 = p11 - k1 * p01
+            # R ≈ E[innovation²] - P (ส่วนที่อธิบายด้วยความไม่แน่นอนของ state ไม่นับ)
+            s.r = max(r + self.noise_alpha * (innovation * innovation - var), MIN_MEASUREMENT_STD ** 2)
+            s.t = now
+            s.count += 1
+            self.updates += 1
+            return self._estimate(s, 0.0)
+
+    def estimate(self, device_id, now=None):
+        """ค่า ณ เวลานี้ (เลื่อนตาม slope โดยไม่เปลี่ยน state) หรือ None ถ้ายังไม่เคยเห็นเครื่องนี้"""
+        if now is None:
+            now = self.clock()
+        with self._lock:
+            s = self._devices.get(device_id)
+            if s is None:
+                return None
+            return self._estimate(s, max(now - s.t, 0.0))
+
+    def _estimate(self, s, dt_s):
+        if dt_s > 0:
+            dt = dt_s / _SECONDS_PER_HOUR
+            level = s.level + s.slope * dt
+            qs = self.q_slope * dt_s
+            p00 = s.p00 + dt * (2 * s.p01 + dt * s.p11) + self.q_level * dt_s + qs * dt * dt / 3
+        else:
+            level = s.level
+            p00 = s.p00
+        band = BAND_SIGMA * math.sqrt(p00)
+        if level <= self.threshold:
+            hours = 0.0
+        elif s.slope < -MIN_DEGRADATION:
+            hours = (level - self.threshold) / -s.slope
+        else:
+            hours = None
+        return {
+            "rul_smooth": level,
+            "rul_low": level - band,
+            "rul_high": level + band,
+            "rul_slope": s.slope,
+            "hours_to_threshold": hours,
+        }
+
+    def forget(self, device_id):
+        with self._lock:
+            self._devices.pop(device_id, None)
+
+    def stats(self):
+        return {
+            "devices": len(self._devices),
+            "updates": self.updates,
+            "resets": self.resets,
+        }
+
+
+def attach_trend(data, estimate):
+    """ใส่ค่าที่กรองแล้วลงข้อความ (ปัดให้สั้นก่อนส่งเป็น JSON)"""
+    if estimate is None:
+        return
+    data["rul_smooth"] = round(max(estimate["rul_smooth"], 0.0), 1)
+    data["rul_low"] = round(max(estimate["rul_low"], 0.0), 1)
+    data["rul_high"] = round(max(estimate["rul_high"], 0.0), 1)
+    data["rul_slope"] = round(estimate["rul_slope"], 3)
+    hours = estimate["hours_to_threshold"]
+    data["hours_to_threshold"] = None if hours is None else round(hours, 1)
@@ -0,0 +1,136 @@
+import math
+
+# --- Broadcast Rate Tiers ---
+# client เลือกได้ว่าจะรับข้อมูลแบบไหน
+#   raw   : ทุก sample (10 Hz ต่อเครื่อง) เหมือนเดิม
+#   1hz   : สรุป min/max/mean/rms ทุก 1 วินาที
+#   0.1hz : สรุปทุก 10 วินาที (จอใหญ่ในโรงงาน)
+# ข้อความที่เป็น Warning (status != 0) ส่งทันทีทุก tier ไม่ต้องรอรอบ
+
+TIER_RAW = "raw"
+TIER_PERIODS = {
+    "1hz": 1.0,
+    "0.1hz": 10.0,
+}
+TIERS = (TIER_RAW,) + tuple(TIER_PERIODS)
+
+AGG_FIELDS = ("ax", "ay", "az", "temp", "amp")
+TREND_FIELDS = ("rul_smooth", "rul_low", "rul_high", "rul_slope", "hours_to_threshold")
+DEFAULT_DEVICE_ID = "compressor-01"
+
+
+def device_of(data):
+    """อ่าน device id จากข้อความ (บอร์ดรุ่นเก่าไม่ได้ส่งมา ใช้ค่า default)"""
+    return str(data.get("device_id", DEFAULT_DEVICE_ID))
+
+
+def is_warning(data):
+    return data.get("status", 0) != 0
+
+
+def parse_tier(value):
+    return value if value in TIERS else TIER_RAW
+
+
+def parse_devices(value):
+    """'a,b,c' -> {'a','b','c'} ; ค่าว่าง = ทุกเครื่อง (None)"""
+    if not value:
+        return None
+    if isinstance(value, str):
+        value = value.split(",")
+    devices = {str(v).strip() for v in value if str(v).strip()}
+    return devices or None
+
+
+class RollingAggregate:
+    """สะสม count/min/max/sum/sum² ของแต่ละ field ภายใน 1 รอบ (O(1) ต่อ sample)
+    field ที่เป็น None (บอร์ดไม่ได้วัด) ไม่ถูกนับ -> แต่ละ field มี count ของตัวเอง"""
+
+    __slots__ = ("count", "counts", "mins", "maxs", "sums", "sumsq", "last", "max_status", "first_ts")
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        n = len(AGG_FIELDS)
+        self.count = 0
+        self.counts = [0] * n
+        self.mins = [math.inf] * n
+        self.maxs = [-math.inf] * n
+        self.sums = [0.0] * n
+        self.sumsq = [0.0] * n
+        self.last = None
+        self.max_status = 0
+        self.first_ts = None
+
+    def add(self, data):
+        for i, field in enumerate(AGG_FIELDS):
+            v = data.get(field)
+            if v is None:
+                continue
+            v = float(v)
+            self.counts[i] += 1
+            if v < self.mins[i]:
+                self.mins[i] = v
+            if v > self.maxs[i]:
+                self.maxs[i] = v
+            self.sums[i] += v
+            self.sumsq[i] += v * v
+        if self.count == 0:
+            self.first_ts = data.get("timestamp")
+        self.count += 1
+        self.last = data
+        self.max_status = max(self.max_status, data.get("status", 0))
+
+    def summary(self, device_id, tier):
+        n = self.count
+        frame = {
+            "type": "aggregate",
+            "tier": tier,
+            "device_id": device_id,
+            "timestamp": self.last.get("timestamp"),
+            "start": self.first_ts,
+            "count": n,
+            "rul_predict": self.last.get("rul_predict"),
+            "status": self.max_status,
+        }
+        # RUL ที่กรองแล้ว (rul_trend.py) เป็นค่า ณ sample ล่าสุดของรอบอยู่แล้ว
+        for field in TREND_FIELDS:
+            if field in self.last:
+                frame[field] = self.last[field]
+        for i, field in enumerate(AGG_FIELDS):
+            n = self.counts[i]
+            if n == 0:
+                frame[field] = None
+                continue
+            frame[field] = {
+                "min": round(self.mins[i], 4),
+                "max": round(self.maxs[i], 4),
+                "mean": round(self.sums[i] / n, 4),
+                "rms": round(math.sqrt(self.sumsq[i] / n), 4),
+            }
+        return frame
+
+
+class TierAggregator:
+    """ถือ RollingAggregate แยกตาม tier และเครื่อง (ใช้บน event loop thread เท่านั้น)"""
+
+    def __init__(self, periods=TIER_PERIODS):
+        self.periods = dict(periods)
+        self._aggs = {tier: {} for tier in self.periods}
+
+    def add(self, device_id, data):
+        for aggs in self._aggs.values():
+            agg = aggs.get(device_id)
+            if agg is None:
+                agg = aggs[device_id] = RollingAggregate()
+            agg.add(data)
+
+    def flush(self, tier):
+        """คืนรายการ (device_id, frame) ของรอบนี้ แล้วเริ่มนับรอบใหม่"""
+        frames = []
+        for device_id, agg in self._aggs[tier].items():
+            if agg.count:
+                frames.append((device_id, agg.summary(device_id, tier)))
+                agg.reset()
+        return frames
@@ -0,0 +1,161 @@
+import json
+import os
+import threading
+
+import numpy as np
+
+# --- Per-device Ring Buffers (ประกอบ input window ของโมเดลทีละ sample) ---
+# จอง memory ล่วงหน้าเป็น NumPy array ก้อนเดียวต่อชนิดข้อมูล (ไม่มี list โตไปเรื่อยๆ)
+# ใช้เทคนิค "เขียนซ้ำ 2 ตำแหน่ง" (i และ i+W) ทำให้ window ล่าสุดเป็น slice ต่อเนื่อง
+# buf[pos : pos+W] เสมอ -> ได้ view แบบ zero-copy ไม่ต้อง np.roll / concatenate
+# memory ต่อเครื่อง = 2*1024*4 + 2*50*2*4 ไบต์ ≈ 9 KB (1000 เครื่อง ≈ 9 MB)
+
+PARAMS_PATH = os.path.join("models", "preprocess_params.json")
+TIME_STEPS = 1024         # = TIME_STEPS ใน src/model.py
+SENSOR_TIME_STEPS = 50    # = SENSOR_TIME_STEPS ใน src/model.py
+STEP = 512                # hop: ออก window ใหม่ทุกๆ 512 sample ใหม่ (= STEP ตอนเทรน)
+
+DEFAULT_PARAMS = {
+    "vib_mean": 0.0,
+    "vib_std": 1.0,
+    "sensor_min": [0.0, 0.0],
+    "sensor_max": [1.0, 1.0],
+}
+
+
+def load_preprocess_params(path=PARAMS_PATH):
+    """อ่านค่า normalisation ที่ src/model.py บันทึกไว้ตอนเทรน"""
+    if not os.path.exists(path):
+        print(f"⚠️ {path} not found: streaming windows will not be normalised")
+        return dict(DEFAULT_PARAMS)
+    with open(path) as f:
+        params = dict(DEFAULT_PARAMS)
+        params.update(json.load(f))
+        return params
+
+
+def _ring_write(row, pos, width, values):
+    """เขียน values (ยาว <= width) ลง row ที่ตำแหน่ง pos แบบวนรอบ พร้อมเขียนซ้ำที่ +width"""
+    n = len(values)
+    first = min(n, width - pos)
+    row[pos:pos + first] = values[:first]
+    row[pos + width:pos + width + first] = values[:first]
+    if first < n:
+        rest = n - first
+        row[:rest] = values[first:]
+        row[width:width + rest] = values[first:]
+    return (pos + n) % width
+
+
+class DeviceWindowStore:
+    """ring buffer ของ vibration (1024) และ sensor (50 x 2) แยกตามเครื่อง
+    (แต่ละเครื่องถูกเขียนจาก ingest worker ตัวเดียวเสมอ จึงไม่ต้อง lock ตอน append)"""
+
+    def __init__(self, capacity=1000, time_steps=TIME_STEPS, sensor_steps=SENSOR_TIME_STEPS,
+                 hop=STEP, params=None):
+        params = params or load_preprocess_params()
+        self.capacity = capacity
+        self.time_steps = time_steps
+        self.sensor_steps = sensor_steps
+        self.hop = hop
+
+        self._vib = np.zeros((capacity, 2 * time_steps), dtype=np.float32)
+        self._sensor = np.zeros((capacity, 2 * sensor_steps, 2), dtype=np.float32)
+        self._vib_pos = np.zeros(capacity, dtype=np.int64)
+        self._vib_filled = np.zeros(capacity, dtype=np.int64)
+        self._since_emit = np.zeros(capacity, dtype=np.int64)
+        self._sensor_pos = np.zeros(capacity, dtype=np.int64)
+        self._sensor_filled = np.zeros(capacity, dtype=np.int64)
+        self._slots = {}
+        self._slot_lock = threading.Lock()  # ingest worker หลายตัวอาจจองเครื่องใหม่พร้อมกัน
+        self.rejected = 0
+
+        # normalise ตอนเขียน -> view ที่ได้พร้อมเข้าโมเดลทันที
+        self._vib_mean = np.float32(params["vib_mean"])
+        self._vib_scale = np.float32(1.0 / (params["vib_std"] + 1e-7))
+        sensor_min = np.asarray(params["sensor_min"], dtype=np.float32)
+        sensor_range = np.asarray(params["sensor_max"], dtype=np.float32) - sensor_min
+        self._sensor_min = sensor_min
+        self._sensor_scale = 1.0 / np.where(sensor_range == 0, 1.0, sensor_range).astype(np.float32)
+
+    @property
+    def memory_bytes(self):
+        return self._vib.nbytes + self._sensor.nbytes
+
+    def slot(self, device_id):
+        """คืน index ของเครื่อง (จองใหม่ถ้ายังไม่มี) หรือ None ถ้าเต็ม capacity"""
+        slot = self._slots.get(device_id)
+        if slot is None:
+            with self._slot_lock:
+                slot = self._slots.get(device_id)
+                if slot is None:
+                    if len(self._slots) >= self.capacity:
+                        self.rejected += 1
+                        return None
+                    slot = self._slots[device_id] = len(self._slots)
+        return slot
+
+    def append_vibration(self, slot, samples, scale=1.0):
+        """เพิ่ม sample การสั่น (block) คืนค่า True ถ้าครบ hop และมี window เต็มแล้ว
+        scale: ตัวคูณของ sample ดิบ (เช่น int16 จาก wire.py -> g) รวมกับ normalise ในขั้นเดียว"""
+        x = np.asarray(samples).reshape(-1)
+        if len(x) > self.time_steps:
+            x = x[-self.time_steps:]
+        x = x.astype(np.float32) * np.float32(scale * self._vib_scale) - self._vib_mean * self._vib_scale
+        self._vib_pos[slot] = _ring_write(self._vib[slot], int(self._vib_pos[slot]), self.time_steps, x)
+        self._vib_filled[slot] = min(self._vib_filled[slot] + len(x), self.time_steps)
+        self._since_emit[slot] += len(x)
+        if self._since_emit[slot] >= self.hop and self.ready(slot):
+            self._since_emit[slot] = 0
+            return True
+        return False
+
+    def append_sensor(self, slot, temp, amp):
+        """เพิ่ม 1 time step ของ [temperature, current] (O(1))
+        ค่าที่เป็น None (บอร์ดไม่ได้วัด) ใช้ค่าของ step ก่อนหน้าแทน ถ้ายังไม่มีเลยก็ข้าม step นี้"""
+        pos = int(self._sensor_pos[slot])
+        row = self._sensor[slot]
+        if temp is None or amp is None:
+            if self._sensor_filled[slot] == 0:
+                return
+            prev = row[(pos - 1) % self.sensor_steps]
+            value = (np.array((0.0 if temp is None else temp, 0.0 if amp is None else amp), dtype=np.float32)
+                     - self._sensor_min) * self._sensor_scale
+            if temp is None:
+                value[0] = prev[0]
+            if amp is None:
+                value[1] = prev[1]
+        else:
+            value = (np.array((temp, amp), dtype=np.float32) - self._sensor_min) * self._sensor_scale
+        row[pos] = value
+        row[pos + self.sensor_steps] = value
+        self._sensor_pos[slot] = (pos + 1) % self.sensor_steps
+        if self._sensor_filled[slot] < self.sensor_steps:
+            self._sensor_filled[slot] += 1
+
+    def ready(self, slot):
+        return (self._vib_filled[slot] >= self.time_steps
+                and self._sensor_filled[slot] >= self.sensor_steps)
+
+    def vibration_window(self, slot):
+        """view (1024, 1) ของ window ล่าสุด (ใช้ได้จนกว่าจะ append รอบถัดไป)"""
+        pos = int(self._vib_pos[slot])
+        return self._vib[slot, pos:pos + self.time_steps].reshape(self.time_steps, 1)
+
+    def sensor_window(self, slot):
+        """view (50, 2) ของ window ล่าสุด"""
+        pos = int(self._sensor_pos[slot])
+        return self._sensor[slot, pos:pos + self.sensor_steps]
+
+    def ingest(self, device_id, data):
+        """รับข้อความ 1 ชิ้นจากบอร์ด: temp/amp เป็น 1 step ของ sensor, 'vib' (ถ้ามี) เป็น block การสั่น
+        คืนค่า (vib_window, sensor_window) แบบ copy เมื่อถึงรอบ hop ไม่เช่นนั้นคืน None"""
+        slot = self.slot(device_id)
+        if slot is None:
+            return None
+        self.append_sensor(slot, data["temp"], data["amp"])
+        samples = data.get("vib")
+        if samples is None or not self.append_vibration(slot, samples, data.get("vib_scale", 1.0)):
+            return None
+        # copy เพราะ window จะถูกส่งข้าม thread ไปรอเข้า batch ขณะที่ buffer ยังถูกเขียนต่อ
+        return self.vibration_window(slot).copy(), self.sensor_window(slot).copy()
@@ -0,0 +1,109 @@
+import json
+import math
+import struct
+import time
+
+import numpy as np
+
+# --- Binary Wire Format (บอร์ด -> Backend ผ่าน MQTT) ---
+# JSON 1 object ต่อ sample ใช้ได้ที่ 10 Hz แต่ส่ง block การสั่นดิบ (1024 sample @ 48 kHz) ไม่ไหว
+# frame แบบ binary (little-endian) = header ขนาดคงที่ 64 ไบต์ + vibration int16 ต่อท้าย:
+#
+#   off  type      field
+#   0    2s        magic b"PM"
+#   2    u8        version (= 1)
+#   3    u8        flags (สำรอง)
+#   4    16s       device_id (ASCII เติม \0)
+#   20   i64       timestamp (epoch µs)
+#   28   u32       sequence number (ต่อเครื่อง วนรอบได้)
+#   32   6 x f32   ax, ay, az, temp, amp, rul_predict (NaN = ไม่มีค่า)
+#   56   u8        status
+#   57   u8        (padding)
+#   58   u16       n_vib: จำนวน sample การสั่นต่อท้าย header
+#   60   f32       vib_scale: ค่าจริง = int16 * vib_scale (g ต่อ LSB)
+#   64   n_vib x i16
+#
+# decode() รับได้ทั้ง frame นี้และ JSON เดิม (แยกด้วย magic: JSON ขึ้นต้นด้วย '{' เสมอ)
+# vibration ถูกคืนเป็น view จาก np.frombuffer (zero-copy) + vib_scale ให้ DeviceWindowStore แปลงทีเดียว
+
+MAGIC = b"PM"
+VERSION = 1
+HEADER = struct.Struct("<2sBB16sqI6fBxHf")
+SCALAR_FIELDS = ("ax", "ay", "az", "temp", "amp", "rul_predict")
+DEVICE_ID_BYTES = 16
+MAX_VIB_SAMPLES = 0xFFFF
+DEFAULT_VIB_SCALE = 1.0 / 2048   # ±16 g เต็มช่วง int16
+
+assert HEADER.size == 64
+
+
+def is_binary(payload):
+    return payload[:2] == MAGIC
+
+
+def encode(data, vib=None, vib_scale=DEFAULT_VIB_SCALE, seq=0, timestamp_us=None):
+    """dict แบบเดียวกับ JSON เดิม (+ device_id) -> frame binary
+    vib: float (จะถูก quantize ด้วย vib_scale) หรือ int16 array อยู่แล้ว"""
+    device = str(data.get("device_id", "")).encode("ascii")
+    if len(device) > DEVICE_ID_BYTES:
+        raise ValueError(f"device_id longer than {DEVICE_ID_BYTES} bytes: {device!r}")
+    if timestamp_us is None:
+        timestamp_us = time.time_ns() // 1000
+    if vib is None:
+        samples = b""
+        n_vib = 0
+    else:
+        vib = np.asarray(vib)
+        if vib.dtype != np.int16:
+            vib = np.clip(np.round(vib / vib_scale), -32768, 32767).astype(np.int16)
+        if len(vib) > MAX_VIB_SAMPLES:
+            raise ValueError(f"vibration block longer than {MAX_VIB_SAMPLES} samples")
+        samples = vib.astype("<i2", copy=False).tobytes()
+        n_vib = len(vib)
+    scalars = [data.get(f) for f in SCALAR_FIELDS]
+    header = HEADER.pack(
+        MAGIC, VERSION, 0, device, int(timestamp_us), seq & 0xFFFFFFFF,
+        *(math.nan if v is None else float(v) for v in scalars),
+        int(data.get("status", 0)), n_vib, vib_scale,
+    )
+    return header + samples
+
+
+def _scalar(v):
+    """float32 จาก header -> float ทศนิยมสั้นๆ หรือ None (NaN = ไม่มีค่า, JSON ส่ง NaN ไม่ได้)"""
+    return None if math.isnan(v) else round(v, 4)
+
+
+def decode_binary(payload):
+    if len(payload) < HEADER.size:
+        raise ValueError(f"binary frame too short ({len(payload)} bytes)")
+    (_magic, version, _flags, device, ts_us, seq,
+     ax, ay, az, temp, amp, rul, status, n_vib, vib_scale) = HEADER.unpack_from(payload)
+    if version != VERSION:
+        raise ValueError(f"unsupported wire version {version}")
+    if len(payload) != HEADER.size + 2 * n_vib:
+        raise ValueError(f"binary frame length {len(payload)} does not match n_vib={n_vib}")
+
+    # ปัด float32 กลับเป็นทศนิยมสั้นๆ (45.3 ไม่ใช่ 45.29999923706055) ก่อนส่งต่อเป็น JSON ให้ Frontend
+    data = {
+        "timestamp": ts_us / 1e6,   # epoch วินาที (database.to_epoch_ms รองรับ)
+        "seq": seq,
+        "ax": _scalar(ax), "ay": _scalar(ay), "az": _scalar(az),
+        "temp": _scalar(temp), "amp": _scalar(amp),
+        "rul_predict": _scalar(rul),
+        "status": status,
+    }
+    device = device.rstrip(b"\0")
+    if device:
+        data["device_id"] = device.decode("ascii")
+    if n_vib:
+        data["vib"] = np.frombuffer(payload, dtype="<i2", count=n_vib, offset=HEADER.size)
+        data["vib_scale"] = vib_scale
+    return data
+
+
+def decode(payload):
+    """payload ของ MQTT (bytes) -> dict: frame binary หรือ JSON รูปแบบเดิม"""
+    if is_binary(payload):
+        return decode_binary(payload)
+    return json.loads(payload)
@@ -0,0 +1,158 @@
+import abc
+import json
+import math
+import struct
+import time
+
+import numpy as np
+
+from .database import to_epoch_ms
+from .tiers import device_of
+
+# --- WebSocket Frame Encoding (Backend -> Dashboard) ---
+# JSON เดิม: 1 object ต่อ sample ต่อเครื่อง ซ้ำ key เดิมทุกข้อความ -> แบนด์วิดท์ไปไซต์ที่อยู่ไกลหมดไปกับชื่อ field
+# client เลือกได้ตอนเชื่อมต่อ /ws/frontend?encoding=...
+#   json     : แบบเดิม (default)
+#   columnar : JSON 1 frame ต่อ tick (FRAME_PERIOD) รวมทุกเครื่อง แยกเป็นคอลัมน์ + ส่งเฉพาะค่าที่เปลี่ยน
+#   binary   : เหมือน columnar แต่เป็น typed array (Frontend อ่านด้วย Float32Array ได้ตรงๆ ดู wsCodec.js)
+# ค่าที่ไม่ได้ส่ง = เท่าค่าก่อนหน้าของเครื่องนั้น ทุก KEYFRAME_INTERVAL tick (และเมื่อมี client ใหม่ในกลุ่ม) ส่งครบทุกค่า
+# encode ครั้งเดียวต่อกลุ่ม (encoding + รายชื่อเครื่องเดียวกัน) ไม่ใช่ต่อ client
+# permessage-deflate: uvicorn เปิดให้อยู่แล้วถ้า browser ขอ (ใช้ได้กับทุก encoding, ดู benchmarks/bench_ws_encoding.py)
+#
+# binary frame (little-endian, offset ของแต่ละ array ชิดขอบตามขนาด element):
+#   0   2s   magic b"PF"
+#   2   u8   version (= 1)
+#   3   u8   flags (bit 0 = keyframe)
+#   4   u16  n_rows
+#   6   u16  n_devices
+#   8   u32  seq
+#   12  device table: n_devices x (u8 len + utf-8)  -> เติม 0 ให้ถึงขอบ 8
+#       f64[n_rows]  timestamp (epoch ms)
+#       u16[n_rows]  index ของเครื่องในตาราง       -> เติมให้ถึงขอบ 4
+#       ต่อ field ใน FRAME_FIELDS: u32 count, u16[count] row index (เติมให้ถึงขอบ 4), f32[count] ค่า (NaN = None)
+
+ENCODING_JSON = "json"
+ENCODING_COLUMNAR = "columnar"
+ENCODING_BINARY = "binary"
+ENCODINGS = (ENCODING_JSON, ENCODING_COLUMNAR, ENCODING_BINARY)
+
+FRAME_PERIOD = 0.1          # วินาที: 1 frame ต่อ tick (10 Hz เท่ากับอัตราของบอร์ด)
+KEYFRAME_INTERVAL = 50      # tick (~5 วินาที)
+FRAME_FIELDS = ("ax", "ay", "az", "temp", "amp", "rul_predict", "status",
+                "rul_smooth", "rul_low", "rul_high", "hours_to_threshold")
+
+MAGIC = b"PF"
+VERSION = 1
+FLAG_KEYFRAME = 1
+HEADER = struct.Struct("<2sBBHHI")
+MAX_ROWS = 0xFFFF
+
+
+def parse_encoding(value):
+    return value if value in ENCODINGS else ENCODING_JSON
+
+
+def _timestamp_ms(data):
+    ts = data.get("timestamp")
+    try:
+        return to_epoch_ms(ts) if ts is not None else int(time.time() * 1000)
+    except (TypeError, ValueError):
+        return int(time.time() * 1000)
+
+
+def _pad(buf, align):
+    buf.extend(b"\0" * (-len(buf) % align))
+
+
+class FrameEncoder(abc.ABC):
+    """encode sample ของ 1 tick เป็น frame (state ของค่าล่าสุดต่อเครื่อง -> ส่งเฉพาะค่าที่เปลี่ยน)"""
+
+    def __init__(self, keyframe_interval=KEYFRAME_INTERVAL):
+        self.keyframe_interval = keyframe_interval
+        self.keyframe_pending = True
+        self.seq = 0
+        self._last = {}   # device_id -> list ค่าล่าสุดตาม FRAME_FIELDS
+
+    def request_keyframe(self):
+        self.keyframe_pending = True
+
+    def _columns(self, samples):
+        """-> (keyframe, devices, dev index ต่อแถว, timestamp ms ต่อแถว, {field: (rows, values)})"""
+        keyframe = self.keyframe_pending or self.seq % self.keyframe_interval == 0
+        self.keyframe_pending = False
+        if keyframe:
+            self._last = {}
+        devices = {}
+        dev = []
+        ts = []
+        changed = {f: ([], []) for f in FRAME_FIELDS}
+        for row, data in enumerate(samples):
+            device_id = device_of(data)
+            dev.append(devices.setdefault(device_id, len(devices)))
+            ts.append(_timestamp_ms(data))
+            values = [data.get(f) for f in FRAME_FIELDS]
+            last = self._last.get(device_id)
+            for i, value in enumerate(values):
+                if last is None or last[i] != value:
+                    rows, vals = changed[FRAME_FIELDS[i]]
+                    rows.append(row)
+                    vals.append(value)
+            self._last[device_id] = values
+        self.seq += 1
+        return keyframe, list(devices), dev, ts, changed
+
+    @abc.abstractmethod
+    def encode(self, samples):
+        """list ของ sample 1 tick -> frame (str หรือ bytes)"""
+
+
+class ColumnarEncoder(FrameEncoder):
+    """frame เป็น JSON text: {"type": "columnar", "devices": [...], "dev": [...], "ts": [...], "cols": {field: [rows, values]}}"""
+
+    def encode(self, samples):
+        keyframe, devices, dev, ts, changed = self._columns(samples)
+        return json.dumps({
+            "type": "columnar",
+            "seq": self.seq - 1,
+            "key": int(keyframe),
+            "devices": devices,
+            "dev": dev,
+            "ts": ts,
+            "cols": {f: [rows, vals] for f, (rows, vals) in changed.items() if rows},
+        }, separators=(",", ":"))
+
+
+class BinaryEncoder(FrameEncoder):
+    """frame เป็น bytes ตาม layout ด้านบน"""
+
+    def encode(self, samples):
+        samples = samples[:MAX_ROWS]
+        keyframe, devices, dev, ts, changed = self._columns(samples)
+        buf = bytearray(HEADER.pack(MAGIC, VERSION, FLAG_KEYFRAME if keyframe else 0,
+                                    len(samples), len(devices), (self.seq - 1) & 0xFFFFFFFF))
+        for device_id in devices:
+            name = device_id.encode()[:255]
+            buf.append(len(name))
+            buf.extend(name)
+        _pad(buf, 8)
+        buf.extend(np.asarray(ts, dtype="<f8").tobytes())
+        buf.extend(np.asarray(dev, dtype="<u2").tobytes())
+        _pad(buf, 4)
+        for field in FRAME_FIELDS:
+            rows, vals = changed[field]
+            buf.extend(struct.pack("<I", len(rows)))
+            if rows:
+                buf.extend(np.asarray(rows, dtype="<u2").tobytes())
+                _pad(buf, 4)
+                buf.extend(np.asarray([math.nan if v is None else v for v in vals], dtype="<f4").tobytes())
+        return bytes(buf)
+
+
+ENCODERS = {
+    ENCODING_COLUMNAR: ColumnarEncoder,
+    ENCODING_BINARY: BinaryEncoder,
+}
+
+
+def make_encoder(encoding):
+    return ENCODERS[encoding]()
@@ -1,4 +1,5 @@
 import React, { useState, useEffect, useRef } from 'react';
+import { createFrameDecoder } from './wsCodec';
 
 const App = () => {
   const [logs, setLogs] = useState([]);
@@ -9,18 +10,68 @@ const App = () => {
   // ค่า Threshold (เกณฑ์อันตราย)
   const THRESHOLDS = { vibration: 1.2, temp: 60.0, amp: 5.0 };
 
+  // ข้อความแบบสรุป (tier 1hz / 0.1hz) -> แปลงเป็นรูปเดียวกับ sample ปกติ
+  // แกนสั่นใช้ค่า peak (min/max ที่ห่างจาก 0 มากสุด) เพื่อไม่ให้ค่าเฉลี่ยกลบ spike
+  // field ที่ไม่มีค่าทั้งรอบมาเป็น null
+  const flattenAggregate = (frame) => {
+    const peak = (f) => (f == null ? null : Math.abs(f.max) >= Math.abs(f.min) ? f.max : f.min);
+    return {
+      ...frame,
+      ax: peak(frame.ax), ay: peak(frame.ay), az: peak(frame.az),
+      temp: frame.temp?.mean ?? null, amp: frame.amp?.mean ?? null,
+    };
+  };
+
+  // Logic ตรวจจับความผิดปกติ (รวมแกน Z แล้ว)
+  const detectIssue = (json) => {
+    if (Math.abs(json.ax) > THRESHOLDS.vibration || Math.abs(json.ay) > THRESHOLDS.vibration || Math.abs(json.az) > THRESHOLDS.vibration) return "High Vibration Detected";
+    if (json.temp > THRESHOLDS.temp) return "Temp Elevated > 60°C";
+    if (json.amp > THRESHOLDS.amp) return "Motor Overcurrent";
+    return null;
+  };
+
+  const toLog = (json, issue, time) => ({
+    time,
+    status: issue ? "WARNING" : "NORMAL",
+    message: issue ? issue : "Routine check. All parameters within optimal range.",
+    rul: json.rul_smooth ?? json.rul_predict
+  });
+
+  // frame แรกหลังเชื่อมต่อ: state ล่าสุดของทุกเครื่อง + event ผิดปกติล่าสุดจาก Backend (แสดงได้ทันทีไม่ต้องรอ MQTT)
+  const applySnapshot = (snapshot) => {
+    const latest = Object.values(snapshot.devices).map((d) => d.latest);
+    if (latest.length === 0) return;
+    const json = latest[latest.length - 1];
+    const issue = detectIssue(json);
+    setStatus(issue ? "WARNING" : "OPTIMAL");
+    setCurrent(json);
+    setLogs(snapshot.events.slice(-10).reverse().map((e) => {
+      const time = e.timestamp ? new Date(typeof e.timestamp === "number" ? e.timestamp * 1000 : e.timestamp) : null;
+      const label = time && !isNaN(time) ? time.toLocaleTimeString('en-US', { hour12: false }) : "—";
+      return toLog(e, detectIssue(e) || "Abnormal status reported by board", label);
+    }));
+  };
+
   useEffect(() => {
-    ws.current = new WebSocket("ws://localhost:8000/ws/frontend");
+    // ส่งต่อ ?tier=1hz&devices=...&encoding=binary จาก URL ของหน้าเว็บไปที่ WebSocket (จอ Wall display / ไซต์ที่เน็ตช้า)
+    ws.current = new WebSocket(`ws://localhost:8000/ws/frontend${window.location.search}`);
+    ws.current.binaryType = "arraybuffer"; // encoding=binary -> อ่านเป็น typed array (wsCodec.js)
     ws.current.onopen = () => console.log("✅ Connected");
+    const decode = createFrameDecoder();
 
     ws.current.onmessage = (event) => {
-      const json = JSON.parse(event.data);
+      // JSON เดิม = 1 ข้อความ / columnar หรือ binary = หลาย sample ต่อ frame (ทุกเครื่องใน tick เดียวกัน)
+      for (const raw of decode(event.data)) handleMessage(raw);
+    };
+
+    const handleMessage = (raw) => {
+      if (raw.type === "snapshot") {
+        applySnapshot(raw);
+        return;
+      }
+      const json = raw.type === "aggregate" ? flattenAggregate(raw) : raw;
 
-      // Logic ตรวจจับความผิดปกติ (รวมแกน Z แล้ว)
-      let issue = null;
-      if (Math.abs(json.ax) > THRESHOLDS.vibration || Math.abs(json.ay) > THRESHOLDS.vibration || Math.abs(json.az) > THRESHOLDS.vibration) issue = "High Vibration Detected";
-      else if (json.temp > THRESHOLDS.temp) issue = "Temp Elevated > 60°C";
-      else if (json.amp > THRESHOLDS.amp) issue = "Motor Overcurrent";
+      const issue = detectIssue(json);
 
       setStatus(issue ? "WARNING" : "OPTIMAL");
       setCurrent(json);
@@ -28,12 +79,7 @@ const App = () => {
       // อัปเดต Log (สุ่มเก็บ หรือเก็บเมื่อมีปัญหา)
       if (issue || Math.random() > 0.95) {
         setLogs((prev) => {
-          const newLog = {
-            time: new Date().toLocaleTimeString('en-US', { hour12: false }),
-            status: issue ? "WARNING" : "NORMAL",
-            message: issue ? issue : "Routine check. All parameters within optimal range.",
-            rul: json.rul_predict
-          };
+          const newLog = toLog(json, issue, new Date().toLocaleTimeString('en-US', { hour12: false }));
           return [newLog, ...prev].slice(0, 10);
         });
       }
@@ -43,10 +89,12 @@ const App = () => {
 
   if (!current) return <div className="min-h-screen flex items-center justify-center bg-slate-50 text-primary font-bold animate-pulse">Initializing Dashboard...</div>;
 
-  // คำนวณวงกลม RUL
+  // คำนวณวงกลม RUL (ใช้ค่าที่ Backend กรองแล้ว rul_smooth ถ้ามี ไม่งั้นใช้ค่าดิบจากโมเดล)
+  const rul = current.rul_smooth ?? current.rul_predict;
+  const hasBand = current.rul_low != null && current.rul_high != null;
   const maxRul = 500;
   const circleDashArray = 283;
-  const circleOffset = circleDashArray - ((current.rul_predict / maxRul) * circleDashArray);
+  const circleOffset = circleDashArray - ((Math.min(rul, maxRul) / maxRul) * circleDashArray);
 
   // เช็คว่ามีการสั่นผิดปกติหรือไม่ (รวม 3 แกน)
   const isVibrationHigh = Math.abs(current.ax) > THRESHOLDS.vibration ||
@@ -119,32 +167,40 @@ const App = () => {
                     <circle
                       className="drop-shadow-lg transition-all duration-1000 ease-out"
                       cx="50" cy="50" fill="none" r="45"
-                      stroke={current.rul_predict < 100 ? "#ef4444" : "#135bec"}
+                      stroke={rul < 100 ? "#ef4444" : "#135bec"}
                       strokeDasharray="283"
                       strokeDashoffset={circleOffset}
                       strokeLinecap="round" strokeWidth="8"
                     ></circle>
                   </svg>
                   <div className="absolute inset-0 flex flex-col items-center justify-center text-center">
-                    <span className="text-5xl font-extrabold text-slate-800 font-mono tracking-tighter">{current.rul_predict}</span>
+                    <span className="text-5xl font-extrabold text-slate-800 font-mono tracking-tighter">{Math.round(rul)}</span>
                     <span className="text-sm text-slate-500 font-bold uppercase tracking-widest mt-1">Hours</span>
+                    {hasBand && (
+                      <span className="text-xs text-slate-400 font-mono mt-1">{Math.round(current.rul_low)}–{Math.round(current.rul_high)} h</span>
+                    )}
                   </div>
                 </div>
               </div>
 
               <div className="mt-8 bg-slate-50 rounded-lg p-4 border border-slate-200 z-10">
                 <div className="flex items-start gap-3">
-                  <span className={`material-symbols-outlined mt-0.5 ${current.rul_predict < 100 ? "text-danger" : "text-success"}`}>
-                    {current.rul_predict < 100 ? "warning" : "check_circle"}
+                  <span className={`material-symbols-outlined mt-0.5 ${rul < 100 ? "text-danger" : "text-success"}`}>
+                    {rul < 100 ? "warning" : "check_circle"}
                   </span>
                   <div>
                     <p className="text-sm font-bold text-slate-800 mb-1">AI Recommendation</p>
                     <p className="text-sm text-slate-600 leading-relaxed">
-                      {current.rul_predict > 100
+                      {rul > 100
                         ? <><span className="text-green-600 font-semibold">Healthy Condition:</span> No immediate maintenance required.</>
                         : <><span className="text-red-600 font-semibold">Maintenance Required:</span> Schedule inspection immediately.</>
                       }
                     </p>
+                    {current.hours_to_threshold != null && current.hours_to_threshold > 0 && (
+                      <p className="text-xs text-slate-500 mt-1">
+                        Trend reaches maintenance threshold in ~{Math.round(current.hours_to_threshold)} h
+                      </p>
+                    )}
                   </div>
                 </div>
               </div>
@@ -287,7 +343,7 @@ const App = () => {
                         {log.message}
                       </div>
                     </td>
-                    <td className="px-6 py-4 text-right text-slate-900 font-mono font-semibold">{log.rul} hrs</td>
+                    <td className="px-6 py-4 text-right text-slate-900 font-mono font-semibold">{Math.round(log.rul)} hrs</td>
                   </tr>
                 ))}
               </tbody>
@@ -0,0 +1,88 @@
+// ตัวถอด frame จาก /ws/frontend (คู่กับ web/backend/ws_encoding.py)
+//   json     : 1 object ต่อข้อความ (แบบเดิม)
+//   columnar : {"type": "columnar", devices, dev, ts, cols: {field: [rows, values]}}
+//   binary   : ArrayBuffer (ต้องตั้ง ws.binaryType = "arraybuffer") อ่านเป็น typed array ตรงๆ
+// ค่าที่ frame ไม่ได้ส่ง = ค่าก่อนหน้าของเครื่องนั้น -> decoder จำค่าล่าสุดต่อเครื่องไว้ แล้วคืนเป็น object เต็มเหมือน JSON เดิม
+
+export const FRAME_FIELDS = ["ax", "ay", "az", "temp", "amp", "rul_predict", "status",
+  "rul_smooth", "rul_low", "rul_high", "hours_to_threshold"];
+
+const MAGIC = 0x4650; // "PF" (little-endian)
+const HEADER_BYTES = 12;
+const align = (offset, n) => offset + ((n - (offset % n)) % n);
+const textDecoder = new TextDecoder();
+
+// binary frame -> typed array (ไม่ copy ค่าตัวเลข) { keyframe, seq, devices, ts: Float64Array, dev: Uint16Array, cols }
+export const decodeBinaryFrame = (buffer) => {
+  const view = new DataView(buffer);
+  if (view.getUint16(0, true) !== MAGIC) throw new Error("not a binary frame");
+  const flags = view.getUint8(3);
+  const nRows = view.getUint16(4, true);
+  const nDevices = view.getUint16(6, true);
+  const seq = view.getUint32(8, true);
+
+  let offset = HEADER_BYTES;
+  const bytes = new Uint8Array(buffer);
+  const devices = [];
+  for (let i = 0; i < nDevices; i++) {
+    const len = bytes[offset];
+    devices.push(textDecoder.decode(bytes.subarray(offset + 1, offset + 1 + len)));
+    offset += 1 + len;
+  }
+  offset = align(offset, 8);
+  const ts = new Float64Array(buffer, offset, nRows);
+  offset += nRows * 8;
+  const dev = new Uint16Array(buffer, offset, nRows);
+  offset = align(offset + nRows * 2, 4);
+
+  const cols = {};
+  for (const field of FRAME_FIELDS) {
+    const count = view.getUint32(offset, true);
+    offset += 4;
+    if (count === 0) continue;
+    const rows = new Uint16Array(buffer, offset, count);
+    offset = align(offset + count * 2, 4);
+    const values = new Float32Array(buffer, offset, count);
+    offset += count * 4;
+    cols[field] = [rows, values];
+  }
+  return { keyframe: (flags & 1) === 1, seq, devices, ts, dev, cols };
+};
+
+// ปัด float32 กลับเป็นทศนิยมสั้นๆ (45.3 ไม่ใช่ 45.29999923706055) และ NaN -> null
+const fromFloat32 = (v) => (Number.isNaN(v) ? null : Math.round(v * 1e4) / 1e4);
+
+export const createFrameDecoder = () => {
+  const last = new Map(); // device_id -> object ล่าสุด
+
+  // ไล่ทีละแถวตามลำดับ: เริ่มจากค่าล่าสุดของเครื่องนั้น แล้วทับด้วยค่าที่ frame ส่งมาในแถวนี้
+  // (row index ของแต่ละคอลัมน์เรียงจากน้อยไปมาก -> ใช้ cursor ต่อคอลัมน์ O(แถว x field))
+  const expand = ({ keyframe, devices, dev, ts, cols }, binary) => {
+    if (keyframe) last.clear();
+    const fields = Object.keys(cols);
+    const cursor = new Array(fields.length).fill(0);
+    const rows = new Array(dev.length);
+    for (let r = 0; r < dev.length; r++) {
+      const deviceId = devices[dev[r]];
+      const row = { ...(last.get(deviceId) || { device_id: deviceId }), timestamp: ts[r] / 1000 };
+      for (let f = 0; f < fields.length; f++) {
+        const [idx, values] = cols[fields[f]];
+        if (idx[cursor[f]] === r) {
+          const v = values[cursor[f]++];
+          row[fields[f]] = binary ? fromFloat32(v) : v;
+        }
+      }
+      last.set(deviceId, row);
+      rows[r] = row;
+    }
+    return rows;
+  };
+
+  // ข้อความจาก WebSocket -> array ของ message (sample เต็มเหมือน JSON เดิม / snapshot / aggregate)
+  return (data) => {
+    if (data instanceof ArrayBuffer) return expand(decodeBinaryFrame(data), true);
+    const message = JSON.parse(data);
+    if (message.type === "columnar") return expand(message, false);
+    return [message];
+  };
+};